@@ -3,6 +3,8 @@ from crispy_forms.layout import HTML, Column, Layout, Row, Submit
 from django import forms
 from django.contrib.auth.models import Group, User
 
+from apps.core.decorators import group_names
+
 
 class UserPermissionMixin:
     """Mixin to handle permission fields for user forms."""
@@ -10,8 +12,8 @@ class UserPermissionMixin:
     def _get_permissions(self, user):
         """Get current permissions as dict of booleans."""
         return {
-            "is_user_admin": user.groups.filter(name="Brugeradministrator").exists(),
-            "is_signup_admin": user.groups.filter(name="Tilmeldingsadministrator").exists(),
+            "is_user_admin": "Brugeradministrator" in group_names(user),
+            "is_signup_admin": "Tilmeldingsadministrator" in group_names(user),
             "is_full_admin": user.is_superuser,
         }
 
@@ -23,6 +25,7 @@ class UserPermissionMixin:
 
         # Clear existing permission groups
         user.groups.remove(user_admin_group, signup_admin_group)
+        user.__dict__.pop("_group_names", None)
 
         # All users need is_staff to access the app
         user.is_staff = True
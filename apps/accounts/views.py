@@ -2,7 +2,6 @@ import logging
 import secrets
 import string
 
-import resend
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
@@ -17,6 +16,7 @@ from django.views import View
 from django.views.generic import CreateView, DetailView, ListView, UpdateView
 
 from apps.core.decorators import user_admin_required
+from apps.emails.transport import send_via_resend
 
 from .forms import ProfileForm, UserCreateForm, UserUpdateForm
 
@@ -133,8 +133,7 @@ def send_password_email(user, new_password):
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send(
+        send_via_resend(
             {
                 "from": settings.DEFAULT_FROM_EMAIL,
                 "to": [user.email],
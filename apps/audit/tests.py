@@ -144,3 +144,124 @@ class AuditCreateUpdateTest(TestCase):
         self.assertIn("capacity", log.changes)
         self.assertEqual(log.changes["capacity"]["old"], 30)
         self.assertEqual(log.changes["capacity"]["new"], 50)
+
+
+class SchoolTimelineTest(TestCase):
+    """Tests for the merged per-school timeline."""
+
+    def setUp(self):
+        from django.utils import timezone
+
+        from apps.bulk_email.models import BulkEmail, BulkEmailRecipient
+        from apps.emails.models import EmailLog, EmailType
+        from apps.schools.models import SchoolComment
+
+        self.user = User.objects.create_user(username="timeline", password="testpass123", is_staff=True)
+        self.school = School.objects.create(name="Timeline School", adresse="Testvej 1", kommune="Test Kommune")
+        other_school = School.objects.create(name="Other School", adresse="Testvej 2", kommune="Test Kommune")
+        course = Course.objects.create(start_date=date.today(), end_date=date.today(), capacity=30)
+        signup = CourseSignUp.objects.create(school=self.school, course=course, participant_name="Deltager")
+        SchoolComment.objects.create(school=self.school, comment="Ringede til skolen", created_by=self.user)
+        SchoolComment.objects.create(school=other_school, comment="Anden skole")
+        EmailLog.objects.create(
+            email_type=EmailType.SIGNUP_CONFIRMATION,
+            recipient_email="deltager@example.com",
+            recipient_name="Deltager",
+            subject="Bekræftelse",
+            course=course,
+            signup=signup,
+        )
+        bulk_email = BulkEmail.objects.create(subject="Nyhedsbrev", body_html="<p>Hej</p>", sent_at=timezone.now())
+        BulkEmailRecipient.objects.create(bulk_email=bulk_email, school=self.school, email="skole@example.com")
+        BulkEmail.objects.create(subject="Kladde", body_html="<p>Hej</p>")
+
+    def _all_events(self, page_size):
+        from apps.audit.timeline import school_timeline
+
+        events, cursor = school_timeline(self.school.pk, page_size=page_size)
+        while cursor:
+            page, cursor = school_timeline(self.school.pk, cursor, page_size=page_size)
+            events += page
+        return events
+
+    def test_timeline_merges_sources_newest_first(self):
+        events = self._all_events(page_size=50)
+        self.assertEqual({event["source"] for event in events}, {"activity", "comment", "email", "bulk_email"})
+        timestamps = [event["timestamp"] for event in events]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        self.assertNotIn("Anden skole", [getattr(event["object"], "comment", None) for event in events])
+
+    def test_keyset_pages_cover_every_event_once_with_equal_timestamps(self):
+        from django.utils import timezone
+
+        from apps.bulk_email.models import BulkEmail
+        from apps.emails.models import EmailLog
+        from apps.schools.models import SchoolComment
+
+        now = timezone.now()
+        ActivityLog.objects.filter(related_school=self.school).update(timestamp=now)
+        SchoolComment.objects.filter(school=self.school).update(created_at=now)
+        EmailLog.objects.update(sent_at=now)
+        BulkEmail.objects.filter(sent_at__isnull=False).update(sent_at=now)
+
+        expected = self._all_events(page_size=100)
+        paged = self._all_events(page_size=2)
+        self.assertGreater(len(expected), 2)
+        self.assertEqual(
+            [(event["source"], event["object"].pk) for event in paged],
+            [(event["source"], event["object"].pk) for event in expected],
+        )
+
+    def test_page_is_one_union_query_plus_one_per_source(self):
+        from apps.audit.timeline import school_timeline
+
+        with self.assertNumQueries(5):
+            school_timeline(self.school.pk)
+
+    def test_view_renders_page_and_htmx_fragment(self):
+        from django.urls import reverse
+
+        from apps.audit.timeline import encode_cursor
+
+        self.client.login(username="timeline", password="testpass123")
+        url = reverse("audit:school_timeline", kwargs={"school_id": self.school.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Ringede til skolen")
+        self.assertContains(response, "Nyhedsbrev")
+
+        cursor = encode_cursor(response.context["events"][0]["timestamp"], "zzz", 0)
+        response = self.client.get(url, {"cursor": cursor}, HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "<html")
+        self.assertNotContains(response, "Ingen aktivitet")
+
+    def test_invalid_cursor_starts_from_the_top(self):
+        from apps.audit.timeline import decode_cursor
+
+        self.assertIsNone(decode_cursor("not a cursor"))
+
+
+class ActivityLogListCursorTest(TestCase):
+    """The activity log pages by cursor on its timestamp."""
+
+    def test_pages_cover_every_log_once(self):
+        from django.urls import reverse
+
+        User.objects.create_user(username="auditor", password="testpass123", is_staff=True)
+        for i in range(60):
+            School.objects.create(name=f"Skole {i}", adresse="Testvej", kommune="Test Kommune")
+        expected = list(ActivityLog.objects.order_by("-timestamp", "-pk").values_list("pk", flat=True))
+        self.client.login(username="auditor", password="testpass123")
+
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(reverse("audit:activity_list"), params)
+            page = response.context["page_obj"]
+            seen += [log.pk for log in page]
+            if not page.has_next():
+                break
+            self.assertContains(response, "Næste")
+            params = {"cursor": page.next_cursor}
+        self.assertEqual(seen, expected)
@@ -7,5 +7,6 @@ app_name = 'audit'
 urlpatterns = [
     path('', views.ActivityLogListView.as_view(), name='activity_list'),
     path('school/<int:school_id>/', views.SchoolActivityListView.as_view(), name='school_activity'),
+    path('school/<int:school_id>/timeline/', views.SchoolTimelineView.as_view(), name='school_timeline'),
     path('course/<int:course_id>/', views.CourseActivityListView.as_view(), name='course_activity'),
 ]
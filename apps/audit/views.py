@@ -1,9 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
-from django.views.generic import ListView
+from django.views.generic import ListView, TemplateView
 
 from apps.audit.models import ActivityLog
+from apps.audit.timeline import school_timeline
 from apps.core.decorators import staff_required
 from apps.core.mixins import SortableMixin
 
@@ -27,6 +29,7 @@ class ActivityLogListView(SortableMixin, ListView):
     }
     default_sort = "timestamp"
     default_order = "desc"
+    cursor_pagination = True
 
     def get_base_queryset(self):
         qs = super().get_base_queryset()
@@ -93,6 +96,28 @@ class SchoolActivityListView(ListView):
         return context
 
 
+@method_decorator(staff_required, name="dispatch")
+class SchoolTimelineView(TemplateView):
+    """Everything that happened around a school, newest first, loaded page by page as the user scrolls."""
+
+    def get_template_names(self):
+        # Infinite scroll requests only need the next page of events
+        if self.request.headers.get("HX-Request"):
+            return ["audit/includes/timeline_events.html"]
+        return ["audit/school_timeline.html"]
+
+    def get_context_data(self, **kwargs):
+        from apps.schools.models import School
+
+        context = super().get_context_data(**kwargs)
+        school = get_object_or_404(School, pk=self.kwargs["school_id"])
+        cursor = self.request.GET.get("cursor")
+        context["school"] = school
+        context["cursor"] = cursor
+        context["events"], context["next_cursor"] = school_timeline(school.pk, cursor)
+        return context
+
+
 @method_decorator(staff_required, name="dispatch")
 class CourseActivityListView(ListView):
     """View activity for a specific course."""
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bulk_email", "0010_backfill_recipient_course_signup"),
+        ("courses", "0022_coursesignup_signup_email_lower_idx"),
+        ("schools", "0042_email_lower_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bulkemailrecipient",
+            index=models.Index(django.db.models.functions.text.Lower("email"), name="bulk_recipient_email_lower_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bulk_email", "0011_bulkemailrecipient_bulk_recipient_email_lower_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bulkemail",
+            name="recipient_snapshot",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bulkemail",
+            name="snapshot_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bulkemail",
+            name="snapshot_version",
+            field=models.CharField(blank=True, default="", max_length=50),
+        ),
+    ]
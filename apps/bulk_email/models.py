@@ -1,11 +1,25 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import BooleanField, Case, Count, F, IntegerField, Q, When
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 
 from apps.schools.models import Person, School
 
 User = get_user_model()
 
 
+class BulkEmailManager(models.Manager):
+    def with_counts(self):
+        """Annotate recipient/sent/failure/bounce counts in a single grouped query."""
+        return self.annotate(
+            recipient_count=Count("recipients"),
+            sent_count=Count("recipients", filter=Q(recipients__success=True)),
+            failure_count=Count("recipients", filter=Q(recipients__success=False)),
+            bounced_count=Count("recipients", filter=Q(recipients__bounced_at__isnull=False)),
+        )
+
+
 class BulkEmail(models.Model):
     KOORDINATOR = "koordinator"
     OEKONOMISK_ANSVARLIG = "oekonomisk_ansvarlig"
@@ -38,6 +52,13 @@ class BulkEmail(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Frozen recipient list for drafts (see apps.bulk_email.snapshot)
+    recipient_snapshot = models.JSONField(null=True, blank=True)
+    snapshot_version = models.CharField(max_length=50, blank=True, default="")
+    snapshot_at = models.DateTimeField(null=True, blank=True)
+
+    objects = BulkEmailManager()
+
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Masseudsendelse"
@@ -59,12 +80,19 @@ class BulkEmail(models.Model):
     @property
     def is_draft(self):
         """True if not yet sent and no recipients (never started sending)."""
-        return self.sent_at is None and not self.recipients.exists()
+        return self.sent_at is None and not self._has_recipients()
 
     @property
     def is_interrupted(self):
         """True if sending started but sent_at was never set."""
-        return self.sent_at is None and self.recipients.exists()
+        return self.sent_at is None and self._has_recipients()
+
+    def _has_recipients(self):
+        # Use the count annotated by BulkEmail.objects.with_counts() when present
+        count = getattr(self, "recipient_count", None)
+        if count is not None:
+            return count > 0
+        return self.recipients.exists()
 
     def get_filter_summary_display(self):
         """Return a human-readable summary of stored filter_params."""
@@ -100,6 +128,60 @@ class BulkEmailAttachment(models.Model):
         return self.filename
 
 
+class BulkEmailRecipientManager(models.Manager):
+    def with_status(self):
+        """
+        Annotate bounce/resend state in SQL.
+
+        - is_bounced: the recipient's own bounced_at is authoritative; Person.email_bounced_at
+          is only a fallback for recipients that were never resent.
+        - email_changed: the contact's email was changed outside of a resend.
+        - is_resolved: resent to a new address (a contact-updating resend counts only if it
+          has not bounced again).
+        - needs_action: bounced and unresolved, or the email changed but was not resent.
+        - status_rank: 0=failed, 1=needs action, 2=ok, 3=resolved (used for sorting).
+        """
+        not_resent = Q(resent_to="")
+        own_bounce = Q(bounced_at__isnull=False)
+        person_bounce = Q(person__email_bounced_at__isnull=False)
+        contact_updated = Q(person__email=F("resent_to"))
+        email_changed = (
+            not_resent
+            & Q(person__isnull=False)
+            & ~Q(person__email="")
+            & ~Q(Exact(Lower("person__email"), Lower("email")))
+        )
+        return self.annotate(
+            is_bounced=Case(
+                When(own_bounce, then=True),
+                When(not_resent & person_bounce, then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+            email_changed=Case(When(email_changed, then=True), default=False, output_field=BooleanField()),
+            is_resolved=Case(
+                When(not_resent, then=False),
+                When(own_bounce & contact_updated, then=False),
+                default=True,
+                output_field=BooleanField(),
+            ),
+            needs_action=Case(
+                When(not_resent & (own_bounce | person_bounce), then=True),
+                When(email_changed, then=True),
+                When(own_bounce & contact_updated, then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+            status_rank=Case(
+                When(success=False, then=0),
+                When(needs_action=True, then=1),
+                When(is_resolved=True, then=3),
+                default=2,
+                output_field=IntegerField(),
+            ),
+        )
+
+
 class BulkEmailRecipient(models.Model):
     bulk_email = models.ForeignKey(BulkEmail, on_delete=models.CASCADE, related_name="recipients")
     person = models.ForeignKey(Person, null=True, on_delete=models.SET_NULL)
@@ -115,8 +197,13 @@ class BulkEmailRecipient(models.Model):
     resent_to = models.CharField(max_length=254, blank=True, verbose_name="Gensendt til")
     resent_at = models.DateTimeField(null=True, blank=True, verbose_name="Gensendt")
 
+    objects = BulkEmailRecipientManager()
+
     class Meta:
         ordering = ["school__name"]
+        indexes = [
+            models.Index(Lower("email"), name="bulk_recipient_email_lower_idx"),
+        ]
 
     def __str__(self):
         status = "✓" if self.success else "✗"
@@ -2,13 +2,13 @@ import logging
 import re
 from datetime import date
 
-import resend
 from django.conf import settings
 from django.template import Context, Template
 from django.utils.formats import date_format
 
 from apps.bulk_email.models import BulkEmail, BulkEmailRecipient
 from apps.emails.services import DEFAULT_REPLY_TO, check_email_domain_allowed
+from apps.emails.transport import send_via_resend
 from apps.schools.models import Person
 
 logger = logging.getLogger(__name__)
@@ -248,7 +248,6 @@ def send_to_school(bulk_email, school, person, attachment_data=None, course_sign
         return recipient
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
         if attachment_data is not None:
             attachments = attachment_data
         else:
@@ -267,10 +266,9 @@ def send_to_school(bulk_email, school, person, attachment_data=None, course_sign
         if attachments:
             params["attachments"] = attachments
 
-        result = resend.Emails.send(params)
+        result = send_via_resend(params)
         recipient.success = True
-        if hasattr(result, "id"):
-            recipient.resend_email_id = result.id
+        recipient.resend_email_id = result.get("id", "")
     except Exception as e:
         logger.error(f"[BULK EMAIL] Failed to send to {email_address}: {e}")
         recipient.success = False
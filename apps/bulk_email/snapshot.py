@@ -0,0 +1,193 @@
+"""
+Frozen recipient snapshots for draft campaigns.
+
+Resolving recipients means filtering schools (with the same logic as the school
+list), prefetching their contacts and looking up undervisere. Dry run, preview
+and send used to do this independently, so a dry run followed by a send did the
+work twice and could disagree. Instead the resolved list is stored on the draft
+as primary keys together with a data-version stamp. The stamp digests the row
+count and newest updated_at of every model that affects resolution (a save
+moves the newest updated_at, a delete the count) together with today's date
+(the status filters depend on the current school year). It is derived from
+the tables themselves rather than from a counter bumped on every write, so
+writes to these models never contend for a shared row. Readers hydrate the
+stored keys and only re-resolve when the stamp or the
+recipient_types/filter_params no longer match.
+
+Two limitations follow from reading the stamp off the tables:
+
+- It costs one count/max aggregate per versioned model over the whole table,
+  on every dry run, preview and send of a draft. The aggregates aren't
+  scoped to the draft's schools because a change anywhere can move a school
+  into the filter (a new contact matching the search, a new enrollment).
+- A QuerySet.update() that leaves updated_at alone goes unnoticed, so every
+  bulk update of these models has to set updated_at itself. The course
+  signup counters are the exception: they are derived from the signups,
+  whose own count and updated_at are already in the stamp.
+"""
+
+import hashlib
+
+from django.apps import apps
+from django.db.models import Count, Max
+from django.http import QueryDict
+from django.utils import timezone
+
+from apps.bulk_email.services import resolve_recipients
+from apps.schools.mixins import SchoolFilterMixin
+
+# Models whose changes can alter the filtered schools or the resolved recipients
+VERSIONED_MODELS = (
+    "schools.School",
+    "schools.Person",
+    "schools.Kommune",
+    "schools.SchoolYear",
+    "courses.Course",
+    "courses.CourseSignUp",
+)
+
+
+def current_data_version():
+    """Return the stamp that a snapshot built right now would carry."""
+    state = [
+        apps.get_model(label).objects.order_by().aggregate(count=Count("pk"), last=Max("updated_at"))
+        for label in VERSIONED_MODELS
+    ]
+    digest = hashlib.sha256(repr(state).encode()).hexdigest()[:16]
+    return f"{digest}:{timezone.localdate().isoformat()}"
+
+
+def filter_schools(filter_params):
+    """Apply SchoolFilterMixin to stored filter_params and return the matching schools as a list."""
+    fake_get = QueryDict(mutable=True)
+    for k, v in (filter_params or {}).items():
+        if isinstance(v, list):
+            fake_get.setlist(k, [str(x) for x in v])
+        else:
+            fake_get[k] = str(v)
+
+    class _FakeRequest:
+        GET = fake_get
+
+    class _FilterView(SchoolFilterMixin):
+        request = _FakeRequest()
+
+    return list(_FilterView().get_school_filter_queryset())
+
+
+def _snapshot_key(recipient_types, filter_params):
+    return {"recipient_types": sorted(recipient_types or []), "filter_params": filter_params or {}}
+
+
+def build_snapshot(schools, triples, recipient_types, filter_params):
+    """Serialize resolved recipients to primary keys."""
+    return {
+        **_snapshot_key(recipient_types, filter_params),
+        "schools": [school.pk for school in schools],
+        "recipients": [
+            [
+                school.pk,
+                person.pk,
+                course_signup.pk if course_signup else None,
+                roles,
+            ]
+            for school, person, roles, course_signup in triples
+        ],
+    }
+
+
+def hydrate_snapshot(snapshot):
+    """
+    Load the objects referenced by a snapshot. Returns (schools, triples) in the
+    same shape and order as filter_schools() + resolve_recipients().
+    """
+    School = apps.get_model("schools", "School")
+    Person = apps.get_model("schools", "Person")
+    CourseSignUp = apps.get_model("courses", "CourseSignUp")
+
+    schools_by_pk = School.objects.select_related("kommune").in_bulk(snapshot["schools"])
+    person_pks = [row[1] for row in snapshot["recipients"] if row[1]]
+    signup_pks = [row[2] for row in snapshot["recipients"] if row[2]]
+    people = Person.objects.in_bulk(person_pks) if person_pks else {}
+    signups = CourseSignUp.objects.in_bulk(signup_pks) if signup_pks else {}
+
+    schools = [schools_by_pk[pk] for pk in snapshot["schools"] if pk in schools_by_pk]
+    triples = []
+    for school_pk, person_pk, signup_pk, roles in snapshot["recipients"]:
+        school = schools_by_pk.get(school_pk)
+        course_signup = signups.get(signup_pk) if signup_pk else None
+        if person_pk:
+            person = people.get(person_pk)
+        elif course_signup:
+            person = Person(
+                name=course_signup.participant_name,
+                email=course_signup.participant_email,
+                phone=course_signup.participant_phone,
+            )
+        else:
+            person = None
+        if school is None or person is None:
+            continue
+        triples.append((school, person, roles, course_signup))
+    return schools, triples
+
+
+def snapshot_is_current(campaign, recipient_types, filter_params):
+    snapshot = campaign.recipient_snapshot
+    if not snapshot or campaign.snapshot_version != current_data_version():
+        return False
+    key = _snapshot_key(recipient_types, filter_params)
+    return (
+        snapshot.get("recipient_types") == key["recipient_types"]
+        and snapshot.get("filter_params") == key["filter_params"]
+    )
+
+
+def refresh_snapshot(campaign, recipient_types, filter_params):
+    """Resolve recipients now and store the result on the draft. Returns (schools, triples)."""
+    # Read the stamp first so changes made while resolving leave the snapshot stale
+    version = current_data_version()
+    schools = filter_schools(filter_params)
+    triples = resolve_recipients(schools, recipient_types)
+    campaign.recipient_snapshot = build_snapshot(schools, triples, recipient_types, filter_params)
+    campaign.snapshot_version = version
+    campaign.snapshot_at = timezone.now()
+    campaign.save(update_fields=["recipient_snapshot", "snapshot_version", "snapshot_at"])
+    return schools, triples
+
+
+def get_recipients(campaign, recipient_types, filter_params):
+    """
+    Return (schools, triples) for a campaign, reusing its snapshot when the data
+    has not changed. Without a campaign, recipients are resolved without storing.
+    """
+    if campaign is None:
+        schools = filter_schools(filter_params)
+        return schools, resolve_recipients(schools, recipient_types)
+    if snapshot_is_current(campaign, recipient_types, filter_params):
+        return hydrate_snapshot(campaign.recipient_snapshot)
+    return refresh_snapshot(campaign, recipient_types, filter_params)
+
+
+def snapshot_person_for_school(campaign, school_pk, recipient_types):
+    """First snapshot recipient for a school (used by preview), or None if no current snapshot applies."""
+    snapshot = campaign.recipient_snapshot
+    if (
+        not snapshot
+        or campaign.snapshot_version != current_data_version()
+        or snapshot.get("recipient_types") != sorted(recipient_types or [])
+    ):
+        return None
+    for row_school_pk, person_pk, signup_pk, _roles in snapshot["recipients"]:
+        if row_school_pk != school_pk:
+            continue
+        if person_pk:
+            return apps.get_model("schools", "Person").objects.filter(pk=person_pk).first()
+        signup = apps.get_model("courses", "CourseSignUp").objects.filter(pk=signup_pk).first()
+        if signup:
+            return apps.get_model("schools", "Person")(
+                name=signup.participant_name,
+                email=signup.participant_email,
+                phone=signup.participant_phone,
+            )
+    return None
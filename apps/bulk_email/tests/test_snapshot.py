@@ -0,0 +1,114 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from apps.bulk_email.models import BulkEmail, BulkEmailRecipient
+from apps.bulk_email.snapshot import current_data_version, get_recipients
+from apps.schools.models import Person, School, SchoolYear
+
+User = get_user_model()
+
+
+@override_settings(RESEND_API_KEY=None)
+class RecipientSnapshotTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username="snap", password="pw", is_staff=True, is_superuser=True)
+        self.client.login(username="snap", password="pw")
+        self.school = School.objects.create(
+            name="Snapshot Skole",
+            kommune="Kolding",
+            enrolled_at="2024-08-01",
+            active_from="2024-08-01",
+            signup_token="tok-snap",
+            signup_password="pw",
+        )
+        Person.objects.create(school=self.school, name="KS", email="ks@s.dk", is_koordinator=True)
+        self.filter_params = {"kommune": "Kolding"}
+        self.draft = BulkEmail.objects.create(
+            subject="Snapshot",
+            body_html="<p>x</p>",
+            recipient_types=[BulkEmail.KOORDINATOR],
+            filter_params=self.filter_params,
+        )
+
+    def _dry_run(self, **extra):
+        payload = {
+            "recipient_types": [BulkEmail.KOORDINATOR],
+            "subject": "{{ skole_navn }}",
+            "body_html": "",
+            "filter_params": self.filter_params,
+            "draft_pk": self.draft.pk,
+            **extra,
+        }
+        response = self.client.post(reverse("bulk_email:dry_run"), json.dumps(payload), content_type="application/json")
+        return json.loads(response.content)
+
+    def _send(self):
+        payload = {
+            "subject": "Snapshot",
+            "body_html": "<p>x</p>",
+            "recipient_types": [BulkEmail.KOORDINATOR],
+            "filter_params": self.filter_params,
+            "attachment_pks": [],
+            "draft_pk": self.draft.pk,
+        }
+        response = self.client.post(reverse("bulk_email:send"), json.dumps(payload), content_type="application/json")
+        list(response.streaming_content)
+
+    def test_dry_run_stores_snapshot_on_draft(self):
+        data = self._dry_run()
+        self.assertEqual(data["total"], 1)
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.snapshot_version, current_data_version())
+        self.assertEqual(len(self.draft.recipient_snapshot["recipients"]), 1)
+
+    def test_send_reuses_current_snapshot(self):
+        self._dry_run()
+        with patch("apps.bulk_email.snapshot.resolve_recipients") as resolve:
+            self._send()
+        resolve.assert_not_called()
+        self.assertEqual(BulkEmailRecipient.objects.filter(bulk_email=self.draft).count(), 1)
+        self.draft.refresh_from_db()
+        self.assertIsNone(self.draft.recipient_snapshot)
+
+    def test_data_change_invalidates_snapshot(self):
+        self._dry_run()
+        Person.objects.create(school=self.school, name="KT", email="kt@s.dk", is_koordinator=True)
+        self._send()
+        emails = set(BulkEmailRecipient.objects.filter(bulk_email=self.draft).values_list("email", flat=True))
+        self.assertEqual(emails, {"ks@s.dk", "kt@s.dk"})
+
+    def test_data_version_follows_saves_and_deletes(self):
+        person = Person.objects.create(school=self.school, name="KU", email="ku@s.dk")
+        year = SchoolYear.objects.create(name="2090/91", start_date="2090-08-01", end_date="2091-07-31")
+        versions = [current_data_version()]
+        self.assertEqual(current_data_version(), versions[0])
+
+        person.is_koordinator = True
+        person.save()
+        versions.append(current_data_version())
+        year.end_date = "2091-06-30"
+        year.save()
+        versions.append(current_data_version())
+        person.delete()
+        versions.append(current_data_version())
+
+        self.assertEqual(len(set(versions)), 4)
+
+    def test_changed_recipient_types_recompute(self):
+        self._dry_run()
+        self.draft.refresh_from_db()
+        _schools, triples = get_recipients(self.draft, [BulkEmail.OEKONOMISK_ANSVARLIG], self.filter_params)
+        self.assertEqual(triples, [])
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.recipient_snapshot["recipient_types"], [BulkEmail.OEKONOMISK_ANSVARLIG])
+
+    def test_dry_run_without_draft_does_not_store(self):
+        data = self._dry_run(draft_pk=None)
+        self.assertEqual(data["total"], 1)
+        self.draft.refresh_from_db()
+        self.assertIsNone(self.draft.recipient_snapshot)
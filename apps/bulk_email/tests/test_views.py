@@ -54,6 +54,19 @@ class BulkEmailListViewTest(TestCase):
         content = response.content.decode()
         self.assertLess(content.index("Afbrudt"), content.index("Sent"))
 
+    def test_list_counts_come_from_one_query(self):
+        s = School.objects.create(name="S", signup_token="t", signup_password="p")
+        for i in range(5):
+            campaign = BulkEmail.objects.create(subject=f"C{i}", body_html="", recipient_types=[BulkEmail.KOORDINATOR])
+            BulkEmailRecipient.objects.create(bulk_email=campaign, school=s, email="a@x.dk", success=True)
+            BulkEmailRecipient.objects.create(bulk_email=campaign, school=s, email="b@x.dk", success=False)
+        self.client.get(reverse("bulk_email:list"))
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("bulk_email:list"))
+        campaign = response.context["campaigns"][0]
+        self.assertEqual((campaign.recipient_count, campaign.failure_count), (2, 1))
+        self.assertContains(response, "Afbrudt")
+
 
 class BulkEmailDetailViewTest(TestCase):
     def setUp(self):
@@ -86,6 +99,89 @@ class BulkEmailDetailViewTest(TestCase):
         response = self.client.get(reverse("bulk_email:detail", args=[self.campaign.pk]))
         self.assertContains(response, "Skole")
 
+    def _add_recipients(self):
+        from django.utils import timezone
+
+        other = School.objects.create(name="Anden skole", signup_token="tok2", signup_password="pw")
+        bounced_person = Person.objects.create(school=other, name="B", email="b@s.dk")
+        BulkEmailRecipient.objects.create(
+            bulk_email=self.campaign,
+            school=other,
+            person=bounced_person,
+            email="b@s.dk",
+            success=True,
+            bounced_at=timezone.now(),
+        )
+        BulkEmailRecipient.objects.create(
+            bulk_email=self.campaign, school=self.school, email="fejl@s.dk", success=False, error_message="Afvist"
+        )
+        changed = Person.objects.create(school=self.school, name="C", email="ny@s.dk")
+        BulkEmailRecipient.objects.create(
+            bulk_email=self.campaign, school=self.school, person=changed, email="gammel@s.dk", success=True
+        )
+        resolved = Person.objects.create(school=self.school, name="D", email="d-ny@s.dk")
+        BulkEmailRecipient.objects.create(
+            bulk_email=self.campaign,
+            school=self.school,
+            person=resolved,
+            email="d@s.dk",
+            success=True,
+            resent_to="d-ny@s.dk",
+        )
+
+    def test_detail_summary_from_aggregates(self):
+        self._add_recipients()
+        response = self.client.get(reverse("bulk_email:detail", args=[self.campaign.pk]))
+        self.assertEqual(response.context["sent_count"], 4)
+        self.assertEqual(response.context["failed_count"], 1)
+        # Bounced recipient plus the recipient whose contact email changed without a resend
+        self.assertEqual(response.context["bounced_count"], 2)
+        self.assertEqual(response.context["missing_school_names"], ["Anden skole"])
+
+    def test_recipient_status_annotations(self):
+        self._add_recipients()
+        rows = {r.email: r for r in BulkEmailRecipient.objects.with_status().filter(bulk_email=self.campaign)}
+        self.assertTrue(rows["b@s.dk"].is_bounced)
+        self.assertTrue(rows["b@s.dk"].needs_action)
+        self.assertTrue(rows["gammel@s.dk"].email_changed)
+        self.assertTrue(rows["d@s.dk"].is_resolved)
+        self.assertFalse(rows["d@s.dk"].needs_action)
+        self.assertFalse(rows["p@s.dk"].needs_action)
+        self.assertEqual(rows["fejl@s.dk"].status_rank, 0)
+
+    def test_recipients_partial_filters(self):
+        self._add_recipients()
+        url = reverse("bulk_email:recipients", args=[self.campaign.pk])
+        response = self.client.get(url, {"status": "failed"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.email for r in response.context["recipients"]], ["fejl@s.dk"])
+        response = self.client.get(url, {"status": "bounced"})
+        self.assertEqual([r.email for r in response.context["recipients"]], ["b@s.dk"])
+        response = self.client.get(url, {"status": "needs_action"})
+        self.assertEqual(sorted(r.email for r in response.context["recipients"]), ["b@s.dk", "gammel@s.dk"])
+
+    def test_recipients_partial_paginates(self):
+        for i in range(60):
+            BulkEmailRecipient.objects.create(
+                bulk_email=self.campaign, school=self.school, email=f"r{i}@s.dk", success=True
+            )
+        url = reverse("bulk_email:recipients", args=[self.campaign.pk])
+        response = self.client.get(url)
+        self.assertEqual(len(response.context["recipients"]), 50)
+        response = self.client.get(url, {"page": 2})
+        self.assertEqual(len(response.context["recipients"]), 11)
+
+    def test_detail_query_count_is_constant(self):
+        for i in range(30):
+            person = Person.objects.create(school=self.school, name=f"P{i}", email=f"p{i}@s.dk")
+            BulkEmailRecipient.objects.create(
+                bulk_email=self.campaign, school=self.school, person=person, email=person.email, success=True
+            )
+        url = reverse("bulk_email:detail", args=[self.campaign.pk])
+        self.client.get(url)
+        with self.assertNumQueries(8):
+            self.client.get(url)
+
 
 class AttachmentUploadTest(TestCase):
     def setUp(self):
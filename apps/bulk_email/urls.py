@@ -10,6 +10,7 @@ urlpatterns = [
     path("ny/upload/", views.BulkEmailAttachmentUploadView.as_view(), name="attachment_upload"),
     path("ny/save-draft/", views.BulkEmailDraftSaveView.as_view(), name="save_draft"),
     path("<int:pk>/", views.BulkEmailDetailView.as_view(), name="detail"),
+    path("<int:pk>/modtagere/", views.BulkEmailRecipientListView.as_view(), name="recipients"),
     path("preview/", views.BulkEmailPreviewView.as_view(), name="preview"),
     path("dry-run/", views.BulkEmailDryRunView.as_view(), name="dry_run"),
     path("send/", views.BulkEmailSendView.as_view(), name="send"),
@@ -2,10 +2,10 @@ import json
 import logging
 import time
 
-import resend
 from django.conf import settings
-from django.db.models import F
-from django.http import FileResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Q
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
@@ -13,17 +13,19 @@ from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.generic import DetailView, ListView
 
-from apps.bulk_email.models import BulkEmail, BulkEmailAttachment
+from apps.bulk_email.models import BulkEmail, BulkEmailAttachment, BulkEmailRecipient
 from apps.bulk_email.services import (
     VARIABLE_NAMES,
     find_missing_variables,
     make_urls_absolute,
     render_for_school,
-    resolve_recipients,
     send_to_school,
 )
+from apps.bulk_email.snapshot import get_recipients, snapshot_person_for_school
+from apps.core import metrics
 from apps.core.decorators import full_admin_required
 from apps.emails.services import DEFAULT_REPLY_TO, check_email_domain_allowed
+from apps.emails.transport import send_via_resend
 from apps.schools.mixins import SchoolFilterMixin
 from apps.schools.models import Person, School
 
@@ -37,17 +39,45 @@ class BulkEmailListView(ListView):
     context_object_name = "campaigns"
 
     def get_queryset(self):
-        return BulkEmail.objects.prefetch_related("recipients").order_by(
+        return BulkEmail.objects.with_counts().order_by(
             F("sent_at").asc(nulls_first=True),
             "-created_at",
         )
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        for campaign in context["campaigns"]:
-            campaign.recipient_count = campaign.recipients.count()
-            campaign.failure_count = campaign.recipients.filter(success=False).count()
-        return context
+
+RECIPIENT_STATUS_FILTERS = {
+    "failed": Q(success=False),
+    "bounced": Q(success=True, is_bounced=True),
+    "needs_action": Q(success=True, needs_action=True),
+}
+
+RECIPIENT_SORTS = {
+    "school": ["school__name", "pk"],
+    "-school": ["-school__name", "-pk"],
+    "status": ["status_rank", "school__name", "pk"],
+    "-status": ["-status_rank", "school__name", "pk"],
+}
+
+
+def get_recipient_summary(campaign):
+    """Sent/failed/needs-action counts and schools where every delivered email needs action."""
+    recipients = BulkEmailRecipient.objects.with_status().filter(bulk_email=campaign)
+    summary = recipients.aggregate(
+        sent_count=Count("pk", filter=Q(success=True)),
+        failed_count=Count("pk", filter=Q(success=False)),
+        bounced_count=Count("pk", filter=Q(success=True, needs_action=True)),
+    )
+    missing_schools = list(
+        recipients.filter(success=True, school__isnull=False)
+        .values("school_id", "school__name")
+        .annotate(total=Count("pk"), pending=Count("pk", filter=Q(needs_action=True)))
+        .filter(total=F("pending"))
+        .order_by("school__name")
+        .values_list("school__name", flat=True)
+    )
+    summary["schools_missing"] = len(missing_schools)
+    summary["missing_school_names"] = missing_schools
+    return summary
 
 
 @method_decorator(full_admin_required, name="dispatch")
@@ -59,69 +89,55 @@ class BulkEmailDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         campaign = self.object
-        recipients = list(
-            campaign.recipients.select_related("school", "person", "course_signup").order_by("success", "school__name")
-        )
-
-        # Collect person bounce status (for recipients where person still exists)
-        person_pks = [r.person_id for r in recipients if r.person_id]
-        bounced_person_pks = set(
-            Person.objects.filter(pk__in=person_pks, email_bounced_at__isnull=False).values_list("pk", flat=True)
-        )
+        context.update(get_recipient_summary(campaign))
+        context.update(BulkEmailRecipientListView.get_table_context(self.request, campaign))
+        context["filter_summary"] = campaign.get_filter_summary_display()
+        return context
 
-        # Annotate recipients with bounce info
-        bounced_count = 0
-        schools_with_bounces = {}  # school_id -> [has_non_bounced]
-        for r in recipients:
-            # bounced_at on the recipient itself is authoritative (survives person deletion)
-            # Fall back to Person.email_bounced_at only for legacy recipients (no resend done)
-            if r.resent_to:
-                # Resend was attempted — only bounced_at matters (set again by webhook if re-bounced)
-                r.is_bounced = bool(r.bounced_at)
-            else:
-                r.is_bounced = bool(r.bounced_at) or (r.person_id in bounced_person_pks)
 
-            # Detect if contact email was changed externally (not via resend)
-            r.email_changed = (
-                r.person and r.person.email and r.person.email.lower() != r.email.lower() and not r.resent_to
-            )
+@method_decorator(full_admin_required, name="dispatch")
+class BulkEmailRecipientListView(View):
+    """HTMX partial: one page of a campaign's recipients, optionally filtered by status."""
+
+    paginate_by = 50
+
+    @classmethod
+    def get_table_context(cls, request, campaign):
+        status = request.GET.get("status", "")
+        sort = request.GET.get("sort", "")
+        recipients = (
+            BulkEmailRecipient.objects.with_status()
+            .filter(bulk_email=campaign)
+            .select_related("school", "person", "course_signup")
+        )
+        if status in RECIPIENT_STATUS_FILTERS:
+            recipients = recipients.filter(RECIPIENT_STATUS_FILTERS[status])
+        else:
+            status = ""
+        if sort in RECIPIENT_SORTS:
+            recipients = recipients.order_by(*RECIPIENT_SORTS[sort])
+        else:
+            sort = ""
+            recipients = recipients.order_by("success", "school__name", "pk")
+
+        page_obj = Paginator(recipients, cls.paginate_by).get_page(request.GET.get("page"))
+        return {
+            "campaign": campaign,
+            "page_obj": page_obj,
+            "recipients": page_obj.object_list,
+            "status": status,
+            "sort": sort,
+            "status_filters": [
+                ("", "Alle"),
+                ("failed", "Fejlede"),
+                ("bounced", "Bouncede"),
+                ("needs_action", "Kræver handling"),
+            ],
+        }
 
-            if r.resent_to:
-                contact_was_updated = r.person and r.person.email == r.resent_to
-                if contact_was_updated:
-                    # Contact email was changed — resolved only if not re-bounced
-                    r.is_resolved = not r.is_bounced
-                else:
-                    # One-off resend — resolved for this campaign (can't track re-bounces)
-                    r.is_resolved = True
-            else:
-                r.is_resolved = False
-
-            # Count as unresolved if bounced OR email changed but not resent
-            r.needs_action = (r.is_bounced and not r.is_resolved) or r.email_changed
-            if r.needs_action:
-                bounced_count += 1
-
-            # Track per-school bounce status
-            if r.school_id and r.success:
-                if r.school_id not in schools_with_bounces:
-                    schools_with_bounces[r.school_id] = {
-                        "all_bounced": True,
-                        "name": r.school.name if r.school else "—",
-                    }
-                if not r.needs_action:
-                    schools_with_bounces[r.school_id]["all_bounced"] = False
-
-        missing_schools = sorted(s["name"] for s in schools_with_bounces.values() if s["all_bounced"])
-
-        context["recipients"] = recipients
-        context["sent_count"] = sum(1 for r in recipients if r.success)
-        context["failed_count"] = sum(1 for r in recipients if not r.success)
-        context["bounced_count"] = bounced_count
-        context["schools_missing"] = len(missing_schools)
-        context["missing_school_names"] = missing_schools
-        context["filter_summary"] = campaign.get_filter_summary_display()
-        return context
+    def get(self, request, pk):
+        campaign = get_object_or_404(BulkEmail, pk=pk)
+        return render(request, "bulk_email/partials/recipients_table.html", self.get_table_context(request, campaign))
 
 
 @method_decorator(full_admin_required, name="dispatch")
@@ -129,8 +145,6 @@ class BulkEmailResendView(View):
     """Resend a bulk email to a new address for a specific recipient."""
 
     def post(self, request, recipient_pk):
-        from apps.bulk_email.models import BulkEmailRecipient
-
         recipient = get_object_or_404(
             BulkEmailRecipient.objects.select_related("bulk_email", "school", "person"), pk=recipient_pk
         )
@@ -163,7 +177,7 @@ class BulkEmailResendView(View):
                 person.email = new_email
                 person.email_bounced_at = None
                 person.save(update_fields=["email", "email_bounced_at"])
-            return JsonResponse({"success": True, "email": new_email, "contact_updated": update_contact})
+            return self._success_response(campaign, new_email, update_contact)
 
         try:
             # Load attachments
@@ -182,8 +196,7 @@ class BulkEmailResendView(View):
             if attachments:
                 params["attachments"] = attachments
 
-            resend.api_key = settings.RESEND_API_KEY
-            resend.Emails.send(params)
+            send_via_resend(params)
 
             recipient.resent_to = new_email
             recipient.resent_at = timezone.now()
@@ -195,7 +208,7 @@ class BulkEmailResendView(View):
                 person.email_bounced_at = None
                 person.save(update_fields=["email", "email_bounced_at"])
 
-            return JsonResponse({"success": True, "email": new_email, "contact_updated": update_contact})
+            return self._success_response(campaign, new_email, update_contact)
 
         except (ConnectionError, OSError) as e:
             logger.error(f"[RESEND] Network error resending to {new_email}: {e}")
@@ -206,6 +219,20 @@ class BulkEmailResendView(View):
             logger.error(f"[RESEND] Failed to resend to {new_email}: {e}")
             return JsonResponse({"error": str(e)[:500]}, status=500)
 
+    def _success_response(self, campaign, new_email, update_contact):
+        # Return fresh summary numbers; the page only shows one page of recipients
+        summary = get_recipient_summary(campaign)
+        return JsonResponse(
+            {
+                "success": True,
+                "email": new_email,
+                "contact_updated": update_contact,
+                "bounced_count": summary["bounced_count"],
+                "schools_missing": summary["schools_missing"],
+                "missing_school_names": summary["missing_school_names"],
+            }
+        )
+
 
 @method_decorator(full_admin_required, name="dispatch")
 class BulkEmailCreateView(SchoolFilterMixin, View):
@@ -322,10 +349,17 @@ class BulkEmailPreviewView(View):
 
         school = get_object_or_404(School, pk=school_pk)
 
-        # Pick first matching person across all selected types (for preview only)
+        # Prefer the recipient the draft's snapshot will actually send to
         person = None
+        draft_pk = payload.get("draft_pk")
+        if draft_pk:
+            draft = BulkEmail.objects.filter(pk=draft_pk, sent_at__isnull=True).first()
+            if draft:
+                person = snapshot_person_for_school(draft, school.pk, list(recipient_types))
+
+        # Otherwise pick first matching person across all selected types (for preview only)
         people = school.people.exclude(email="").filter(email__isnull=False)
-        if BulkEmail.KOORDINATOR in recipient_types:
+        if person is None and BulkEmail.KOORDINATOR in recipient_types:
             person = people.filter(is_koordinator=True).first()
         if person is None and BulkEmail.OEKONOMISK_ANSVARLIG in recipient_types:
             person = people.filter(is_oekonomisk_ansvarlig=True).first()
@@ -375,26 +409,14 @@ class BulkEmailDryRunView(View):
         body_html = payload.get("body_html", "")
         filter_params = payload.get("filter_params", {})
 
-        # Build a fake request to use the mixin filter logic
-        fake_qs = QueryDict(mutable=True)
-        for k, v in filter_params.items():
-            if isinstance(v, list):
-                fake_qs.setlist(k, [str(x) for x in v])
-            else:
-                fake_qs[k] = str(v)
-
-        class _FakeRequest:
-            GET = fake_qs
-
-        # Use SchoolFilterMixin to resolve filtered schools
-        class _FilterView(SchoolFilterMixin):
-            request = _FakeRequest()
-
-        view = _FilterView()
-        schools = list(view.get_school_filter_queryset())
+        # Resolve via the draft's snapshot when there is one, so send reuses this result
+        draft = None
+        draft_pk = payload.get("draft_pk")
+        if draft_pk:
+            draft = BulkEmail.objects.filter(pk=draft_pk, sent_at__isnull=True).first()
+        schools, triples = get_recipients(draft, recipient_types, filter_params)
 
         do_not_contact_schools = [s for s in schools if s.do_not_contact_at]
-        triples = resolve_recipients(schools, recipient_types)
         matched_school_pks = {school.pk for school, _person, _roles, _signup in triples}
 
         # Combined template for variable analysis
@@ -438,7 +460,7 @@ class BulkEmailDryRunView(View):
 
 
 @method_decorator(full_admin_required, name="dispatch")
-class BulkEmailSendView(SchoolFilterMixin, View):
+class BulkEmailSendView(View):
     def post(self, request):
         try:
             data = json.loads(request.body)
@@ -505,7 +527,6 @@ class BulkEmailSendView(SchoolFilterMixin, View):
                     logger.info(f"[TEST EMAIL] DEV MODE — To: {test_email}")
                 else:
                     try:
-                        resend.api_key = settings.RESEND_API_KEY
                         params = {
                             "from": settings.DEFAULT_FROM_EMAIL,
                             "to": [test_email],
@@ -515,7 +536,7 @@ class BulkEmailSendView(SchoolFilterMixin, View):
                         }
                         if test_attachments:
                             params["attachments"] = test_attachments
-                        resend.Emails.send(params)
+                        send_via_resend(params)
                     except Exception as e:
                         success = False
                         error = str(e)[:200]
@@ -528,21 +549,7 @@ class BulkEmailSendView(SchoolFilterMixin, View):
             response["X-Accel-Buffering"] = "no"
             return response
 
-        # Normal send path
-        fake_get = QueryDict(mutable=True)
-        for k, v in filter_params.items():
-            if isinstance(v, list):
-                fake_get.setlist(k, [str(x) for x in v])
-            else:
-                fake_get[k] = str(v)
-        original_get = request.GET
-        request.GET = fake_get
-        schools = list(self.get_school_filter_queryset())
-        request.GET = original_get
-
-        recipient_triples = resolve_recipients(schools, recipient_types)
-
-        # Use existing draft or create new campaign
+        # Normal send path: use existing draft or create new campaign
         draft_pk = data.get("draft_pk")
         if draft_pk:
             try:
@@ -568,6 +575,9 @@ class BulkEmailSendView(SchoolFilterMixin, View):
                 sent_by=request.user,
             )
 
+        # Reuses the dry run's snapshot unless the underlying data changed since
+        schools, recipient_triples = get_recipients(campaign, recipient_types, filter_params)
+
         if attachment_pks:
             BulkEmailAttachment.objects.filter(pk__in=attachment_pks).update(bulk_email=campaign)
 
@@ -586,6 +596,7 @@ class BulkEmailSendView(SchoolFilterMixin, View):
 
             yield f"data: {json.dumps({'type': 'start', 'total': len(recipient_triples), 'skipped': skipped})}\n\n"
 
+            started = time.monotonic()
             for n, (school, person, _roles, course_signup) in enumerate(recipient_triples, start=1):
                 if n > 1:
                     time.sleep(0.25)
@@ -607,8 +618,10 @@ class BulkEmailSendView(SchoolFilterMixin, View):
                 }
                 yield f"data: {json.dumps(event)}\n\n"
 
+            metrics.record_bulk_send(sent + failed, time.monotonic() - started)
             campaign.sent_at = timezone.now()
-            campaign.save(update_fields=["sent_at"])
+            campaign.recipient_snapshot = None
+            campaign.save(update_fields=["sent_at", "recipient_snapshot"])
 
             detail_url = reverse("bulk_email:detail", args=[campaign.pk])
             yield f"data: {json.dumps({'type': 'done', 'sent': sent, 'failed': failed, 'skipped': skipped, 'detail_url': detail_url})}\n\n"
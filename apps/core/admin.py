@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ProjectSettings
+from .models import Job, ProjectSettings
 
 
 @admin.register(ProjectSettings)
@@ -32,3 +32,25 @@ class ProjectSettingsAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["kind", "status", "progress", "triggered_by", "created_at", "started_at", "finished_at"]
+    list_filter = ["kind", "status"]
+    readonly_fields = [
+        "kind",
+        "status",
+        "progress",
+        "triggered_by",
+        "worker",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "heartbeat_at",
+        "error",
+        "log",
+    ]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,196 @@
+"""
+Catalog of the backups stored in S3.
+
+Backups live under `backups/<backup_name>/` with timestamped names
+(`backup_YYYYMMDD_HHMMSS`), next to the shared media blobs under
+`backups/media-blobs/`. Listings are always paginated. Retention is decided per
+backup (by the timestamp in its name) so a backup is either kept whole or
+deleted whole, and deletes go out in batches of up to 1,000 keys. Media blobs
+are deleted only when no retained backup's media manifest references them.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from apps.core.backup_media import MANIFEST_FILENAME as MEDIA_MANIFEST_FILENAME
+from apps.core.backup_media import S3_BLOB_PREFIX
+
+BACKUP_PREFIX = "backups/"
+NAME_FORMAT = "backup_%Y%m%d_%H%M%S"
+DELETE_BATCH_SIZE = 1000
+# Blobs younger than this are never collected, so a backup that is still uploading
+# (blobs first, manifest last) can't lose its blobs to a concurrent cleanup
+BLOB_GRACE_PERIOD = timedelta(days=1)
+
+
+@dataclass
+class BackupEntry:
+    name: str
+    keys: list = field(default_factory=list)
+    size: int = 0
+    last_modified: datetime = None
+
+    @property
+    def created_at(self):
+        """Timestamp from the backup name, falling back to the newest object."""
+        try:
+            return datetime.strptime(self.name, NAME_FORMAT)
+        except ValueError:
+            return self.last_modified.replace(tzinfo=None) if self.last_modified else None
+
+    @property
+    def files(self):
+        return [key.rsplit("/", 1)[-1] for key in self.keys]
+
+
+def get_s3_client():
+    """S3 client for the configured bucket, or None if S3 settings are missing."""
+    required_settings = ["S3_ACCESS_KEY", "S3_SECRET_KEY", "S3_BUCKET_NAME", "S3_ENDPOINT"]
+    if any(not getattr(settings, s, None) for s in required_settings):
+        return None
+
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.S3_ENDPOINT,
+        aws_access_key_id=settings.S3_ACCESS_KEY,
+        aws_secret_access_key=settings.S3_SECRET_KEY,
+        config=Config(
+            signature_version="s3v4",
+            retries={"max_attempts": 3, "mode": "standard"},
+        ),
+    )
+
+
+def iter_objects(s3, bucket, prefix):
+    """Yield every object under prefix, following continuation tokens."""
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+def list_backup_names(s3, bucket):
+    """
+    Backup names, newest first. Uses a delimited listing, so only one entry per
+    backup is returned instead of every object (and none of the media blobs).
+    """
+    names = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=BACKUP_PREFIX, Delimiter="/"):
+        for common_prefix in page.get("CommonPrefixes", []):
+            name = common_prefix["Prefix"][len(BACKUP_PREFIX) :].rstrip("/")
+            if name.startswith("backup_"):
+                names.append(name)
+    return sorted(names, reverse=True)
+
+
+def latest_backup_name(s3, bucket):
+    names = list_backup_names(s3, bucket)
+    return names[0] if names else None
+
+
+def list_backups(s3, bucket):
+    """Group all backup objects by backup, newest first."""
+    backups = {}
+    for obj in iter_objects(s3, bucket, BACKUP_PREFIX):
+        key = obj["Key"]
+        # Keys are listed in lexicographic order and "backups/backup_*" sorts before the
+        # blob prefix, so every backup has been seen once the blobs start
+        if key >= S3_BLOB_PREFIX:
+            break
+        name = key[len(BACKUP_PREFIX) :].split("/", 1)[0]
+        if not name.startswith("backup_") or "/" not in key[len(BACKUP_PREFIX) :]:
+            continue
+        entry = backups.setdefault(name, BackupEntry(name))
+        entry.keys.append(key)
+        entry.size += obj["Size"]
+        if entry.last_modified is None or obj["LastModified"] > entry.last_modified:
+            entry.last_modified = obj["LastModified"]
+    return sorted(backups.values(), key=lambda entry: entry.name, reverse=True)
+
+
+def delete_keys(s3, bucket, keys):
+    """Delete keys in batches of DELETE_BATCH_SIZE. Returns (deleted, errors)."""
+    keys = list(keys)
+    deleted = 0
+    errors = []
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start : start + DELETE_BATCH_SIZE]
+        response = s3.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+        batch_errors = response.get("Errors", [])
+        errors.extend(batch_errors)
+        deleted += len(batch) - len(batch_errors)
+    return deleted, errors
+
+
+def split_by_retention(backups, retention_days, now=None):
+    """
+    Split backups into (retained, expired). The newest backup is always retained,
+    so a long gap in backups never leaves the bucket empty.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    retained, expired = [], []
+    for index, entry in enumerate(backups):
+        created_at = entry.created_at
+        if index == 0 or created_at is None or created_at >= cutoff:
+            retained.append(entry)
+        else:
+            expired.append(entry)
+    return retained, expired
+
+
+def referenced_blobs(s3, bucket, backups):
+    """
+    Hashes referenced by the media manifests of the given backups, or None if a
+    manifest could not be read (in which case nothing may be collected).
+    """
+    referenced = set()
+    for entry in backups:
+        key = f"{BACKUP_PREFIX}{entry.name}/{MEDIA_MANIFEST_FILENAME}"
+        if key not in entry.keys:
+            continue
+        try:
+            manifest = json.loads(s3.get_object(Bucket=bucket, Key=key)["Body"].read())
+        except Exception:
+            return None
+        referenced.update(info["sha256"] for info in manifest.get("files", {}).values())
+    return referenced
+
+
+def collect_s3_garbage(s3, bucket, retained, now=None):
+    """Delete media blobs that no retained backup references. Returns (deleted, errors)."""
+    referenced = referenced_blobs(s3, bucket, retained)
+    if referenced is None:
+        return 0, []
+    grace_cutoff = (now or datetime.now()) - BLOB_GRACE_PERIOD
+    unreferenced = [
+        obj["Key"]
+        for obj in iter_objects(s3, bucket, S3_BLOB_PREFIX)
+        if obj["Key"].rsplit("/", 1)[-1] not in referenced and obj["LastModified"].replace(tzinfo=None) < grace_cutoff
+    ]
+    return delete_keys(s3, bucket, unreferenced)
+
+
+def apply_retention(s3, bucket, retention_days, now=None):
+    """
+    Delete expired backups and unreferenced media blobs. Returns a dict with the
+    expired backup names and deletion counts.
+    """
+    retained, expired = split_by_retention(list_backups(s3, bucket), retention_days, now=now)
+    deleted, errors = delete_keys(s3, bucket, [key for entry in expired for key in entry.keys])
+    deleted_blobs, blob_errors = collect_s3_garbage(s3, bucket, retained, now=now)
+    return {
+        "retained": [entry.name for entry in retained],
+        "expired": [entry.name for entry in expired],
+        "deleted_objects": deleted,
+        "deleted_blobs": deleted_blobs,
+        "errors": errors + blob_errors,
+    }
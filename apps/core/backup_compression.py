@@ -0,0 +1,119 @@
+"""
+Pluggable compression for backup artifacts.
+
+gzip is the default and what every existing backup uses. zstd (via the
+`zstandard` package, imported lazily) compresses on all cores and usually gives
+a better ratio at a fraction of gzip's CPU time. The codec is chosen with
+`backup --compression` or BACKUP_COMPRESSION and recorded in manifest.json;
+restores pick it from the manifest or the file extension.
+"""
+
+import gzip
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+CODECS = tuple(EXTENSIONS)
+
+
+class GzipStreamCompressor:
+    """Incremental gzip compressor (same file format as gzip.compress)."""
+
+    name = "gzip"
+    extension = ".gz"
+    content_type = "application/gzip"
+
+    def __init__(self, level=6):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class ZstdStreamCompressor:
+    """Incremental multithreaded zstd compressor. threads=-1 uses every core."""
+
+    name = "zstd"
+    extension = ".zst"
+    content_type = "application/zstd"
+
+    def __init__(self, level=3, threads=-1):
+        zstandard = _import_zstandard()
+        self._obj = zstandard.ZstdCompressor(level=level, threads=threads).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class PassthroughCompressor:
+    """No-op compressor for producers that compress themselves (pg_dump -Fc)."""
+
+    name = None
+    extension = ""
+    content_type = "application/octet-stream"
+
+    def compress(self, data):
+        return data
+
+    def flush(self):
+        return b""
+
+
+class CompressedWriter:
+    """Write-only file object that compresses into `fileobj` (e.g. as a tarfile stream target)."""
+
+    def __init__(self, fileobj, compressor):
+        self.fileobj = fileobj
+        self.compressor = compressor
+
+    def write(self, data):
+        self.fileobj.write(self.compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        self.fileobj.write(self.compressor.flush())
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured("zstd compression requires the zstandard package")
+    return zstandard
+
+
+def default_compression():
+    return getattr(settings, "BACKUP_COMPRESSION", "gzip")
+
+
+def get_compressor(codec=None, level=None):
+    codec = codec or default_compression()
+    if codec == "gzip":
+        return GzipStreamCompressor(level if level is not None else 6)
+    if codec == "zstd":
+        return ZstdStreamCompressor(
+            level if level is not None else 3,
+            threads=getattr(settings, "BACKUP_COMPRESSION_THREADS", -1),
+        )
+    raise ValueError(f"Unknown compression: {codec}")
+
+
+def codec_for_path(path):
+    return next((codec for codec, ext in EXTENSIONS.items() if path.suffix == ext), "gzip")
+
+
+def open_decompressed(path, codec=None):
+    """Open a compressed artifact for streaming reads."""
+    codec = codec or codec_for_path(path)
+    if codec == "zstd":
+        zstandard = _import_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, "rb")
@@ -0,0 +1,146 @@
+"""
+Database dump formats for backups.
+
+- plain: `pg_dump` SQL piped through the streaming compressor (database.sql.gz or
+  .sql.zst), replayed with psql in a single stream. Works everywhere, restores on
+  one core.
+- custom: `pg_dump -Fc` archive (database.dump). Compressed by pg_dump itself and
+  restorable with `pg_restore --jobs N`.
+- directory: `pg_dump -Fd --jobs N` dumps tables in parallel into a directory that
+  is packed into an uncompressed tar (database.dir.tar) for storage; restored with
+  `pg_restore --jobs N`.
+
+The format and file are recorded in manifest.json under "database". Backups made
+before that field existed are plain gzip.
+"""
+
+import os
+import subprocess
+import tarfile
+from pathlib import Path
+
+from django.conf import settings
+
+from apps.core.backup_compression import EXTENSIONS
+
+FORMATS = {
+    "plain": "database.sql",
+    "custom": "database.dump",
+    "directory": "database.dir.tar",
+}
+DIRECTORY_ARCNAME = "database.dir"
+
+
+def dump_filename(fmt, compression="gzip"):
+    """File name of a dump; only plain dumps go through the backup compressor."""
+    if fmt == "plain":
+        return FORMATS["plain"] + EXTENSIONS[compression]
+    return FORMATS[fmt]
+
+
+def default_format():
+    return getattr(settings, "BACKUP_DB_FORMAT", "plain")
+
+
+def default_jobs():
+    return getattr(settings, "BACKUP_DB_JOBS", None) or min(4, os.cpu_count() or 1)
+
+
+def pg_env(db_config):
+    env = os.environ.copy()
+    env["PGPASSWORD"] = db_config.get("PASSWORD", "")
+    return env
+
+
+def pg_conn_args(db_config):
+    return [
+        "-h",
+        db_config.get("HOST", "localhost"),
+        "-p",
+        str(db_config.get("PORT", 5432)),
+        "-U",
+        db_config.get("USER", "postgres"),
+    ]
+
+
+def dump_command(db_config, fmt="plain", jobs=1, target=None):
+    """
+    Build the pg_dump command. plain and custom write to stdout; directory
+    requires `target` (the directory to create) and dumps with `jobs` workers.
+    """
+    cmd = ["pg_dump", *pg_conn_args(db_config), "-d", db_config.get("NAME", "basal"), "--no-owner", "--no-acl"]
+    if fmt == "custom":
+        cmd.append("-Fc")
+    elif fmt == "directory":
+        cmd += ["-Fd", "--jobs", str(jobs), "-f", str(target)]
+    elif fmt != "plain":
+        raise ValueError(f"Unknown dump format: {fmt}")
+    return cmd
+
+
+def restore_command(db_config, path, jobs=1):
+    """pg_restore command for a custom archive or an extracted directory dump."""
+    return [
+        "pg_restore",
+        *pg_conn_args(db_config),
+        "-d",
+        db_config.get("NAME", "basal"),
+        "--no-owner",
+        "--no-acl",
+        "--exit-on-error",
+        "--jobs",
+        str(jobs),
+        str(path),
+    ]
+
+
+def pack_directory(source_dir, tar_path):
+    """Pack a directory dump into an uncompressed tar (the table files are already compressed)."""
+    with tarfile.open(tar_path, "w") as tar:
+        tar.add(source_dir, arcname=DIRECTORY_ARCNAME)
+
+
+def unpack_directory(tar_path, target_parent):
+    """Extract a packed directory dump below target_parent and return the dump directory."""
+    with tarfile.open(tar_path, "r") as tar:
+        tar.extractall(target_parent, filter="data")
+    return Path(target_parent) / DIRECTORY_ARCNAME
+
+
+def detect_format(backup_path, manifest=None):
+    """
+    Return (format, path) for the database dump in a backup directory, preferring
+    the manifest and falling back to whichever dump file is present.
+    """
+    backup_path = Path(backup_path)
+    recorded = (manifest or {}).get("database") or {}
+    if recorded.get("format"):
+        return recorded["format"], backup_path / (recorded.get("file") or dump_filename(recorded["format"]))
+    candidates = [("plain", dump_filename("plain", codec)) for codec in EXTENSIONS]
+    candidates += [(fmt, FORMATS[fmt]) for fmt in ("custom", "directory")]
+    for fmt, filename in candidates:
+        if (backup_path / filename).exists():
+            return fmt, backup_path / filename
+    return "plain", backup_path / dump_filename("plain")
+
+
+def recreate_database(db_config, log=None):
+    """Terminate connections to, drop and recreate the target database."""
+    log = log or (lambda msg: None)
+    env = pg_env(db_config)
+    conn = pg_conn_args(db_config)
+    db_name = db_config.get("NAME", "basal")
+
+    log("  Terminating existing connections...")
+    terminate_sql = f"""
+        SELECT pg_terminate_backend(pid)
+        FROM pg_stat_activity
+        WHERE datname = '{db_name}' AND pid <> pg_backend_pid();
+    """
+    subprocess.run(["psql", *conn, "-d", "postgres", "-c", terminate_sql], env=env, capture_output=True)
+
+    log("  Dropping database...")
+    subprocess.run(["dropdb", *conn, "--if-exists", db_name], env=env, capture_output=True, check=True)
+
+    log("  Creating database...")
+    subprocess.run(["createdb", *conn, db_name], env=env, capture_output=True, check=True)
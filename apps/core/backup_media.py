@@ -0,0 +1,239 @@
+"""
+Incremental, content-addressed media backups.
+
+Each backup writes a media manifest mapping every file under MEDIA_ROOT to its
+SHA-256, size and mtime. File contents are stored once as blobs named by their
+hash (`media-blobs/ab/abcdef...`), locally next to the backup directories and in
+the bucket under `backups/media-blobs/`. A run only hashes files whose size or
+mtime changed since the previous run and only uploads blobs the store doesn't
+already have, so a nightly backup of a media tree that mostly grows costs
+roughly the size of the new files. Any backup's media can be rebuilt from its
+manifest alone.
+
+A new blob is hashed again while it is copied into the store and filed under
+the hash of the bytes actually copied; a file that changed after the scan is
+recorded in the manifest with that hash, never under its stale scan hash.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+MANIFEST_FILENAME = "media-manifest.json"
+INDEX_FILENAME = "media-index.json"
+BLOB_DIRNAME = "media-blobs"
+S3_BLOB_PREFIX = f"backups/{BLOB_DIRNAME}/"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_relpath(sha256):
+    return f"{sha256[:2]}/{sha256}"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_blob(source, blob_root):
+    """
+    Copy `source` into the blob store, hashing the bytes as they are copied.
+    Returns (sha256, size, stored), stored being False if the blob already existed.
+    """
+    blob_root.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=blob_root, suffix=".tmp")
+    try:
+        with open(source, "rb") as src, os.fdopen(fd, "wb") as dst:
+            for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+        sha = digest.hexdigest()
+        blob = blob_root / blob_relpath(sha)
+        if blob.exists():
+            return sha, size, False
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, blob)
+        return sha, size, True
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _walk(root):
+    """Yield (relative posix path, os.stat_result) for every regular file under root."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path).relative_to(root).as_posix(), entry.stat(follow_symlinks=False)
+
+
+def scan_media(media_root, previous=None):
+    """
+    Return {relpath: {"sha256", "size", "mtime"}} for all files under media_root.
+    Hashes from `previous` (an earlier scan) are reused when size and mtime match.
+    Returns (files, hashed_count).
+    """
+    previous = previous or {}
+    files = {}
+    hashed = 0
+    for relpath, stat in _walk(Path(media_root)):
+        old = previous.get(relpath)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime_ns:
+            files[relpath] = old
+            continue
+        files[relpath] = {
+            "sha256": hash_file(Path(media_root) / relpath),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+        hashed += 1
+    return files, hashed
+
+
+def load_json(path, default=None):
+    try:
+        return json.loads(Path(path).read_text())
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def list_s3_blobs(s3, bucket):
+    """Set of blob hashes already stored in the bucket (paginated listing)."""
+    hashes = set()
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=S3_BLOB_PREFIX):
+        for obj in page.get("Contents", []):
+            hashes.add(obj["Key"].rsplit("/", 1)[-1])
+    return hashes
+
+
+def backup_media_incremental(media_root, backup_dir, backup_name, s3=None, bucket=None, log=None):
+    """
+    Store new blobs locally (and in S3 when given) and write the per-backup
+    manifest. Returns a stats dict.
+    """
+    log = log or (lambda msg: None)
+    backup_dir = Path(backup_dir)
+    blob_root = backup_dir / BLOB_DIRNAME
+    index_path = backup_dir / INDEX_FILENAME
+
+    files, hashed = scan_media(media_root, load_json(index_path, {}))
+    log(f"  {len(files)} media file(s), {hashed} hashed since last run")
+
+    remote = list_s3_blobs(s3, bucket) if s3 else set()
+    stored_local = uploaded = uploaded_bytes = 0
+    seen = set()
+    for relpath, info in files.items():
+        sha = info["sha256"]
+        if not (blob_root / blob_relpath(sha)).exists():
+            sha, size, stored = store_blob(Path(media_root) / relpath, blob_root)
+            stored_local += stored
+            if sha != info["sha256"]:
+                log(f"  {relpath} changed during the backup, stored as it was copied")
+                # The scan-time mtime is kept, so the next run hashes the file again
+                info = files[relpath] = {**info, "sha256": sha, "size": size}
+        if sha in seen:
+            continue
+        seen.add(sha)
+
+        if s3 and sha not in remote:
+            s3.upload_file(str(blob_root / blob_relpath(sha)), bucket, S3_BLOB_PREFIX + blob_relpath(sha))
+            uploaded += 1
+            uploaded_bytes += info["size"]
+
+    manifest = {"version": 1, "blob_prefix": S3_BLOB_PREFIX, "files": files}
+    manifest_json = json.dumps(manifest, indent=2)
+    (backup_dir / backup_name / MANIFEST_FILENAME).write_text(manifest_json)
+    if s3:
+        s3.put_object(
+            Bucket=bucket,
+            Key=f"backups/{backup_name}/{MANIFEST_FILENAME}",
+            Body=manifest_json,
+            ContentType="application/json",
+        )
+
+    # Only persist the hash cache once the backup itself is complete
+    index_path.write_text(json.dumps(files))
+
+    return {
+        "files": len(files),
+        "hashed": hashed,
+        "blobs": len(seen),
+        "stored_local": stored_local,
+        "uploaded": uploaded,
+        "uploaded_bytes": uploaded_bytes,
+        "total_bytes": sum(info["size"] for info in files.values()),
+    }
+
+
+def restore_media_from_manifest(manifest, target_root, backup_dir, s3=None, bucket=None, log=None):
+    """
+    Rebuild a media tree in `target_root` from a manifest. Blobs are read from the
+    local blob store when present, otherwise downloaded from S3. Every file is
+    verified against its hash. Returns the number of files restored.
+    """
+    log = log or (lambda msg: None)
+    target_root = Path(target_root)
+    blob_root = Path(backup_dir) / BLOB_DIRNAME
+    prefix = manifest.get("blob_prefix", S3_BLOB_PREFIX)
+    downloaded = 0
+
+    for relpath, info in manifest["files"].items():
+        sha = info["sha256"]
+        destination = target_root / relpath
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        local_blob = blob_root / blob_relpath(sha)
+        if local_blob.exists():
+            shutil.copyfile(local_blob, destination)
+        elif s3:
+            s3.download_file(bucket, prefix + blob_relpath(sha), str(destination))
+            downloaded += 1
+        else:
+            raise FileNotFoundError(f"Blob {sha} for {relpath} is not available locally and S3 is not configured")
+        if hash_file(destination) != sha:
+            raise ValueError(f"Checksum mismatch for {relpath}")
+        os.utime(destination, ns=(info["mtime"], info["mtime"]))
+
+    if downloaded:
+        log(f"  Downloaded {downloaded} blob(s) from S3")
+    return len(manifest["files"])
+
+
+def collect_local_garbage(backup_dir):
+    """Delete local blobs no longer referenced by any local backup manifest. Returns the count."""
+    backup_dir = Path(backup_dir)
+    blob_root = backup_dir / BLOB_DIRNAME
+    if not blob_root.exists():
+        return 0
+
+    referenced = set()
+    for manifest_path in backup_dir.glob(f"backup_*/{MANIFEST_FILENAME}"):
+        manifest = load_json(manifest_path, {})
+        referenced.update(info["sha256"] for info in manifest.get("files", {}).values())
+
+    deleted = 0
+    for blob in blob_root.glob("*/*"):
+        if blob.name not in referenced:
+            blob.unlink()
+            deleted += 1
+    return deleted
+
+
+def default_media_mode():
+    return getattr(settings, "BACKUP_MEDIA_MODE", "incremental")
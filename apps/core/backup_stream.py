@@ -0,0 +1,192 @@
+"""
+Streaming backup pipeline.
+
+A producer (normally pg_dump's stdout) is read in fixed-size chunks, compressed
+incrementally and written to the local backup file while the compressed bytes
+are uploaded to S3 as multipart parts. A SHA-256 of the compressed stream is
+computed on the fly. Only one chunk plus a bounded queue of upload parts is ever
+held in memory, so memory use does not grow with the size of the database.
+"""
+
+import hashlib
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from apps.core.backup_compression import GzipStreamCompressor
+
+CHUNK_SIZE = 1024 * 1024
+# S3 requires every part except the last to be at least 5 MiB
+PART_SIZE = 8 * 1024 * 1024
+# Parts waiting for upload; bounds memory to roughly PART_SIZE * (MAX_PENDING_PARTS + 1)
+MAX_PENDING_PARTS = 2
+PROGRESS_INTERVAL = 64 * 1024 * 1024
+
+
+class BackupStreamError(Exception):
+    pass
+
+
+@dataclass
+class StreamResult:
+    raw_bytes: int
+    compressed_bytes: int
+    sha256: str
+    seconds: float
+    parts: int = 0
+
+
+class MultipartUploader:
+    """
+    Upload a stream of bytes to S3 as a multipart upload. Parts are handed to a
+    background thread through a bounded queue, so reading the producer and
+    uploading overlap without buffering more than a few parts.
+    """
+
+    def __init__(self, s3, bucket, key, content_type="application/octet-stream", part_size=PART_SIZE):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._next_part = 1
+        self._parts = []
+        self._queue = queue.Queue(maxsize=MAX_PENDING_PARTS)
+        self._error = None
+        self._upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)["UploadId"]
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            number, body = item
+            if self._error:
+                continue
+            try:
+                response = self.s3.upload_part(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=body
+                )
+                self._parts.append({"PartNumber": number, "ETag": response["ETag"]})
+            except Exception as e:
+                self._error = e
+
+    def _enqueue(self, body):
+        if self._error:
+            raise BackupStreamError(f"S3 upload failed: {self._error}")
+        self._queue.put((self._next_part, body))
+        self._next_part += 1
+
+    def write(self, data):
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.part_size:
+            self._enqueue(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+    def complete(self):
+        """Upload the remaining bytes and complete the upload. Returns the number of parts."""
+        # A multipart upload needs at least one part, even for an empty stream
+        if self._buffer or self._next_part == 1:
+            self._enqueue(bytes(self._buffer))
+            self._buffer.clear()
+        self._queue.put(None)
+        self._thread.join()
+        if self._error:
+            self.abort()
+            raise BackupStreamError(f"S3 upload failed: {self._error}")
+        parts = sorted(self._parts, key=lambda p: p["PartNumber"])
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": parts}
+        )
+        return len(parts)
+
+    def abort(self):
+        if self._thread.is_alive():
+            self._error = self._error or BackupStreamError("aborted")
+            self._queue.put(None)
+            self._thread.join()
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        except Exception:
+            pass
+
+
+def stream_to_targets(source, local_path, compressor=None, uploader=None, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Copy `source` (a binary file-like object) through `compressor` to `local_path`
+    and, if given, `uploader`. `progress(raw_bytes, compressed_bytes)` is called
+    every PROGRESS_INTERVAL raw bytes. Returns a StreamResult.
+
+    The uploader is aborted on error but not completed; the caller completes it
+    once it knows the producer succeeded.
+    """
+    compressor = compressor or GzipStreamCompressor()
+    digest = hashlib.sha256()
+    raw_bytes = compressed_bytes = 0
+    next_report = PROGRESS_INTERVAL
+    start = time.monotonic()
+
+    def emit(out, data):
+        nonlocal compressed_bytes
+        if not data:
+            return
+        out.write(data)
+        digest.update(data)
+        compressed_bytes += len(data)
+        if uploader:
+            uploader.write(data)
+
+    try:
+        with open(local_path, "wb") as out:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                raw_bytes += len(chunk)
+                emit(out, compressor.compress(chunk))
+                if progress and raw_bytes >= next_report:
+                    progress(raw_bytes, compressed_bytes)
+                    next_report += PROGRESS_INTERVAL
+            emit(out, compressor.flush())
+    except BaseException:
+        if uploader:
+            uploader.abort()
+        raise
+
+    return StreamResult(
+        raw_bytes=raw_bytes,
+        compressed_bytes=compressed_bytes,
+        sha256=digest.hexdigest(),
+        seconds=time.monotonic() - start,
+    )
+
+
+def stream_command(cmd, env, local_path, compressor=None, uploader=None, progress=None):
+    """
+    Run `cmd` and stream its stdout through stream_to_targets(). stderr goes to a
+    temporary file so a chatty process can't block on a full pipe. The upload is
+    completed only if the command exits successfully; otherwise it is aborted and
+    BackupStreamError is raised.
+    """
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=stderr_file)
+        try:
+            result = stream_to_targets(process.stdout, local_path, compressor, uploader=uploader, progress=progress)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        returncode = process.wait()
+        if returncode != 0:
+            if uploader:
+                uploader.abort()
+            stderr_file.seek(0)
+            raise BackupStreamError(stderr_file.read().decode(errors="replace").strip() or f"exit code {returncode}")
+    if uploader:
+        result.parts = uploader.complete()
+    return result
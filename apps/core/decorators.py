@@ -49,13 +49,25 @@ def signup_admin_required(view_func):
     return login_required(_wrapped_view)
 
 
+def group_names(user):
+    """
+    Names of the user's groups, loaded once per user object.
+
+    request.user lives for one request, so the permission checks in views,
+    admin and the permissions context processor share a single query.
+    """
+    if not hasattr(user, "_group_names"):
+        user._group_names = frozenset(user.groups.values_list("name", flat=True))
+    return user._group_names
+
+
 def can_manage_users(user):
     """Check if user can manage other users."""
     if not user.is_authenticated:
         return False
     if user.is_superuser:
         return True
-    return user.groups.filter(name="Brugeradministrator").exists()
+    return "Brugeradministrator" in group_names(user)
 
 
 def can_manage_signups(user):
@@ -64,7 +76,7 @@ def can_manage_signups(user):
         return False
     if user.is_superuser:
         return True
-    return user.groups.filter(name="Tilmeldingsadministrator").exists()
+    return "Tilmeldingsadministrator" in group_names(user)
 
 
 def full_admin_required(view_func):
@@ -0,0 +1,159 @@
+"""
+Small DB-backed job queue for work that is too slow for a request.
+
+Cron endpoints call `enqueue()` and answer 202 with a status URL; the
+`run_jobs` worker claims queued jobs with SELECT ... FOR UPDATE SKIP LOCKED
+(so several workers never pick the same job) and runs the management command
+registered for the job kind. Command output is appended to the job log, and
+the last line written is shown as progress. A job whose worker died is marked
+failed once its heartbeat is older than STALE_AFTER, freeing the kind for the
+next run.
+"""
+
+import io
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from apps.core.models import ACTIVE_JOB_STATUSES, Job, JobStatus
+
+# Job kind -> management command it runs
+JOB_COMMANDS = {
+    "backup": "backup",
+    "send_reminders": "send_course_reminders",
+    "process_webhooks": "process_webhook_events",
+}
+
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = timedelta(minutes=10)
+MAX_LOG_CHARS = 100_000
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(kind, triggered_by=""):
+    """
+    Queue a job of this kind unless one is already queued or running.
+    Returns (job, created).
+    """
+    if kind not in JOB_COMMANDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, triggered_by=triggered_by), True
+    except IntegrityError:
+        active = Job.objects.filter(kind=kind, status__in=ACTIVE_JOB_STATUSES).first()
+        if active is None:
+            # The active job finished between the insert and the lookup
+            return enqueue(kind, triggered_by)
+        return active, False
+
+
+def reap_stale_jobs(now=None):
+    """Fail running jobs whose worker stopped sending heartbeats. Returns the count."""
+    now = now or timezone.now()
+    return Job.objects.filter(status=JobStatus.RUNNING, heartbeat_at__lt=now - STALE_AFTER).update(
+        status=JobStatus.FAILED,
+        finished_at=now,
+        error="Worker stopped responding",
+    )
+
+
+def claim_next_job(worker=None):
+    """Atomically move the oldest queued job to running and return it, or None."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=JobStatus.QUEUED)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        job.status = JobStatus.RUNNING
+        job.worker = worker or worker_name()
+        job.started_at = now
+        job.heartbeat_at = now
+        job.save(update_fields=["status", "worker", "started_at", "heartbeat_at"])
+    return job
+
+
+class JobOutput(io.TextIOBase):
+    """stdout/stderr for a running command: buffers output and flushes it to the job row periodically."""
+
+    def __init__(self, job, prefix=""):
+        self.job = job
+        self.prefix = prefix
+        self.pending = []
+        self.last_flush = time.monotonic()
+
+    def write(self, text):
+        if not text:
+            return 0
+        self.pending.append(f"{self.prefix}{text}" if self.prefix and text.strip() else text)
+        line = text.strip().splitlines()[-1] if text.strip() else ""
+        if line:
+            self.job.progress = line[:255]
+        if time.monotonic() - self.last_flush >= HEARTBEAT_INTERVAL:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if self.pending:
+            self.job.log = (self.job.log + "".join(self.pending))[-MAX_LOG_CHARS:]
+            self.pending = []
+        self.job.save(update_fields=["log", "progress"])
+
+
+class Heartbeat(threading.Thread):
+    """Touch job.heartbeat_at every HEARTBEAT_INTERVAL, also while the command is silent."""
+
+    def __init__(self, job_pk):
+        super().__init__(daemon=True)
+        self.job_pk = job_pk
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(HEARTBEAT_INTERVAL):
+                Job.objects.filter(pk=self.job_pk).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """Run a claimed job to completion and record the outcome."""
+    stdout = JobOutput(job)
+    stderr = JobOutput(job, prefix="[stderr] ")
+    heartbeat = Heartbeat(job.pk)
+    heartbeat.start()
+    try:
+        call_command(JOB_COMMANDS[job.kind], stdout=stdout, stderr=stderr)
+    except BaseException as e:
+        job.status = JobStatus.FAILED
+        job.error = str(e) or e.__class__.__name__
+        if not isinstance(e, Exception):
+            raise
+    else:
+        job.status = JobStatus.SUCCEEDED
+    finally:
+        heartbeat.stop()
+        stdout.flush()
+        stderr.flush()
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at", "log", "progress"])
+    return job
@@ -1,13 +1,32 @@
-import gzip
-import os
 import subprocess
 import tarfile
+import tempfile
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from apps.core import metrics
+from apps.core.backup_catalog import apply_retention, get_s3_client
+from apps.core.backup_compression import (
+    CODECS,
+    CompressedWriter,
+    PassthroughCompressor,
+    default_compression,
+    get_compressor,
+)
+from apps.core.backup_db import FORMATS as DB_FORMATS
+from apps.core.backup_db import default_format, default_jobs, dump_command, dump_filename, pack_directory, pg_env
+from apps.core.backup_media import (
+    backup_media_incremental,
+    collect_local_garbage,
+    default_media_mode,
+    hash_file,
+)
+from apps.core.backup_stream import BackupStreamError, MultipartUploader, stream_command
+
 
 class Command(BaseCommand):
     help = "Backup database and media files to S3-compatible storage or local storage"
@@ -35,11 +54,49 @@ class Command(BaseCommand):
             action="store_true",
             help="Skip media files backup (database only)",
         )
+        parser.add_argument(
+            "--media-mode",
+            choices=["incremental", "tar"],
+            default=default_media_mode(),
+            help="incremental: content-addressed blobs + manifest; tar: full media.tar.gz (default: BACKUP_MEDIA_MODE)",
+        )
+        parser.add_argument(
+            "--db-format",
+            choices=list(DB_FORMATS),
+            default=default_format(),
+            help="plain: SQL stream (.sql.gz); custom: pg_dump -Fc; directory: parallel pg_dump -Fd "
+            "(default: BACKUP_DB_FORMAT)",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=default_jobs(),
+            help="Parallel pg_dump workers for --db-format directory (default: BACKUP_DB_JOBS or CPU count, max 4)",
+        )
+        parser.add_argument(
+            "--compression",
+            choices=CODECS,
+            default=default_compression(),
+            help="Compression for the plain dump and media tar: gzip or multithreaded zstd "
+            "(default: BACKUP_COMPRESSION)",
+        )
+        parser.add_argument(
+            "--compression-level",
+            type=int,
+            default=None,
+            help="Compression level (default: 6 for gzip, 3 for zstd)",
+        )
 
     def handle(self, *args, **options):
         local_only = options["local_only"]
         backup_dir = Path(options["backup_dir"])
         skip_media = options["skip_media"]
+        self.artifacts = {}
+        self.database_info = {}
+        self.media_bytes = 0
+        started = time.monotonic()
+        self.compression = options["compression"]
+        self.compression_level = options["compression_level"]
 
         # Check S3 settings if not local-only
         s3 = None
@@ -58,13 +115,19 @@ class Command(BaseCommand):
         self.stdout.write(f"Creating backup: {backup_name}")
 
         # Backup database
-        db_success = self._backup_database(local_backup_dir, s3, backup_name, local_only)
+        db_success = self._backup_database(
+            local_backup_dir, s3, backup_name, local_only, options["db_format"], options["jobs"]
+        )
         if not db_success:
+            metrics.record_backup(success=False)
             return
 
         # Backup media files
         if not skip_media:
-            self._backup_media(local_backup_dir, s3, backup_name, local_only)
+            if options["media_mode"] == "incremental":
+                self._backup_media_incremental(backup_dir, s3, backup_name, local_only)
+            else:
+                self._backup_media(local_backup_dir, s3, backup_name, local_only)
 
         # Save manifest
         self._create_manifest(local_backup_dir, s3, backup_name, local_only)
@@ -74,34 +137,22 @@ class Command(BaseCommand):
         if not local_only and s3:
             self._cleanup_s3_backups(s3, options["retention_days"])
 
+        metrics.record_backup(
+            success=True,
+            seconds=time.monotonic() - started,
+            size=sum(info["size"] for info in self.artifacts.values()) + self.media_bytes,
+        )
         self.stdout.write(self.style.SUCCESS(f"Backup completed: {backup_name}"))
 
     def _get_s3_client(self):
         """Get S3 client if configured."""
-        required_settings = ["S3_ACCESS_KEY", "S3_SECRET_KEY", "S3_BUCKET_NAME", "S3_ENDPOINT"]
-        missing = [s for s in required_settings if not getattr(settings, s, None)]
-        if missing:
-            return None
-
         try:
-            import boto3
-            from botocore.config import Config
-
-            return boto3.client(
-                "s3",
-                endpoint_url=settings.S3_ENDPOINT,
-                aws_access_key_id=settings.S3_ACCESS_KEY,
-                aws_secret_access_key=settings.S3_SECRET_KEY,
-                config=Config(
-                    signature_version="s3v4",
-                    retries={"max_attempts": 3, "mode": "standard"},
-                ),
-            )
+            return get_s3_client()
         except Exception as e:
             self.stderr.write(self.style.WARNING(f"Failed to create S3 client: {e}"))
             return None
 
-    def _backup_database(self, local_backup_dir, s3, backup_name, local_only):
+    def _backup_database(self, local_backup_dir, s3, backup_name, local_only, db_format, jobs):
         """Backup PostgreSQL database."""
         import dj_database_url
 
@@ -111,61 +162,107 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR("DATABASE_URL not configured"))
             return False
 
-        self.stdout.write("Backing up database...")
-
-        env = os.environ.copy()
-        env["PGPASSWORD"] = db_config.get("PASSWORD", "")
-
-        pg_dump_cmd = [
-            "pg_dump",
-            "-h",
-            db_config.get("HOST", "localhost"),
-            "-p",
-            str(db_config.get("PORT", 5432)),
-            "-U",
-            db_config.get("USER", "postgres"),
-            "-d",
-            db_config.get("NAME", "basal"),
-            "--no-owner",
-            "--no-acl",
-        ]
+        self.stdout.write(f"Backing up database ({db_format} format)...")
+
+        db_filename = dump_filename(db_format, self.compression)
+        local_path = local_backup_dir / db_filename
+        uploader = None
 
         try:
-            result = subprocess.run(
-                pg_dump_cmd,
-                env=env,
-                capture_output=True,
-                check=True,
-            )
+            if db_format == "directory":
+                return self._backup_database_directory(db_config, local_backup_dir, s3, backup_name, local_only, jobs)
 
-            compressed_data = gzip.compress(result.stdout)
-            db_filename = "database.sql.gz"
-            local_path = local_backup_dir / db_filename
+            if db_format == "plain":
+                compressor = get_compressor(self.compression, self.compression_level)
+            else:
+                compressor = PassthroughCompressor()
+            if not local_only and s3:
+                uploader = MultipartUploader(
+                    s3,
+                    settings.S3_BUCKET_NAME,
+                    f"backups/{backup_name}/{db_filename}",
+                    content_type=compressor.content_type,
+                )
 
-            local_path.write_bytes(compressed_data)
-            self.stdout.write(f"  Database backup: {len(compressed_data) / 1024:.1f} KB")
+            result = stream_command(
+                dump_command(db_config, db_format),
+                pg_env(db_config),
+                local_path,
+                compressor=compressor,
+                uploader=uploader,
+                progress=self._report_progress,
+            )
 
-            if not local_only and s3:
-                s3.put_object(
-                    Bucket=settings.S3_BUCKET_NAME,
-                    Key=f"backups/{backup_name}/{db_filename}",
-                    Body=compressed_data,
-                    ContentType="application/gzip",
+            self.artifacts[db_filename] = {"size": result.compressed_bytes, "sha256": result.sha256}
+            self.database_info = {
+                "format": db_format,
+                "file": db_filename,
+                "compression": compressor.name,
+                "seconds": round(result.seconds, 1),
+            }
+            self.stdout.write(
+                f"  Database backup: {result.compressed_bytes / 1024:.1f} KB "
+                f"({result.raw_bytes / 1024:.1f} KB streamed, {result.seconds:.1f}s)"
+            )
+            if uploader:
+                self.stdout.write(
+                    self.style.SUCCESS(f"  Uploaded to S3: {backup_name}/{db_filename} ({result.parts} part(s))")
                 )
-                self.stdout.write(self.style.SUCCESS(f"  Uploaded to S3: {backup_name}/{db_filename}"))
 
             return True
 
-        except subprocess.CalledProcessError as e:
-            self.stderr.write(self.style.ERROR(f"pg_dump failed: {e.stderr.decode()}"))
+        except (BackupStreamError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, "stderr", None)
+            self.stderr.write(self.style.ERROR(f"pg_dump failed: {stderr.decode() if stderr else e}"))
             return False
         except FileNotFoundError:
+            if uploader:
+                uploader.abort()
             self.stderr.write(self.style.ERROR("pg_dump not found. Install postgresql-client."))
             return False
         except Exception as e:
+            if uploader:
+                uploader.abort()
             self.stderr.write(self.style.ERROR(f"Database backup failed: {e}"))
             return False
 
+    def _backup_database_directory(self, db_config, local_backup_dir, s3, backup_name, local_only, jobs):
+        """Dump with pg_dump -Fd --jobs, pack the directory into a tar and upload it."""
+        db_filename = dump_filename("directory")
+        local_path = local_backup_dir / db_filename
+        start = time.monotonic()
+
+        with tempfile.TemporaryDirectory(dir=local_backup_dir) as tmp:
+            dump_dir = Path(tmp) / "dump"
+            subprocess.run(
+                dump_command(db_config, "directory", jobs=jobs, target=dump_dir),
+                env=pg_env(db_config),
+                capture_output=True,
+                check=True,
+            )
+            pack_directory(dump_dir, local_path)
+
+        seconds = time.monotonic() - start
+        size = local_path.stat().st_size
+        self.artifacts[db_filename] = {"size": size, "sha256": hash_file(local_path)}
+        self.database_info = {"format": "directory", "file": db_filename, "jobs": jobs, "seconds": round(seconds, 1)}
+        self.stdout.write(f"  Database backup: {size / 1024:.1f} KB ({jobs} job(s), {seconds:.1f}s)")
+
+        if not local_only and s3:
+            s3.upload_file(
+                str(local_path),
+                settings.S3_BUCKET_NAME,
+                f"backups/{backup_name}/{db_filename}",
+                ExtraArgs={"ContentType": "application/x-tar"},
+            )
+            self.stdout.write(self.style.SUCCESS(f"  Uploaded to S3: {backup_name}/{db_filename}"))
+        return True
+
+    def _report_progress(self, raw_bytes, compressed_bytes):
+        self.stdout.write(
+            f"  ... {raw_bytes / 1024 / 1024:.0f} MB dumped ({compressed_bytes / 1024 / 1024:.0f} MB compressed)"
+        )
+
     def _backup_media(self, local_backup_dir, s3, backup_name, local_only):
         """Backup media files."""
         media_root = Path(settings.MEDIA_ROOT)
@@ -174,40 +271,77 @@ class Command(BaseCommand):
             self.stdout.write("  No media directory found, skipping media backup")
             return
 
-        # Check if there are any files to backup
-        media_files = list(media_root.rglob("*"))
-        media_files = [f for f in media_files if f.is_file()]
-
-        if not media_files:
-            self.stdout.write("  No media files to backup")
-            return
-
-        self.stdout.write(f"Backing up {len(media_files)} media file(s)...")
+        self.stdout.write("Backing up media files...")
 
         try:
-            media_filename = "media.tar.gz"
+            compressor = get_compressor(self.compression, self.compression_level)
+            media_filename = f"media.tar{compressor.extension}"
             local_path = local_backup_dir / media_filename
 
-            # Create tar.gz archive
-            with tarfile.open(local_path, "w:gz") as tar:
-                tar.add(media_root, arcname="media")
+            # Stream the tar through the selected compressor
+            file_count = 0
+            with open(local_path, "wb") as out:
+                writer = CompressedWriter(out, compressor)
+                with tarfile.open(fileobj=writer, mode="w|") as tar:
+                    tar.add(media_root, arcname="media")
+                    file_count = sum(1 for member in tar.getmembers() if member.isfile())
+                writer.close()
+
+            if not file_count:
+                local_path.unlink()
+                self.stdout.write("  No media files to backup")
+                return
 
             file_size = local_path.stat().st_size
-            self.stdout.write(f"  Media backup: {file_size / 1024:.1f} KB")
+            self.media_bytes = file_size
+            self.stdout.write(f"  Media backup: {file_count} file(s), {file_size / 1024:.1f} KB")
 
             if not local_only and s3:
-                with open(local_path, "rb") as f:
-                    s3.put_object(
-                        Bucket=settings.S3_BUCKET_NAME,
-                        Key=f"backups/{backup_name}/{media_filename}",
-                        Body=f.read(),
-                        ContentType="application/gzip",
-                    )
+                # upload_file streams from disk and switches to multipart for large archives
+                s3.upload_file(
+                    str(local_path),
+                    settings.S3_BUCKET_NAME,
+                    f"backups/{backup_name}/{media_filename}",
+                    ExtraArgs={"ContentType": compressor.content_type},
+                )
                 self.stdout.write(self.style.SUCCESS(f"  Uploaded to S3: {backup_name}/{media_filename}"))
 
         except Exception as e:
             self.stderr.write(self.style.WARNING(f"Media backup failed: {e}"))
 
+    def _backup_media_incremental(self, backup_dir, s3, backup_name, local_only):
+        """Backup media files as content-addressed blobs plus a per-backup manifest."""
+        media_root = Path(settings.MEDIA_ROOT)
+
+        if not media_root.exists():
+            self.stdout.write("  No media directory found, skipping media backup")
+            return
+
+        self.stdout.write("Backing up media files (incremental)...")
+
+        try:
+            stats = backup_media_incremental(
+                media_root,
+                backup_dir,
+                backup_name,
+                s3=s3 if not local_only else None,
+                bucket=settings.S3_BUCKET_NAME,
+                log=self.stdout.write,
+            )
+            self.media_bytes = stats["total_bytes"]
+            self.stdout.write(
+                f"  Media backup: {stats['files']} file(s), {stats['total_bytes'] / 1024:.1f} KB total, "
+                f"{stats['stored_local']} new blob(s) stored locally"
+            )
+            if not local_only and s3:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"  Uploaded {stats['uploaded']} new blob(s) to S3 ({stats['uploaded_bytes'] / 1024:.1f} KB)"
+                    )
+                )
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f"Media backup failed: {e}"))
+
     def _create_manifest(self, local_backup_dir, s3, backup_name, local_only):
         """Create manifest.json with code state and migration info."""
         import json
@@ -220,6 +354,9 @@ class Command(BaseCommand):
             "timestamp": datetime.now().isoformat(),
             "django_version": django.get_version(),
             "python_version": platform.python_version(),
+            "compression": self.compression,
+            "database": self.database_info,
+            "files": self.artifacts,
         }
 
         # Read BUILD_INFO if available
@@ -258,31 +395,22 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"  Uploaded to S3: {backup_name}/{manifest_filename}"))
 
     def _cleanup_s3_backups(self, s3, retention_days):
-        """Clean up old backups from S3."""
+        """Clean up old backups and unreferenced media blobs from S3."""
         self.stdout.write(f"Cleaning up S3 backups older than {retention_days} days...")
 
         try:
-            cutoff_date = datetime.now() - timedelta(days=retention_days)
+            result = apply_retention(s3, settings.S3_BUCKET_NAME, retention_days)
 
-            # List all objects in backups/
-            response = s3.list_objects_v2(
-                Bucket=settings.S3_BUCKET_NAME,
-                Prefix="backups/",
-            )
-
-            old_objects = []
-
-            for obj in response.get("Contents", []):
-                if obj["LastModified"].replace(tzinfo=None) < cutoff_date:
-                    old_objects.append(obj["Key"])
-
-            # Delete old objects
-            for key in old_objects:
-                s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=key)
-                self.stdout.write(f"  Deleted from S3: {key}")
-
-            if old_objects:
-                self.stdout.write(f"Deleted {len(old_objects)} old S3 file(s)")
+            for name in result["expired"]:
+                self.stdout.write(f"  Deleted from S3: {name}")
+            if result["expired"]:
+                self.stdout.write(
+                    f"Deleted {len(result['expired'])} old S3 backup(s) ({result['deleted_objects']} file(s))"
+                )
+            if result["deleted_blobs"]:
+                self.stdout.write(f"Deleted {result['deleted_blobs']} unreferenced S3 media blob(s)")
+            for error in result["errors"]:
+                self.stderr.write(self.style.WARNING(f"  Could not delete {error['Key']}: {error.get('Message')}"))
 
         except Exception as e:
             self.stderr.write(self.style.WARNING(f"S3 cleanup warning: {e}"))
@@ -309,3 +437,8 @@ class Command(BaseCommand):
 
         if deleted_count:
             self.stdout.write(f"Deleted {deleted_count} old local backup(s)")
+
+        # Drop media blobs that no remaining backup references
+        deleted_blobs = collect_local_garbage(backup_dir)
+        if deleted_blobs:
+            self.stdout.write(f"Deleted {deleted_blobs} unreferenced local media blob(s)")
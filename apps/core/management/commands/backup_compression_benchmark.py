@@ -0,0 +1,163 @@
+import subprocess
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.backup_compression import get_compressor, open_decompressed
+from apps.core.backup_db import dump_command, pg_env
+from apps.core.backup_stream import CHUNK_SIZE
+
+DEFAULT_CODECS = ["gzip:6", "zstd:3", "zstd:9"]
+
+
+class _SampleFull(Exception):
+    pass
+
+
+class _SampleWriter:
+    """File-like sink that stops the producer once `limit` bytes have been written."""
+
+    def __init__(self, out, limit):
+        self.out = out
+        self.remaining = limit
+
+    def write(self, data):
+        self.out.write(data[: self.remaining])
+        self.remaining -= min(len(data), self.remaining)
+        if not self.remaining:
+            raise _SampleFull
+        return len(data)
+
+
+class Command(BaseCommand):
+    help = "Measure compression ratio and throughput of the backup codecs on the live database dump and media files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--codec",
+            action="append",
+            dest="codecs",
+            help=f"codec:level to benchmark, repeatable (default: {' '.join(DEFAULT_CODECS)})",
+        )
+        parser.add_argument(
+            "--sample-mb",
+            type=int,
+            default=256,
+            help="Maximum amount of data sampled from each source (default: 256)",
+        )
+        parser.add_argument("--skip-database", action="store_true", help="Don't sample the database dump")
+        parser.add_argument("--skip-media", action="store_true", help="Don't sample the media files")
+        parser.add_argument("--file", type=str, help="Benchmark this file instead of the database and media")
+
+    def handle(self, *args, **options):
+        codecs = [self._parse_codec(spec) for spec in options["codecs"] or DEFAULT_CODECS]
+        limit = options["sample_mb"] * 1024 * 1024
+
+        with tempfile.TemporaryDirectory() as tmp:
+            samples = []
+            if options["file"]:
+                samples.append((Path(options["file"]).name, Path(options["file"])))
+            else:
+                if not options["skip_database"]:
+                    sample = self._sample_database(Path(tmp) / "database.sql", limit)
+                    if sample:
+                        samples.append(("database", sample))
+                if not options["skip_media"]:
+                    sample = self._sample_media(Path(tmp) / "media.tar", limit)
+                    if sample:
+                        samples.append(("media", sample))
+
+            if not samples:
+                raise CommandError("Nothing to benchmark")
+
+            for label, path in samples:
+                size = path.stat().st_size
+                self.stdout.write("")
+                self.stdout.write(f"{label}: {size / 1024 / 1024:.1f} MB sample")
+                self.stdout.write(f"  {'Codec':<10} {'Ratio':>7} {'Compress':>13} {'Decompress':>13} {'Size':>11}")
+                for codec, level in codecs:
+                    compressed_size, compress_seconds, decompress_seconds = self._measure(
+                        path, Path(tmp) / "compressed", codec, level
+                    )
+                    self.stdout.write(
+                        f"  {f'{codec}:{level}':<10} {size / max(compressed_size, 1):>6.2f}x "
+                        f"{self._rate(size, compress_seconds):>13} {self._rate(size, decompress_seconds):>13} "
+                        f"{compressed_size / 1024 / 1024:>8.1f} MB"
+                    )
+
+    def _parse_codec(self, spec):
+        codec, _, level = spec.partition(":")
+        try:
+            level = int(level) if level else None
+            get_compressor(codec, level)
+        except (ValueError, ImproperlyConfigured) as e:
+            raise CommandError(f"Invalid codec {spec!r}: {e}")
+        return codec, level
+
+    def _rate(self, size, seconds):
+        return f"{size / 1024 / 1024 / seconds:.0f} MB/s" if seconds else "-"
+
+    def _measure(self, path, compressed_path, codec, level):
+        compressor = get_compressor(codec, level)
+        start = time.monotonic()
+        with open(path, "rb") as source, open(compressed_path, "wb") as out:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                out.write(compressor.compress(chunk))
+            out.write(compressor.flush())
+        compress_seconds = time.monotonic() - start
+
+        start = time.monotonic()
+        with open_decompressed(compressed_path, codec) as f:
+            while f.read(CHUNK_SIZE):
+                pass
+        decompress_seconds = time.monotonic() - start
+        return compressed_path.stat().st_size, compress_seconds, decompress_seconds
+
+    def _sample_database(self, path, limit):
+        import dj_database_url
+
+        db_config = dj_database_url.config()
+        if not db_config:
+            self.stdout.write(self.style.WARNING("DATABASE_URL not configured, skipping database sample"))
+            return None
+
+        self.stdout.write("Sampling database dump...")
+        try:
+            process = subprocess.Popen(
+                dump_command(db_config), env=pg_env(db_config), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING("pg_dump not found, skipping database sample"))
+            return None
+
+        with open(path, "wb") as out:
+            written = 0
+            while written < limit:
+                chunk = process.stdout.read(min(CHUNK_SIZE, limit - written))
+                if not chunk:
+                    break
+                out.write(chunk)
+                written += len(chunk)
+        process.kill()
+        process.wait()
+        return path if written else None
+
+    def _sample_media(self, path, limit):
+        media_root = Path(settings.MEDIA_ROOT)
+        if not media_root.exists():
+            self.stdout.write("No media directory found, skipping media sample")
+            return None
+
+        self.stdout.write("Sampling media files...")
+        with open(path, "wb") as out:
+            try:
+                with tarfile.open(fileobj=_SampleWriter(out, limit), mode="w|") as tar:
+                    tar.add(media_root, arcname="media")
+            except _SampleFull:
+                pass
+        return path if path.stat().st_size else None
@@ -0,0 +1,154 @@
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.backup_compression import PassthroughCompressor, get_compressor, open_decompressed
+from apps.core.backup_db import (
+    default_jobs,
+    dump_command,
+    dump_filename,
+    pack_directory,
+    pg_conn_args,
+    pg_env,
+    recreate_database,
+    restore_command,
+    unpack_directory,
+)
+from apps.core.backup_stream import BackupStreamError, stream_command
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare dump and restore times of the plain, custom and parallel directory backup formats "
+        "on a generated dataset in scratch databases"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=8, help="Number of generated tables (default: 8)")
+        parser.add_argument("--rows", type=int, default=200_000, help="Rows per generated table (default: 200000)")
+        parser.add_argument("--jobs", type=int, default=default_jobs(), help="Parallel workers for pg_dump/pg_restore")
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the scratch databases afterwards",
+        )
+
+    def handle(self, *args, **options):
+        import dj_database_url
+
+        db_config = dj_database_url.config()
+        if not db_config:
+            raise CommandError("DATABASE_URL not configured")
+
+        base_name = db_config.get("NAME", "basal")
+        source = {**db_config, "NAME": f"{base_name}_backup_bench"}
+        target = {**db_config, "NAME": f"{base_name}_backup_bench_restore"}
+        jobs = options["jobs"]
+
+        try:
+            self.stdout.write(
+                f"Generating {options['tables']} table(s) x {options['rows']} rows in {source['NAME']}..."
+            )
+            recreate_database(source)
+            self._generate_dataset(source, options["tables"], options["rows"])
+
+            results = []
+            with tempfile.TemporaryDirectory() as tmp:
+                for fmt, fmt_jobs in (("plain", 1), ("custom", jobs), ("directory", jobs)):
+                    self.stdout.write(f"Timing {fmt} format ({fmt_jobs} job(s))...")
+                    path = Path(tmp) / dump_filename(fmt)
+                    dump_seconds = self._time_dump(source, fmt, fmt_jobs, path)
+                    recreate_database(target)
+                    restore_seconds = self._time_restore(target, fmt, fmt_jobs, path, Path(tmp))
+                    results.append((fmt, fmt_jobs, path.stat().st_size, dump_seconds, restore_seconds))
+        except FileNotFoundError as e:
+            raise CommandError(f"{e.filename} not found. Install postgresql-client.")
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f"{e.cmd[0]} failed: {e.stderr.decode(errors='replace') if e.stderr else e}")
+        except BackupStreamError as e:
+            raise CommandError(f"pg_dump failed: {e}")
+        finally:
+            if not options["keep"]:
+                for scratch in (source, target):
+                    subprocess.run(
+                        ["dropdb", *pg_conn_args(scratch), "--if-exists", scratch["NAME"]],
+                        env=pg_env(scratch),
+                        capture_output=True,
+                    )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'Format':<10} {'Jobs':>4} {'Size':>12} {'Dump':>9} {'Restore':>9}")
+        baseline = results[0][4]
+        for fmt, fmt_jobs, size, dump_seconds, restore_seconds in results:
+            speedup = baseline / restore_seconds if restore_seconds else 0
+            self.stdout.write(
+                f"{fmt:<10} {fmt_jobs:>4} {size / 1024 / 1024:>9.1f} MB {dump_seconds:>8.1f}s "
+                f"{restore_seconds:>8.1f}s  ({speedup:.1f}x restore vs plain)"
+            )
+
+    def _psql(self, db_config, sql):
+        subprocess.run(
+            ["psql", *pg_conn_args(db_config), "-d", db_config["NAME"], "-v", "ON_ERROR_STOP=1", "-c", sql],
+            env=pg_env(db_config),
+            capture_output=True,
+            check=True,
+        )
+
+    def _generate_dataset(self, db_config, tables, rows):
+        # Several similar tables with an index each, so parallel dump/restore has work to split
+        for i in range(tables):
+            self._psql(
+                db_config,
+                f"""
+                CREATE TABLE bench_{i} AS
+                SELECT g AS id, md5(g::text) AS name, repeat(md5((g * {i + 1})::text), 4) AS body,
+                       now() - (g || ' minutes')::interval AS created_at
+                FROM generate_series(1, {rows}) AS g;
+                ALTER TABLE bench_{i} ADD PRIMARY KEY (id);
+                CREATE INDEX bench_{i}_created_at ON bench_{i} (created_at);
+                """,
+            )
+
+    def _time_dump(self, db_config, fmt, jobs, path):
+        start = time.monotonic()
+        if fmt == "directory":
+            dump_dir = path.parent / "dump"
+            subprocess.run(
+                dump_command(db_config, fmt, jobs=jobs, target=dump_dir),
+                env=pg_env(db_config),
+                capture_output=True,
+                check=True,
+            )
+            pack_directory(dump_dir, path)
+            shutil.rmtree(dump_dir)
+        else:
+            compressor = get_compressor("gzip") if fmt == "plain" else PassthroughCompressor()
+            stream_command(dump_command(db_config, fmt), pg_env(db_config), path, compressor=compressor)
+        return time.monotonic() - start
+
+    def _time_restore(self, db_config, fmt, jobs, path, tmp):
+        env = pg_env(db_config)
+        start = time.monotonic()
+        if fmt == "plain":
+            cmd = ["psql", *pg_conn_args(db_config), "-d", db_config["NAME"], "-q", "-v", "ON_ERROR_STOP=1"]
+            process = subprocess.Popen(cmd, env=env, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+            with open_decompressed(path) as f:
+                shutil.copyfileobj(f, process.stdin, 1024 * 1024)
+            process.stdin.close()
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, cmd)
+        elif fmt == "custom":
+            subprocess.run(restore_command(db_config, path, jobs), env=env, capture_output=True, check=True)
+        else:
+            with tempfile.TemporaryDirectory(dir=tmp) as extract_dir:
+                subprocess.run(
+                    restore_command(db_config, unpack_directory(path, extract_dir), jobs),
+                    env=env,
+                    capture_output=True,
+                    check=True,
+                )
+        return time.monotonic() - start
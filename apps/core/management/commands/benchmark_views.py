@@ -0,0 +1,187 @@
+"""
+Time the key staff and public views against whatever data is in the database.
+
+Meant to be run after generate_load_data. Every scenario is requested through
+the test client (the full middleware stack, no network) once to warm up and
+then --repeat times. Timings, query counts and response sizes are written as
+JSON, and --compare prints the change against an earlier result file.
+"""
+
+import json
+import statistics
+import subprocess
+import time
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.audit.models import ActivityLog
+from apps.bulk_email.models import BulkEmail
+from apps.courses.models import CourseSignUp
+from apps.schools.models import School
+from apps.schools.school_years import calculate_school_year_for_date
+
+
+def scenarios():
+    """(name, method, url, payload, staff) for every benchmarked view."""
+    school = School.objects.active().annotate(n=Count("course_signups")).order_by("-n", "pk").first()
+    if school is None:
+        raise CommandError("Ingen skoler i databasen. Kør generate_load_data først.")
+    schools = reverse("schools:list")
+    year = calculate_school_year_for_date(date.today())
+    course_id = CourseSignUp.objects.filter(school=school).values_list("course", flat=True).first()
+    seat_check = f"{reverse('signup:check-school-seats')}?school_id={school.pk}&course_id={course_id}"
+    return [
+        ("school-list", "get", schools, None, True),
+        ("school-list-search", "get", f"{schools}?search=Skole+00", None, True),
+        ("school-list-status", "get", f"{schools}?status_filter=tilmeldt&sort=seats", None, True),
+        ("school-list-year", "get", f"{schools}?year={year}&status_filter=tilmeldt_fortsaetter", None, True),
+        ("school-detail", "get", reverse("schools:detail", args=[school.pk]), None, True),
+        ("goals", "get", reverse("goals:project-goals"), None, True),
+        ("kommune-list", "get", reverse("schools:kommune-list"), None, True),
+        ("school-export", "get", reverse("schools:export"), None, True),
+        ("course-export", "get", reverse("courses:export"), None, True),
+        ("signup-export", "get", reverse("courses:signup-export"), None, True),
+        (
+            "bulk-email-dry-run",
+            "post",
+            reverse("bulk_email:dry_run"),
+            {"recipient_types": [BulkEmail.KOORDINATOR], "subject": "{{ skole_navn }}", "filter_params": {}},
+            True,
+        ),
+        ("public-signup", "get", reverse("signup:course"), None, False),
+        ("seat-check", "get", seat_check, None, False),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Mål svartider og antal forespørgsler for de vigtigste sider og gem resultatet som JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Antal målinger pr. side (standard: 5)")
+        parser.add_argument("--only", action="append", help="Kun denne side (kan gentages)")
+        parser.add_argument("--output", help="JSON-fil til resultatet (standard: var/benchmarks/views-<tid>.json)")
+        parser.add_argument("--compare", help="Tidligere resultatfil at sammenligne med")
+        parser.add_argument(
+            "--user", default="benchmark", help="Superbruger der logges ind som (oprettes hvis den mangler)"
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat skal være mindst 1")
+        baseline = self.load(options["compare"]) if options["compare"] else None
+
+        user, created = User.objects.get_or_create(
+            username=options["user"], defaults={"is_staff": True, "is_superuser": True}
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+        if not user.is_staff:
+            raise CommandError(f"Brugeren {user.username} er ikke staff")
+
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost")
+        staff_client = Client(HTTP_HOST=host)
+        staff_client.force_login(user)
+        public_client = Client(HTTP_HOST=host)
+
+        selected = scenarios()
+        if options["only"]:
+            unknown = set(options["only"]) - {name for name, *_ in selected}
+            if unknown:
+                raise CommandError(f"Ukendte sider: {', '.join(sorted(unknown))}")
+            selected = [scenario for scenario in selected if scenario[0] in options["only"]]
+
+        results = {}
+        for name, method, url, payload, staff in selected:
+            client = staff_client if staff else public_client
+            results[name] = self.measure(client, method, url, payload, options["repeat"])
+            self.stdout.write(self.format_row(name, results[name], baseline))
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "git_commit": self.git_commit(),
+            "database": connection.vendor,
+            "repeat": options["repeat"],
+            "rows": {
+                "schools": School.objects.count(),
+                "signups": CourseSignUp.objects.count(),
+                "activity_logs": ActivityLog.objects.count(),
+            },
+            "results": results,
+        }
+        output = Path(
+            options["output"]
+            or Path(settings.BASE_DIR) / "var" / "benchmarks" / f"views-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Resultat gemt i {output}"))
+
+    def measure(self, client, method, url, payload, repeat):
+        def request():
+            if method == "post":
+                response = client.post(url, json.dumps(payload), content_type="application/json", secure=True)
+            else:
+                response = client.get(url, secure=True)
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+            return response.status_code, len(body)
+
+        # Counted with an execute wrapper; CaptureQueriesContext keeps at most 9000 queries
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        request()
+        timings = []
+        for _ in range(repeat):
+            queries = 0
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                status, size = request()
+                timings.append((time.perf_counter() - start) * 1000)
+        return {
+            "url": url,
+            "status": status,
+            "bytes": size,
+            "queries": queries,
+            "median_ms": round(statistics.median(timings), 1),
+            "min_ms": round(min(timings), 1),
+            "max_ms": round(max(timings), 1),
+        }
+
+    def format_row(self, name, result, baseline):
+        row = f"{name:<22} {result['median_ms']:>9.1f} ms {result['queries']:>5} queries {result['status']}"
+        previous = (baseline or {}).get(name)
+        if previous and previous["median_ms"]:
+            change = (result["median_ms"] - previous["median_ms"]) / previous["median_ms"] * 100
+            row += f"  ({change:+.0f}% vs {previous['median_ms']:.1f} ms, {previous['queries']} queries)"
+        if result["status"] != 200:
+            return self.style.ERROR(row)
+        return row
+
+    def load(self, path):
+        try:
+            return json.loads(Path(path).read_text())["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Kan ikke læse {path}: {e}")
+
+    def git_commit(self):
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True
+            )
+        except FileNotFoundError:
+            return ""
+        return result.stdout.strip()
@@ -0,0 +1,250 @@
+"""
+Generate a large, deterministic dataset for load testing and benchmarks.
+
+Unlike create_demo_data, rows are built in memory and written with
+bulk_create, so tens of thousands of schools and signups take seconds. The
+same --seed always produces the same rows (dates are relative to today).
+Generated schools, kommuner and courses are prefixed with "Load" and the
+command refuses to run twice on the same database; use clear_data --confirm
+to start over.
+
+bulk_create skips save() and signals, so nothing is audit-logged, the
+credentials School.generate_credentials() would set are filled in here and
+the email directory is rebuilt once all rows are written.
+"""
+
+import random
+import string
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.audit.models import ActionType, ActivityLog
+from apps.courses.models import AttendanceStatus, Course, CourseSignUp, Location
+from apps.emails.directory import rebuild_directory
+from apps.schools.models import InstitutionstypeChoice, Kommune, Person, School, SchoolComment, TitelChoice
+
+LOAD_PREFIX = "Load"
+KOMMUNE_COUNT = 98
+LOCATION_COUNT = 12
+SIGNUPS_PER_COURSE = 20
+BATCH_SIZE = 2000
+
+FIRST_NAMES = ["Anders", "Birgitte", "Christian", "Dorte", "Erik", "Fie", "Gustav", "Hanne", "Ivan", "Julie"]
+LAST_NAMES = ["Jensen", "Nielsen", "Hansen", "Pedersen", "Andersen", "Christensen", "Larsen", "Sørensen"]
+
+
+@contextmanager
+def explicit_timestamp(model, field_name):
+    """Let bulk_create keep the given value of an auto_now_add field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "Opretter et stort, deterministisk datasæt til belastningstest med bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schools", type=int, default=1000, help="Antal skoler (standard: 1000)")
+        parser.add_argument("--signups", type=int, default=5000, help="Antal kursustilmeldinger (standard: 5000)")
+        parser.add_argument(
+            "--audit-rows", type=int, default=10000, help="Antal aktivitetslog-rækker (standard: 10000)"
+        )
+        parser.add_argument("--seed", type=int, default=1, help="Seed til tilfældighedsgeneratoren (standard: 1)")
+
+    def handle(self, *args, **options):
+        if options["schools"] < 1:
+            raise CommandError("--schools skal være mindst 1")
+        if School.objects.filter(name__startswith=f"{LOAD_PREFIX} ").exists():
+            raise CommandError("Load data findes allerede. Kør clear_data --confirm først.")
+
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        with transaction.atomic():
+            kommuner = self.create_kommuner(min(KOMMUNE_COUNT, options["schools"]))
+            schools = self.create_schools(options["schools"], kommuner)
+            people = self.create_people(schools)
+            comments = self.create_comments(schools)
+            courses = self.create_courses(max(1, -(-options["signups"] // SIGNUPS_PER_COURSE)))
+            signups = self.create_signups(options["signups"], schools, kommuner, courses)
+            audit_rows = self.create_activity_logs(options["audit_rows"], schools, courses)
+            # The directory's post_save handlers never saw the bulk-created people, schools and signups
+            directory_entries = rebuild_directory()
+
+        for label, count in [
+            ("kommuner", len(kommuner)),
+            ("skoler", len(schools)),
+            ("personer", people),
+            ("kommentarer", comments),
+            ("kurser", len(courses)),
+            ("tilmeldinger", signups),
+            ("aktivitetslog-rækker", audit_rows),
+            ("emailadresser i adressebogen", directory_entries),
+        ]:
+            self.stdout.write(f"  {count} {label}")
+        self.stdout.write(self.style.SUCCESS(f"Load data oprettet på {time.monotonic() - started:.1f}s"))
+
+    def random_date(self, start, end):
+        return start + timedelta(days=self.rng.randint(0, (end - start).days))
+
+    def random_timestamp(self, days_back):
+        return self.now - timedelta(seconds=self.rng.randint(0, days_back * 86400))
+
+    def create_kommuner(self, count):
+        names = [f"{LOAD_PREFIX} Kommune {i:02d}" for i in range(1, count + 1)]
+        Kommune.objects.bulk_create([Kommune(name=name) for name in names], ignore_conflicts=True)
+        return list(Kommune.objects.filter(name__in=names))
+
+    def create_schools(self, count, kommuner):
+        today = date.today()
+        types = InstitutionstypeChoice.values
+        schools = []
+        for i in range(1, count + 1):
+            school = School(
+                name=f"{LOAD_PREFIX} Skole {i:05d}",
+                adresse=f"Skolevej {self.rng.randint(1, 200)}",
+                postnummer=str(self.rng.randint(1000, 9990)),
+                by=f"By {self.rng.randint(1, 300)}",
+                kommune=self.rng.choice(kommuner),
+                institutionstype=types[0] if self.rng.random() < 0.8 else self.rng.choice(types),
+                signup_password=".".join(
+                    "".join(self.rng.choice(string.ascii_lowercase) for _ in range(4)) for _ in range(4)
+                ),
+                signup_token=f"{self.rng.getrandbits(128):032x}",
+            )
+            # Roughly 60% enrolled, 10% opted out again, the rest never enrolled
+            roll = self.rng.random()
+            if roll < 0.7:
+                school.enrolled_at = self.random_date(today - timedelta(days=4 * 365), today)
+                school.active_from = school.enrolled_at
+                if roll >= 0.6:
+                    school.opted_out_at = self.random_date(school.enrolled_at, today)
+            if self.rng.random() < 0.02:
+                school.do_not_contact_at = self.random_timestamp(365)
+            if self.rng.random() < 0.2:
+                school.kommunen_betaler = True
+                school.fakturering_kontakt_navn = "Økonomiafdelingen"
+                school.fakturering_kontakt_email = f"faktura{i}@load.example.dk"
+            schools.append(school)
+        return School.objects.bulk_create(schools, batch_size=BATCH_SIZE)
+
+    def create_people(self, schools):
+        titles = TitelChoice.values
+        people = []
+        for school in schools:
+            for n in range(self.rng.randint(1, 3)):
+                people.append(
+                    Person(
+                        school=school,
+                        name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                        titel=self.rng.choice(titles),
+                        email=f"person{n}.{school.pk}@load.example.dk",
+                        phone=f"{self.rng.randint(20000000, 99999999)}",
+                        is_koordinator=n == 0,
+                        is_oekonomisk_ansvarlig=n == 1,
+                    )
+                )
+        Person.objects.bulk_create(people, batch_size=BATCH_SIZE)
+        return len(people)
+
+    def create_comments(self, schools):
+        comments = [
+            SchoolComment(school=school, comment="Opfølgning aftalt", created_at=self.random_timestamp(730))
+            for school in schools
+            if self.rng.random() < 0.5
+        ]
+        with explicit_timestamp(SchoolComment, "created_at"):
+            SchoolComment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        return len(comments)
+
+    def create_courses(self, count):
+        locations = Location.objects.bulk_create(
+            [Location(name=f"{LOAD_PREFIX} Lokation {i}", municipality=f"By {i}") for i in range(1, LOCATION_COUNT + 1)]
+        )
+        today = date.today()
+        courses = []
+        for _ in range(count):
+            start = self.random_date(today - timedelta(days=3 * 365), today + timedelta(days=180))
+            courses.append(
+                Course(
+                    start_date=start,
+                    end_date=start + timedelta(days=self.rng.choice([0, 0, 1])),
+                    location=self.rng.choice(locations),
+                    capacity=SIGNUPS_PER_COURSE + 10,
+                    comment=f"{LOAD_PREFIX} kursus",
+                    is_published=True,
+                )
+            )
+        return Course.objects.bulk_create(courses, batch_size=BATCH_SIZE)
+
+    def create_signups(self, count, schools, kommuner, courses):
+        today = date.today()
+        enrolled = [school for school in schools if school.enrolled_at] or schools
+        signups = []
+        for i in range(count):
+            course = self.rng.choice(courses)
+            signup = CourseSignUp(
+                course=course,
+                participant_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                participant_email=f"deltager{i}@load.example.dk",
+                participant_title="Lærer",
+                is_underviser=self.rng.random() < 0.85,
+                created_at=timezone.make_aware(
+                    datetime.combine(course.start_date - timedelta(days=self.rng.randint(7, 90)), datetime.min.time())
+                ),
+            )
+            if self.rng.random() < 0.05:
+                signup.kommune = self.rng.choice(kommuner)
+            else:
+                signup.school = self.rng.choice(enrolled)
+            if course.end_date < today:
+                signup.attendance = AttendanceStatus.PRESENT if self.rng.random() < 0.85 else AttendanceStatus.ABSENT
+            signups.append(signup)
+        with explicit_timestamp(CourseSignUp, "created_at"):
+            CourseSignUp.objects.bulk_create(signups, batch_size=BATCH_SIZE)
+        # bulk_create bypasses CourseSignUp.save(), which maintains the counters
+        Course.objects.filter(pk__in=[course.pk for course in courses]).recount_signups()
+        return len(signups)
+
+    def create_activity_logs(self, count, schools, courses):
+        school_type = ContentType.objects.get_for_model(School)
+        course_type = ContentType.objects.get_for_model(Course)
+        actions = ActionType.values
+        rows = []
+        for _ in range(count):
+            action = self.rng.choice(actions)
+            if self.rng.random() < 0.7:
+                school = self.rng.choice(schools)
+                row = ActivityLog(
+                    content_type=school_type,
+                    object_id=school.pk,
+                    object_repr=school.name,
+                    related_school=school,
+                )
+            else:
+                course = self.rng.choice(courses)
+                row = ActivityLog(
+                    content_type=course_type,
+                    object_id=course.pk,
+                    object_repr=f"{LOAD_PREFIX} kursus {course.pk}",
+                    related_course=course,
+                )
+            row.action = action
+            if action == ActionType.UPDATE:
+                row.changes = {"comment": {"old": "", "new": "Opdateret"}}
+            row.timestamp = self.random_timestamp(3 * 365)
+            rows.append(row)
+        with explicit_timestamp(ActivityLog, "timestamp"):
+            ActivityLog.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        return len(rows)
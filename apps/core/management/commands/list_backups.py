@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.backup_catalog import get_s3_client, latest_backup_name, list_backups
+
+
+class Command(BaseCommand):
+    help = "List backups stored in S3, newest first"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=0, help="Only show the newest N backups")
+        parser.add_argument("--latest", action="store_true", help="Print only the name of the newest backup")
+
+    def handle(self, *args, **options):
+        s3 = get_s3_client()
+        if not s3:
+            raise CommandError("S3 not configured")
+
+        if options["latest"]:
+            name = latest_backup_name(s3, settings.S3_BUCKET_NAME)
+            if not name:
+                raise CommandError("No backups found on S3")
+            self.stdout.write(name)
+            return
+
+        backups = list_backups(s3, settings.S3_BUCKET_NAME)
+        if options["limit"]:
+            backups = backups[: options["limit"]]
+        if not backups:
+            self.stdout.write("No backups found on S3")
+            return
+
+        for entry in backups:
+            created_at = entry.created_at.strftime("%Y-%m-%d %H:%M") if entry.created_at else "unknown"
+            self.stdout.write(
+                f"{entry.name:<24} {created_at:<17} {entry.size / 1024 / 1024:>9.1f} MB  {', '.join(sorted(entry.files))}"
+            )
@@ -1,14 +1,29 @@
-import gzip
-import os
 import shutil
 import subprocess
 import tarfile
+import tempfile
+import time
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
+from apps.core.backup_catalog import BACKUP_PREFIX, get_s3_client, iter_objects, latest_backup_name
+from apps.core.backup_compression import EXTENSIONS as COMPRESSION_EXTENSIONS
+from apps.core.backup_compression import open_decompressed
+from apps.core.backup_db import (
+    default_jobs,
+    detect_format,
+    pg_conn_args,
+    pg_env,
+    recreate_database,
+    restore_command,
+    unpack_directory,
+)
+from apps.core.backup_media import MANIFEST_FILENAME as MEDIA_MANIFEST_FILENAME
+from apps.core.backup_media import load_json, restore_media_from_manifest
+
 
 class Command(BaseCommand):
     help = "Restore database and media files from a backup"
@@ -17,7 +32,10 @@ class Command(BaseCommand):
         parser.add_argument(
             "backup_name",
             type=str,
-            help="Name of the backup to restore (e.g., backup_20241217_123456)",
+            nargs="?",
+            default="latest",
+            help="Name of the backup to restore (e.g., backup_20241217_123456). "
+            'Defaults to "latest", the newest backup on S3 (requires --from-s3)',
         )
         parser.add_argument(
             "--backup-dir",
@@ -35,6 +53,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Skip restoring media files (database only)",
         )
+        parser.add_argument(
+            "--skip-database",
+            action="store_true",
+            help="Skip restoring the database (media only, e.g. to rebuild media as of this backup)",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=default_jobs(),
+            help="Parallel pg_restore workers for custom/directory backups (default: BACKUP_DB_JOBS or CPU count, max 4)",
+        )
         parser.add_argument(
             "--from-s3",
             action="store_true",
@@ -51,9 +80,13 @@ class Command(BaseCommand):
         backup_dir = Path(options["backup_dir"])
         skip_pre_backup = options["skip_pre_backup"]
         skip_media = options["skip_media"]
+        skip_database = options["skip_database"]
         from_s3 = options["from_s3"]
         confirmed = options["yes"]
 
+        if backup_name == "latest":
+            backup_name = self._latest_backup_name(from_s3)
+
         # Normalize backup name (allow with or without backup_ prefix)
         if not backup_name.startswith("backup_"):
             backup_name = f"backup_{backup_name}"
@@ -70,21 +103,29 @@ class Command(BaseCommand):
                 raise CommandError(f"Backup not found: {local_backup_path}\n" f"Use --from-s3 to download from S3")
 
         # Verify backup contents
-        db_file = local_backup_path / "database.sql.gz"
-        media_file = local_backup_path / "media.tar.gz"
+        manifest = self._read_manifest(local_backup_path)
+        db_format, db_file = detect_format(local_backup_path, manifest)
+        media_file = next(
+            (
+                local_backup_path / f"media.tar{ext}"
+                for ext in COMPRESSION_EXTENSIONS.values()
+                if (local_backup_path / f"media.tar{ext}").exists()
+            ),
+            local_backup_path / "media.tar.gz",
+        )
+        media_manifest = self._read_media_manifest(local_backup_path)
 
-        if not db_file.exists():
+        if not skip_database and not db_file.exists():
             raise CommandError(f"Database backup not found: {db_file}")
 
-        has_media = media_file.exists()
+        has_media = media_file.exists() or media_manifest is not None
         if not skip_media and not has_media:
             self.stdout.write(self.style.WARNING("No media backup found, skipping media restore"))
             skip_media = True
 
-        # Read manifest if available
-        manifest = self._read_manifest(local_backup_path)
         if manifest:
             self._show_manifest_warnings(manifest)
+            self._verify_checksums(local_backup_path, manifest)
 
         # Confirmation prompt
         if not confirmed:
@@ -93,9 +134,14 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("WARNING: This will OVERWRITE your current data!"))
             self.stdout.write(self.style.WARNING("=" * 60))
             self.stdout.write(f"Backup to restore: {backup_name}")
-            self.stdout.write(f"  - Database: {db_file.stat().st_size / 1024:.1f} KB")
+            if not skip_database:
+                self.stdout.write(f"  - Database: {db_file.stat().st_size / 1024:.1f} KB ({db_format} format)")
             if has_media and not skip_media:
-                self.stdout.write(f"  - Media: {media_file.stat().st_size / 1024:.1f} KB")
+                if media_manifest is not None:
+                    total = sum(info["size"] for info in media_manifest["files"].values())
+                    self.stdout.write(f"  - Media: {len(media_manifest['files'])} file(s), {total / 1024:.1f} KB")
+                else:
+                    self.stdout.write(f"  - Media: {media_file.stat().st_size / 1024:.1f} KB")
             self.stdout.write("")
 
             response = input('Type "RESTORE" to confirm: ')
@@ -114,15 +160,29 @@ class Command(BaseCommand):
                 raise CommandError("Aborting restore due to backup failure")
 
         # Restore database
-        self.stdout.write("")
-        self.stdout.write(f"Restoring database from {backup_name}...")
-        if not self._restore_database(db_file):
-            raise CommandError("Database restore failed")
+        if not skip_database:
+            self.stdout.write("")
+            self.stdout.write(f"Restoring database from {backup_name}...")
+            if not self._restore_database(db_format, db_file, options["jobs"]):
+                raise CommandError("Database restore failed")
 
         # Restore media files
         if not skip_media and has_media:
             self.stdout.write(f"Restoring media files from {backup_name}...")
-            if not self._restore_media(media_file):
+            if media_manifest is not None:
+                restored = self._restore_media(
+                    lambda target: restore_media_from_manifest(
+                        media_manifest,
+                        target,
+                        backup_dir,
+                        s3=self._get_s3_client(),
+                        bucket=settings.S3_BUCKET_NAME,
+                        log=self.stdout.write,
+                    )
+                )
+            else:
+                restored = self._restore_media(lambda target: self._extract_tar(media_file, target))
+            if not restored:
                 self.stderr.write(self.style.WARNING("Media restore failed, but database was restored"))
 
         self.stdout.write("")
@@ -130,28 +190,23 @@ class Command(BaseCommand):
 
     def _get_s3_client(self):
         """Get S3 client if configured."""
-        required_settings = ["S3_ACCESS_KEY", "S3_SECRET_KEY", "S3_BUCKET_NAME", "S3_ENDPOINT"]
-        missing = [s for s in required_settings if not getattr(settings, s, None)]
-        if missing:
-            return None
-
         try:
-            import boto3
-            from botocore.config import Config
-
-            return boto3.client(
-                "s3",
-                endpoint_url=settings.S3_ENDPOINT,
-                aws_access_key_id=settings.S3_ACCESS_KEY,
-                aws_secret_access_key=settings.S3_SECRET_KEY,
-                config=Config(
-                    signature_version="s3v4",
-                    retries={"max_attempts": 3, "mode": "standard"},
-                ),
-            )
+            return get_s3_client()
         except Exception:
             return None
 
+    def _latest_backup_name(self, from_s3):
+        if not from_s3:
+            raise CommandError("Specify a backup name, or use --from-s3 to restore the newest backup on S3")
+        s3 = self._get_s3_client()
+        if not s3:
+            raise CommandError("S3 not configured")
+        name = latest_backup_name(s3, settings.S3_BUCKET_NAME)
+        if not name:
+            raise CommandError("No backups found on S3")
+        self.stdout.write(f"Newest backup on S3: {name}")
+        return name
+
     def _download_from_s3(self, backup_name, local_path):
         """Download backup from S3."""
         s3 = self._get_s3_client()
@@ -161,12 +216,7 @@ class Command(BaseCommand):
 
         try:
             # List files in the backup directory
-            response = s3.list_objects_v2(
-                Bucket=settings.S3_BUCKET_NAME,
-                Prefix=f"backups/{backup_name}/",
-            )
-
-            contents = response.get("Contents", [])
+            contents = list(iter_objects(s3, settings.S3_BUCKET_NAME, f"{BACKUP_PREFIX}{backup_name}/"))
             if not contents:
                 self.stderr.write(self.style.ERROR(f"Backup not found on S3: {backup_name}"))
                 return False
@@ -180,13 +230,8 @@ class Command(BaseCommand):
                     continue
 
                 self.stdout.write(f"  Downloading: {filename}")
-                local_file = local_path / filename
-
-                response = s3.get_object(
-                    Bucket=settings.S3_BUCKET_NAME,
-                    Key=key,
-                )
-                local_file.write_bytes(response["Body"].read())
+                # download_file streams to disk (multipart for large objects)
+                s3.download_file(settings.S3_BUCKET_NAME, key, str(local_path / filename))
 
             return True
 
@@ -194,7 +239,7 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"S3 download failed: {e}"))
             return False
 
-    def _restore_database(self, db_file):
+    def _restore_database(self, db_format, db_file, jobs):
         """Restore PostgreSQL database from backup."""
         import dj_database_url
 
@@ -204,69 +249,22 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR("DATABASE_URL not configured"))
             return False
 
-        env = os.environ.copy()
-        env["PGPASSWORD"] = db_config.get("PASSWORD", "")
-
-        db_host = db_config.get("HOST", "localhost")
-        db_port = str(db_config.get("PORT", 5432))
-        db_user = db_config.get("USER", "postgres")
-        db_name = db_config.get("NAME", "basal")
-
         try:
-            # Decompress the backup
-            self.stdout.write("  Decompressing backup...")
-            with gzip.open(db_file, "rb") as f:
-                sql_data = f.read()
-
-            # Drop and recreate the database
-            # First, terminate existing connections
-            self.stdout.write("  Terminating existing connections...")
-            terminate_sql = f"""
-                SELECT pg_terminate_backend(pid)
-                FROM pg_stat_activity
-                WHERE datname = '{db_name}' AND pid <> pg_backend_pid();
-            """
-
-            subprocess.run(
-                ["psql", "-h", db_host, "-p", db_port, "-U", db_user, "-d", "postgres", "-c", terminate_sql],
-                env=env,
-                capture_output=True,
-            )
-
-            # Drop and recreate database
-            self.stdout.write("  Dropping database...")
-            subprocess.run(
-                ["dropdb", "-h", db_host, "-p", db_port, "-U", db_user, "--if-exists", db_name],
-                env=env,
-                capture_output=True,
-                check=True,
-            )
-
-            self.stdout.write("  Creating database...")
-            subprocess.run(
-                ["createdb", "-h", db_host, "-p", db_port, "-U", db_user, db_name],
-                env=env,
-                capture_output=True,
-                check=True,
-            )
-
-            # Restore the backup
-            self.stdout.write("  Restoring data...")
-            result = subprocess.run(
-                ["psql", "-h", db_host, "-p", db_port, "-U", db_user, "-d", db_name],
-                env=env,
-                input=sql_data,
-                capture_output=True,
-            )
-
-            if result.returncode != 0:
-                # psql may return non-zero for warnings, check stderr for actual errors
-                stderr = result.stderr.decode()
-                if "ERROR" in stderr:
-                    self.stderr.write(self.style.ERROR(f"Restore errors: {stderr}"))
-                    return False
-
-            self.stdout.write(self.style.SUCCESS("  Database restored successfully"))
+            recreate_database(db_config, log=self.stdout.write)
+
+            self.stdout.write(f"  Restoring data ({db_format} format)...")
+            start = time.monotonic()
+            if db_format == "plain":
+                restored = self._restore_plain(db_config, db_file)
+            elif db_format == "custom":
+                restored = self._run_pg_restore(db_config, db_file, jobs)
+            else:
+                with tempfile.TemporaryDirectory(dir=db_file.parent) as tmp:
+                    restored = self._run_pg_restore(db_config, unpack_directory(db_file, tmp), jobs)
+            if not restored:
+                return False
+
+            self.stdout.write(self.style.SUCCESS(f"  Database restored successfully ({time.monotonic() - start:.1f}s)"))
             return True
 
         except subprocess.CalledProcessError as e:
@@ -276,28 +274,67 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Database restore failed: {e}"))
             return False
 
-    def _restore_media(self, media_file):
-        """Restore media files from backup."""
+    def _restore_plain(self, db_config, db_file):
+        """Stream a gzipped SQL dump into psql without loading it into memory."""
+        cmd = ["psql", *pg_conn_args(db_config), "-d", db_config.get("NAME", "basal")]
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, env=pg_env(db_config), stdin=subprocess.PIPE, stderr=stderr_file)
+            try:
+                with open_decompressed(db_file) as f:
+                    shutil.copyfileobj(f, process.stdin, 1024 * 1024)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode(errors="replace")
+
+        if returncode != 0:
+            # psql may return non-zero for warnings, check stderr for actual errors
+            if "ERROR" in stderr:
+                self.stderr.write(self.style.ERROR(f"Restore errors: {stderr}"))
+                return False
+        return True
+
+    def _run_pg_restore(self, db_config, path, jobs):
+        result = subprocess.run(restore_command(db_config, path, jobs), env=pg_env(db_config), capture_output=True)
+        if result.returncode != 0:
+            self.stderr.write(self.style.ERROR(f"Restore errors: {result.stderr.decode()}"))
+            return False
+        return True
+
+    def _extract_tar(self, media_file, target):
+        """Extract a compressed media tar (archived with arcname "media") into target."""
+        with open_decompressed(media_file) as f, tarfile.open(fileobj=f, mode="r|") as tar:
+            tar.extractall(target.parent / f"{target.name}_extract", filter="data")
+        (target.parent / f"{target.name}_extract" / "media").rename(target)
+        shutil.rmtree(target.parent / f"{target.name}_extract")
+
+    def _restore_media(self, build):
+        """
+        Rebuild media into a fresh directory with `build(target)` and swap it in
+        place of MEDIA_ROOT, keeping the current media until the build succeeded.
+        """
         media_root = Path(settings.MEDIA_ROOT)
+        new_media = media_root.parent / f"{media_root.name}_new"
+        backup_media = media_root.parent / f"{media_root.name}_old"
 
         try:
-            # Create a backup of current media (just rename)
-            if media_root.exists():
-                backup_media = media_root.parent / f"{media_root.name}_old"
-                if backup_media.exists():
-                    shutil.rmtree(backup_media)
-                media_root.rename(backup_media)
-                self.stdout.write("  Backed up existing media directory")
+            for leftover in (new_media, backup_media):
+                if leftover.exists():
+                    shutil.rmtree(leftover)
 
-            # Extract the media archive
             self.stdout.write("  Extracting media files...")
             media_root.parent.mkdir(parents=True, exist_ok=True)
+            build(new_media)
+            new_media.mkdir(parents=True, exist_ok=True)
 
-            with tarfile.open(media_file, "r:gz") as tar:
-                tar.extractall(media_root.parent)
+            # Swap the rebuilt tree in place of the current media
+            if media_root.exists():
+                media_root.rename(backup_media)
+                self.stdout.write("  Backed up existing media directory")
+            new_media.rename(media_root)
 
-            # Clean up old media backup
-            backup_media = media_root.parent / f"{media_root.name}_old"
             if backup_media.exists():
                 shutil.rmtree(backup_media)
 
@@ -306,8 +343,9 @@ class Command(BaseCommand):
 
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Media restore failed: {e}"))
+            if new_media.exists():
+                shutil.rmtree(new_media)
             # Try to restore old media if available
-            backup_media = media_root.parent / f"{media_root.name}_old"
             if backup_media.exists():
                 if media_root.exists():
                     shutil.rmtree(media_root)
@@ -315,6 +353,13 @@ class Command(BaseCommand):
                 self.stdout.write("  Restored original media directory")
             return False
 
+    def _read_media_manifest(self, backup_path):
+        """Read the incremental media manifest, or None for tar-based backups."""
+        manifest = load_json(backup_path / MEDIA_MANIFEST_FILENAME)
+        if manifest is None and (backup_path / MEDIA_MANIFEST_FILENAME).exists():
+            raise CommandError(f"Could not read {MEDIA_MANIFEST_FILENAME}")
+        return manifest
+
     def _read_manifest(self, backup_path):
         """Read manifest.json from backup."""
         import json
@@ -330,6 +375,23 @@ class Command(BaseCommand):
             self.stderr.write(self.style.WARNING(f"Could not read manifest: {e}"))
             return None
 
+    def _verify_checksums(self, backup_path, manifest):
+        """Verify files against the SHA-256 recorded in the manifest (backups made by the streaming pipeline)."""
+        import hashlib
+
+        for filename, info in (manifest.get("files") or {}).items():
+            path = backup_path / filename
+            if not path.exists() or not info.get("sha256"):
+                continue
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            if digest.hexdigest() != info["sha256"]:
+                raise CommandError(f"Checksum mismatch for {filename} — the backup file is corrupt or incomplete")
+        if manifest.get("files"):
+            self.stdout.write("  Checksums verified")
+
     def _show_manifest_warnings(self, manifest):
         """Show warnings if current state doesn't match backup."""
         from django.db import connection
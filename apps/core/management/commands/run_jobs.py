@@ -0,0 +1,53 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.jobs import claim_next_job, reap_stale_jobs, run_job, worker_name
+from apps.core.models import JobStatus
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (backups, reminders, webhook processing)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are queued now and exit instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the queue is empty (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        name = worker_name()
+        self.stdout.write(f"Job worker {name} started")
+
+        while not self.stopping:
+            reaped = reap_stale_jobs()
+            if reaped:
+                self.stdout.write(self.style.WARNING(f"Marked {reaped} stale job(s) as failed"))
+
+            job = claim_next_job(name)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running {job}...")
+            run_job(job)
+            style = self.style.SUCCESS if job.status == JobStatus.SUCCEEDED else self.style.ERROR
+            self.stdout.write(style(f"Finished {job} in {job.duration.total_seconds():.1f}s"))
+
+        self.stdout.write("Job worker stopped")
+
+    def _stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
@@ -0,0 +1,411 @@
+"""
+Prometheus-style metrics shared between gunicorn workers.
+
+Each process counts into an in-memory registry and writes a snapshot of it to
+its own JSON file in METRICS_DIR (at most every FLUSH_INTERVAL seconds, and at
+exit). The /metrics endpoint sums the snapshots of all processes, so the numbers
+are totals for the whole app no matter which worker answers the scrape. Files of
+processes that have exited on this host are folded into an archive file so
+counters never go backwards.
+
+Numbers that the database already knows (emails sent, webhook events, queued
+jobs) are not counted here but queried when the endpoint is scraped.
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5
+ARCHIVE_FILENAME = "archive.json"
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help, buckets for histograms)
+METRICS = {
+    "basal_http_request_duration_seconds": ("histogram", "Request latency per URL name", LATENCY_BUCKETS),
+    "basal_http_request_queries": ("histogram", "Database queries per request per URL name", QUERY_BUCKETS),
+    "basal_http_responses_total": ("counter", "Responses per URL name and status code", None),
+    "basal_bulk_email_send_seconds_total": ("counter", "Time spent sending bulk email campaigns", None),
+    "basal_bulk_email_last_recipients_per_second": ("gauge", "Throughput of the last bulk email campaign", None),
+    "basal_backup_last_duration_seconds": ("gauge", "Duration of the last successful backup", None),
+    "basal_backup_last_size_bytes": ("gauge", "Size of the last successful backup", None),
+    "basal_backup_last_success_timestamp_seconds": ("gauge", "Unix time of the last successful backup", None),
+    "basal_backups_total": ("counter", "Backup runs by result", None),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+class Registry:
+    """Metrics of this process. Counters and histograms are cumulative, gauges keep their last value."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.dirty = False
+        self.last_flush = time.monotonic()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self.dirty = True
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": [0] * len(buckets), "sum": 0, "count": 0}
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+            self.dirty = True
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = (value, time.time())
+            self.dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            self.dirty = False
+            return {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, dict(labels), list(h["buckets"]), h["sum"], h["count"]]
+                    for (name, labels), h in self.histograms.items()
+                ],
+                "gauges": [[name, dict(labels), value, ts] for (name, labels), (value, ts) in self.gauges.items()],
+            }
+
+
+registry = Registry()
+
+
+def metrics_dir():
+    return Path(settings.METRICS_DIR)
+
+
+def _write_json(path, data):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+class _DirectoryLock:
+    """Exclusive lock on METRICS_DIR, held while process files are created or archived."""
+
+    def __init__(self, directory):
+        self.path = directory / ".lock"
+
+    def __enter__(self):
+        self.handle = open(self.path, "w")
+        fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        self.handle.close()
+
+
+class ProcessFile:
+    """
+    This process's snapshot file. A lock file next to it stays flock()ed for
+    the life of the process, so another process can tell it has exited by
+    acquiring that lock (the kernel releases it however the process ended).
+    """
+
+    def __init__(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"process-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.pid = os.getpid()
+        self.path = directory / f"{stem}.json"
+        with _DirectoryLock(directory):
+            self.lock = open(directory / f"{stem}.lock", "w")
+            fcntl.flock(self.lock, fcntl.LOCK_EX)
+
+    def write(self, snapshot):
+        _write_json(self.path, snapshot)
+
+
+_process_file = None
+
+
+def flush():
+    """Write this process's snapshot to its file in METRICS_DIR."""
+    global _process_file
+    registry.last_flush = time.monotonic()
+    if not registry.dirty:
+        return
+    try:
+        directory = metrics_dir()
+        if _process_file is None or _process_file.pid != os.getpid() or _process_file.path.parent != directory:
+            _process_file = ProcessFile(directory)
+        _process_file.write(registry.snapshot())
+    except OSError as e:
+        logger.warning("Could not write metrics to %s: %s", settings.METRICS_DIR, e)
+
+
+def maybe_flush():
+    if time.monotonic() - registry.last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+atexit.register(flush)
+
+
+def merge(snapshots):
+    """Sum counters and histograms of several snapshots; the newest value wins for gauges."""
+    counters, histograms, gauges = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []):
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot.get("histograms", []):
+            key = _key(name, labels)
+            if key not in histograms:
+                histograms[key] = {"buckets": [0] * len(buckets), "sum": 0, "count": 0}
+            merged = histograms[key]
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], buckets)]
+            merged["sum"] += total
+            merged["count"] += count
+        for name, labels, value, ts in snapshot.get("gauges", []):
+            key = _key(name, labels)
+            if key not in gauges or ts >= gauges[key][1]:
+                gauges[key] = (value, ts)
+    return {
+        "counters": [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        "histograms": [
+            [name, dict(labels), h["buckets"], h["sum"], h["count"]] for (name, labels), h in histograms.items()
+        ],
+        "gauges": [[name, dict(labels), value, ts] for (name, labels), (value, ts) in gauges.items()],
+    }
+
+
+def _lock_if_exited(lock_path):
+    """Return an open, locked handle on lock_path if its process has exited, else None."""
+    try:
+        handle = open(lock_path, "a")
+    except OSError:
+        return None
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+def compact(directory):
+    """
+    Fold the snapshots of exited processes into the archive, so the directory
+    doesn't grow with every worker restart or deploy while totals are kept.
+    """
+    with _DirectoryLock(directory):
+        archived = []
+        for path in directory.glob("process-*.json"):
+            if _process_file is not None and path == _process_file.path:
+                continue
+            lock_path = path.with_suffix(".lock")
+            handle = None
+            if lock_path.exists():
+                handle = _lock_if_exited(lock_path)
+                if handle is None:
+                    continue
+            archived.append((path, lock_path, handle))
+        if not archived:
+            return
+
+        archive_path = directory / ARCHIVE_FILENAME
+        _write_json(archive_path, merge([_read_json(archive_path)] + [_read_json(path) for path, _, _ in archived]))
+        for path, lock_path, handle in archived:
+            path.unlink(missing_ok=True)
+            lock_path.unlink(missing_ok=True)
+            if handle:
+                handle.close()
+
+
+def collect():
+    """Merged snapshot of every process, including this one's unflushed values."""
+    flush()
+    directory = metrics_dir()
+    if not directory.exists():
+        return merge([])
+    try:
+        compact(directory)
+    except OSError as e:
+        logger.warning("Could not compact metrics in %s: %s", directory, e)
+    return merge(_read_json(path) for path in sorted(directory.glob("*.json")))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in sorted(labels.items())
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(snapshot, extra=()):
+    """
+    Render a merged snapshot in the Prometheus text exposition format. `extra` is a
+    list of (name, type, help, [(labels, value), ...]) for values computed at scrape time.
+    """
+    families = {}
+    for name, labels, value in snapshot["counters"]:
+        families.setdefault(name, []).append((labels, value))
+    for name, labels, value, _ts in snapshot["gauges"]:
+        families.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(families):
+        metric_type, help_text, _ = METRICS.get(name, ("untyped", "", None))
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+        for labels, value in sorted(families[name], key=lambda item: sorted(item[0].items())):
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    histograms = {}
+    for name, labels, buckets, total, count in snapshot["histograms"]:
+        histograms.setdefault(name, []).append((labels, buckets, total, count))
+    for name in sorted(histograms):
+        _, help_text, bounds = METRICS[name]
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, buckets, total, count in sorted(histograms[name], key=lambda item: sorted(item[0].items())):
+            for bound, bucket_count in zip(bounds, buckets):
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {bucket_count}")
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    for name, metric_type, help_text, samples in extra:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def observe_request(view_name, status_code, seconds, queries):
+    registry.observe("basal_http_request_duration_seconds", seconds, view=view_name)
+    registry.observe("basal_http_request_queries", queries, view=view_name)
+    registry.inc("basal_http_responses_total", view=view_name, status=status_code)
+    maybe_flush()
+
+
+def record_bulk_send(recipients, seconds):
+    registry.inc("basal_bulk_email_send_seconds_total", seconds)
+    if seconds > 0:
+        registry.set("basal_bulk_email_last_recipients_per_second", recipients / seconds)
+    flush()
+
+
+def record_backup(success, seconds=None, size=None):
+    registry.inc("basal_backups_total", result="success" if success else "failure")
+    if success:
+        registry.set("basal_backup_last_duration_seconds", seconds)
+        registry.set("basal_backup_last_size_bytes", size)
+        registry.set("basal_backup_last_success_timestamp_seconds", time.time())
+    flush()
+
+
+def _email_status_counts(queryset, group_by=None):
+    blocked = Q(success=False, error_message__startswith="[BLOCKED]")
+    counts = {
+        "sent": Count("pk", filter=Q(success=True)),
+        "blocked": Count("pk", filter=blocked),
+        "failed": Count("pk", filter=Q(success=False) & ~blocked),
+    }
+    if group_by:
+        return queryset.values(group_by).annotate(**counts).order_by(group_by)
+    return [queryset.aggregate(**counts)]
+
+
+def database_metrics():
+    """Metrics read from the database at scrape time, in the `extra` format of render()."""
+    from apps.bulk_email.models import BulkEmailRecipient
+    from apps.core.models import Job, JobStatus
+    from apps.emails.models import EmailLog, WebhookEvent
+
+    from .jobs import JOB_COMMANDS
+
+    emails = [
+        ({"type": row["email_type"], "status": status}, row[status])
+        for row in _email_status_counts(EmailLog.objects.all(), "email_type")
+        for status in ("sent", "failed", "blocked")
+    ]
+    bulk = _email_status_counts(BulkEmailRecipient.objects.all())[0]
+
+    webhooks = WebhookEvent.objects.aggregate(
+        processed=Count("pk", filter=Q(processed_at__isnull=False, error_message="")),
+        failed=Count("pk", filter=Q(processed_at__isnull=False) & ~Q(error_message="")),
+        pending=Count("pk", filter=Q(processed_at__isnull=True)),
+    )
+
+    active_jobs = {
+        (row["kind"], row["status"]): row["count"]
+        for row in Job.objects.filter(status__in=[JobStatus.QUEUED, JobStatus.RUNNING])
+        .values("kind", "status")
+        .annotate(count=Count("pk"))
+    }
+    jobs = [
+        ({"kind": kind, "status": status}, active_jobs.get((kind, status), 0))
+        for kind in JOB_COMMANDS
+        for status in (JobStatus.QUEUED, JobStatus.RUNNING)
+    ]
+
+    return [
+        ("basal_emails_total", "counter", "Transactional emails by type and result", emails),
+        (
+            "basal_bulk_email_recipients_total",
+            "counter",
+            "Bulk email recipients by result",
+            [({"status": status}, bulk[status]) for status in ("sent", "failed", "blocked")],
+        ),
+        (
+            "basal_webhook_events_processed_total",
+            "counter",
+            "Resend webhook events processed",
+            [({"result": "success"}, webhooks["processed"]), ({"result": "error"}, webhooks["failed"])],
+        ),
+        (
+            "basal_webhook_events_pending",
+            "gauge",
+            "Webhook events waiting to be processed",
+            [({}, webhooks["pending"])],
+        ),
+        ("basal_jobs", "gauge", "Queued and running background jobs", jobs),
+    ]
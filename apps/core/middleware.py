@@ -0,0 +1,83 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metrics as app_metrics
+from .performance import (
+    RequestMetrics,
+    current_metrics,
+    install_template_timer,
+    query_timer,
+    slow_request_ms,
+    slow_request_queries,
+    view_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    """
+    Measure query count, DB time, template time and view time for each request.
+
+    Staff get the numbers in a Server-Timing header (visible in the browser's
+    network tab), requests over the configured thresholds are logged with their
+    slowest queries, and every request is added to the per-view statistics
+    shown on the performance page and exported on /metrics.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERFORMANCE_MONITORING", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request._performance_metrics = metrics
+        token = current_metrics.set(metrics)
+        try:
+            with connection.execute_wrapper(query_timer):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        metrics.finish()
+
+        match = request.resolver_match
+        if match is not None:
+            view_stats.add(match.view_name, metrics)
+            app_metrics.observe_request(match.view_name, response.status_code, metrics.total_ms / 1000, metrics.queries)
+            self._log_if_slow(request, match.view_name, metrics)
+
+        if self._is_staff(request):
+            response["Server-Timing"] = metrics.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._performance_metrics.view_started = time.perf_counter()
+
+    def _is_staff(self, request):
+        # Only look at a user that is already loaded, so adding the header never
+        # costs a session or user query on its own
+        user = getattr(request, "_cached_user", None)
+        return bool(user is not None and user.is_staff)
+
+    def _log_if_slow(self, request, view_name, metrics):
+        if metrics.total_ms < slow_request_ms() and metrics.queries < slow_request_queries():
+            return
+        slowest = "\n".join(f"  {duration:.1f} ms: {sql[:500]}" for duration, sql in metrics.slowest)
+        logger.warning(
+            "Slow request %s %s (%s): %.0f ms total, %d queries in %.0f ms, templates %.0f ms\n%s",
+            request.method,
+            request.path,
+            view_name,
+            metrics.total_ms,
+            metrics.queries,
+            metrics.db_ms,
+            metrics.template_ms,
+            slowest,
+        )
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_remove_contacts_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=50, verbose_name="Type")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "I kø"),
+                            ("running", "Kører"),
+                            ("succeeded", "Gennemført"),
+                            ("failed", "Fejlet"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                ("progress", models.CharField(blank=True, max_length=255, verbose_name="Fremskridt")),
+                ("log", models.TextField(blank=True, verbose_name="Log")),
+                ("error", models.TextField(blank=True, verbose_name="Fejl")),
+                ("triggered_by", models.CharField(blank=True, max_length=50, verbose_name="Startet af")),
+                ("worker", models.CharField(blank=True, max_length=100, verbose_name="Worker")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Oprettet")),
+                ("started_at", models.DateTimeField(blank=True, null=True, verbose_name="Startet")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Afsluttet")),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True, verbose_name="Seneste livstegn")),
+            ],
+            options={
+                "verbose_name": "Job",
+                "verbose_name_plural": "Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(condition=models.Q(("status", "queued")), fields=["created_at"], name="job_queued_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status__in", ("queued", "running"))),
+                        fields=("kind",),
+                        name="unique_active_job_per_kind",
+                    )
+                ],
+            },
+        ),
+    ]
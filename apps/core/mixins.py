@@ -1,3 +1,47 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core import signing
+from django.db import models
+from django.db.models import F, Q
+
+
+class CursorPage:
+    """
+    One page of a cursor-paginated list.
+
+    Offers the parts of Django's Page the templates use (iteration,
+    has_next/has_previous/has_other_pages) plus the cursors of the
+    neighbouring pages and a count that stops at SortableMixin.count_cap.
+    """
+    is_cursor_page = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count, count_capped):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_capped = count_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
 class SortableMixin:
     """
     Mixin for ListView that adds sorting support.
@@ -5,10 +49,19 @@ class SortableMixin:
     Define `sortable_fields` as a dict mapping URL param names to model fields.
     Define `default_sort` as the default sort field (optional).
     Override `get_base_queryset` to provide filtered queryset before sorting.
+
+    Set `cursor_pagination = True` to page by keyset instead of OFFSET/LIMIT:
+    the `cursor` URL param carries the sort field value and pk of the row the
+    page continues from, pk breaks ties, and the total is counted up to
+    `count_cap` rows only. Sort fields must then be model fields or lookups,
+    and rows with a NULL sort value come last in both directions.
     """
     sortable_fields = {}
     default_sort = None
     default_order = 'asc'
+    cursor_pagination = False
+    count_cap = 1000
+    cursor_salt = 'core.mixins.cursor'
 
     def get_sort_params(self):
         sort = self.request.GET.get('sort', self.default_sort)
@@ -33,6 +86,58 @@ class SortableMixin:
 
         return queryset
 
+    def paginate_queryset(self, queryset, page_size):
+        if not self.cursor_pagination:
+            return super().paginate_queryset(queryset, page_size)
+
+        sort, order = self.get_sort_params()
+        if sort not in self.sortable_fields:
+            sort = self.default_sort if self.default_sort in self.sortable_fields else None
+        field = self.sortable_fields.get(sort, 'pk')
+        descending = order == 'desc'
+
+        cursor = self._decode_cursor(self.request.GET.get('cursor'), sort, order)
+        backwards = bool(cursor and cursor['before'])
+        rows = queryset.order_by(*_keyset_ordering(field, descending, reverse=backwards))
+        if cursor:
+            rows = rows.filter(_keyset_filter(field, cursor['value'], cursor['pk'], descending, before=backwards))
+        rows = list(rows[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        next_cursor = self._encode_cursor(rows[-1], field, sort, order, before=False) if has_next and rows else None
+        previous_cursor = self._encode_cursor(rows[0], field, sort, order, before=True) if has_previous and rows else None
+
+        count = queryset.order_by()[:self.count_cap + 1].count()
+        page = CursorPage(rows, next_cursor, previous_cursor, min(count, self.count_cap), count > self.count_cap)
+        return None, page, rows, page.has_other_pages()
+
+    def _encode_cursor(self, obj, field, sort, order, before):
+        value = _sort_value(obj, field)
+        if isinstance(value, (date, datetime, time)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = {'sort': sort, 'order': order, 'value': value, 'pk': obj.pk, 'before': before}
+        return signing.dumps(payload, salt=self.cursor_salt, compress=True)
+
+    def _decode_cursor(self, cursor, sort, order):
+        """The cursor's payload, or None if there is none or it was made for another sort."""
+        if not cursor:
+            return None
+        try:
+            payload = signing.loads(cursor, salt=self.cursor_salt)
+        except signing.BadSignature:
+            return None
+        if payload.get('sort') != sort or payload.get('order') != order:
+            return None
+        return payload
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         sort, order = self.get_sort_params()
@@ -40,3 +145,36 @@ class SortableMixin:
         context['current_order'] = order
         context['sortable_fields'] = self.sortable_fields
         return context
+
+
+def _sort_value(obj, field):
+    value = obj
+    for part in field.split('__'):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value.pk if isinstance(value, models.Model) else value
+
+
+def _keyset_ordering(field, descending, reverse=False):
+    """Ordering with NULL sort values last and pk as tiebreaker (flipped when reverse)."""
+    descending = descending != reverse
+    expression = F(field).desc if descending else F(field).asc
+    nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+    return [expression(**nulls), '-pk' if descending else 'pk']
+
+
+def _keyset_filter(field, value, pk, descending, before=False):
+    """Rows after (or before) the row with sort value `value` and `pk` in the page order."""
+    step = 'lt' if descending != before else 'gt'
+    if before:
+        if value is None:
+            return Q(**{f'{field}__isnull': False}) | Q(**{f'{field}__isnull': True, f'pk__{step}': pk})
+        return Q(**{f'{field}__{step}': value}) | Q(**{field: value, f'pk__{step}': pk})
+    if value is None:
+        return Q(**{f'{field}__isnull': True, f'pk__{step}': pk})
+    return (
+        Q(**{f'{field}__{step}': value})
+        | Q(**{field: value, f'pk__{step}': pk})
+        | Q(**{f'{field}__isnull': True})
+    )
@@ -1,5 +1,11 @@
+import hashlib
+
+from django.core.cache import cache
 from django.db import models
 
+# Bounds staleness from writes that skip save() (QuerySet.update(), data migrations, SQL)
+PROJECT_SETTINGS_TIMEOUT = 60 * 10
+
 
 class ProjectSettings(models.Model):
     """Singleton model for project-wide settings."""
@@ -37,11 +43,95 @@ class ProjectSettings(models.Model):
         verbose_name = "Projektindstillinger"
         verbose_name_plural = "Projektindstillinger"
 
+    CACHE_KEY = "core:project-settings:{schema}"
+
+    @classmethod
+    def cache_key(cls):
+        """Cache key carrying the model's fields, so a deploy that changes them never unpickles an old instance."""
+        schema = ",".join(f"{field.attname}:{field.get_internal_type()}" for field in cls._meta.concrete_fields)
+        return cls.CACHE_KEY.format(schema=hashlib.sha256(schema.encode()).hexdigest()[:12])
+
     def save(self, *args, **kwargs):
         self.pk = 1  # Singleton pattern
         super().save(*args, **kwargs)
+        cache.delete(self.cache_key())
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache.delete(self.cache_key())
+        return result
 
     @classmethod
     def get(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
+        # Kept in the shared cache (every worker sees the invalidation from save())
+        key = cls.cache_key()
+        obj = cache.get(key)
+        if obj is None:
+            obj, _ = cls.objects.get_or_create(pk=1)
+            cache.set(key, obj, PROJECT_SETTINGS_TIMEOUT)
         return obj
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = "queued", "I kø"
+    RUNNING = "running", "Kører"
+    SUCCEEDED = "succeeded", "Gennemført"
+    FAILED = "failed", "Fejlet"
+
+
+ACTIVE_JOB_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+class Job(models.Model):
+    """
+    Background job (backup, reminders, webhook processing) run by `run_jobs`.
+
+    Cron endpoints only enqueue and return; a worker claims queued jobs with
+    SELECT ... FOR UPDATE SKIP LOCKED. At most one job per kind can be queued or
+    running at a time (enforced by a partial unique constraint), so a slow backup
+    is never started twice.
+    """
+
+    kind = models.CharField(max_length=50, verbose_name="Type")
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED, verbose_name="Status")
+    progress = models.CharField(max_length=255, blank=True, verbose_name="Fremskridt")
+    log = models.TextField(blank=True, verbose_name="Log")
+    error = models.TextField(blank=True, verbose_name="Fejl")
+    triggered_by = models.CharField(max_length=50, blank=True, verbose_name="Startet af")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oprettet")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Startet")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Afsluttet")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Seneste livstegn")
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind"],
+                condition=models.Q(status__in=ACTIVE_JOB_STATUSES),
+                name="unique_active_job_per_kind",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="job_queued_idx",
+                condition=models.Q(status=JobStatus.QUEUED),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_active(self):
+        return self.status in ACTIVE_JOB_STATUSES
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
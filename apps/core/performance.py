@@ -0,0 +1,170 @@
+"""
+Per-request performance measurements and rolling per-view statistics.
+
+PerformanceMiddleware (apps/core/middleware.py) creates a RequestMetrics for each
+request, counts queries through `connection.execute_wrapper` and times template
+rendering by wrapping the Django template backend once. Finished requests are
+added to an in-memory window per view, from which the staff performance page
+computes percentiles. The window lives in the worker process, so with several
+gunicorn workers each one reports its own traffic.
+"""
+
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+WINDOW_SIZE = 500
+SLOWEST_QUERIES = 5
+
+current_metrics = contextvars.ContextVar("current_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    view_started: float = None
+    queries: int = 0
+    db_ms: float = 0.0
+    template_ms: float = 0.0
+    view_ms: float = 0.0
+    total_ms: float = 0.0
+    slowest: list = field(default_factory=list)
+
+    def record_query(self, sql, duration_ms):
+        self.queries += 1
+        self.db_ms += duration_ms
+        if len(self.slowest) < SLOWEST_QUERIES or duration_ms > self.slowest[-1][0]:
+            self.slowest.append((duration_ms, sql))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_QUERIES:]
+
+    def finish(self):
+        now = time.perf_counter()
+        self.total_ms = (now - self.started) * 1000
+        if self.view_started is not None:
+            # Time spent in the view itself, without its queries and template rendering
+            self.view_ms = max(0.0, (now - self.view_started) * 1000 - self.db_ms - self.template_ms)
+
+    def server_timing(self):
+        return ", ".join(
+            [
+                f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+                f"tpl;dur={self.template_ms:.1f}",
+                f"view;dur={self.view_ms:.1f}",
+                f"total;dur={self.total_ms:.1f}",
+            ]
+        )
+
+
+def query_timer(execute, sql, params, many, context):
+    """connection.execute_wrapper hook that records each query on the current request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, (time.perf_counter() - start) * 1000)
+
+
+_template_timer_installed = False
+
+
+def install_template_timer():
+    """
+    Wrap the Django template backend's render() so top-level renders are timed.
+    Included templates render through the engine directly and are counted as
+    part of their parent, so nothing is counted twice.
+    """
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def timed_render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return original_render(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    Template.render = timed_render
+    _template_timer_installed = True
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ViewStats:
+    """Rolling window of the last WINDOW_SIZE requests per view, safe to share between threads."""
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window_size))
+        self._totals = defaultdict(int)
+
+    def add(self, view_name, metrics):
+        sample = (metrics.total_ms, metrics.view_ms, metrics.db_ms, metrics.template_ms, metrics.queries)
+        with self._lock:
+            self._samples[view_name].append(sample)
+            self._totals[view_name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def summary(self):
+        """One row per view with percentiles over its window, slowest p95 first."""
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+
+        rows = []
+        for name, samples in snapshot.items():
+            total, view, db, template, queries = (sorted(column) for column in zip(*samples))
+            rows.append(
+                {
+                    "view": name,
+                    "requests": totals[name],
+                    "window": len(samples),
+                    "p50_ms": percentile(total, 50),
+                    "p95_ms": percentile(total, 95),
+                    "p99_ms": percentile(total, 99),
+                    "max_ms": total[-1],
+                    "p95_view_ms": percentile(view, 95),
+                    "p95_db_ms": percentile(db, 95),
+                    "p95_template_ms": percentile(template, 95),
+                    "p50_queries": percentile(queries, 50),
+                    "p95_queries": percentile(queries, 95),
+                    "max_queries": queries[-1],
+                }
+            )
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+
+view_stats = ViewStats()
+
+
+def slow_request_ms():
+    return getattr(settings, "PERFORMANCE_SLOW_REQUEST_MS", 1000)
+
+
+def slow_request_queries():
+    return getattr(settings, "PERFORMANCE_SLOW_REQUEST_QUERIES", 50)
@@ -17,8 +17,9 @@ def sort_header(context, field, label):
     current_sort = context.get('current_sort')
     current_order = context.get('current_order', 'asc')
 
-    # Build new query params
+    # Build new query params; a cursor only applies to the sort it was made for
     params = request.GET.copy()
+    params.pop('cursor', None)
 
     # Determine new order
     if current_sort == field:
@@ -2,8 +2,11 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 import pytest
-from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from apps.courses.models import Course, CourseSignUp, Location
@@ -53,6 +56,41 @@ class ProjectSettingsModelTest(TestCase):
         self.assertEqual(settings.klasseforloeb_per_teacher_per_year, Decimal("1.5"))
         self.assertEqual(settings.students_per_klasseforloeb, Decimal("20.0"))
 
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_project_settings_get_is_cached_until_save(self):
+        """ProjectSettings.get() is served from the cache and refreshed by save()."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        ProjectSettings.get()
+        with self.assertNumQueries(0):
+            settings = ProjectSettings.get()
+        settings.students_per_klasseforloeb = Decimal("30.0")
+        settings.save()
+        self.assertEqual(ProjectSettings.get().students_per_klasseforloeb, Decimal("30.0"))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_project_settings_cache_expires_and_is_keyed_by_schema(self):
+        """Writes that skip save() show up after the timeout; the key changes with the model's fields."""
+        from unittest import mock
+
+        from django.db import models
+
+        from .models import PROJECT_SETTINGS_TIMEOUT
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with mock.patch("apps.core.models.cache.set", wraps=cache.set) as cache_set:
+            ProjectSettings.get()
+        self.assertEqual(cache_set.call_args.args[2], PROJECT_SETTINGS_TIMEOUT)
+
+        key = ProjectSettings.cache_key()
+        extra = models.BooleanField(default=False)
+        extra.set_attributes_from_name("extra_toggle")
+        with mock.patch.object(
+            ProjectSettings._meta, "concrete_fields", ProjectSettings._meta.concrete_fields + (extra,)
+        ):
+            self.assertNotEqual(ProjectSettings.cache_key(), key)
+
 
 class DashboardViewTest(TestCase):
     def setUp(self):
@@ -72,6 +110,29 @@ class DashboardViewTest(TestCase):
         self.assertTemplateUsed(response, "core/dashboard.html")
 
 
+class PermissionLookupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="signupadmin", password="testpass123", is_staff=True)
+        self.user.groups.add(Group.objects.get_or_create(name="Tilmeldingsadministrator")[0])
+
+    def test_group_names_loaded_once_per_user(self):
+        from .decorators import can_manage_signups, can_manage_users
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(can_manage_signups(user))
+            self.assertFalse(can_manage_users(user))
+            self.assertTrue(can_manage_signups(user))
+
+    def test_staff_page_queries_groups_once(self):
+        self.client.login(username="signupadmin", password="testpass123")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(response.status_code, 200)
+        group_queries = [q["sql"] for q in ctx.captured_queries if '"auth_group"' in q["sql"]]
+        self.assertEqual(len(group_queries), 1)
+
+
 @pytest.fixture
 def smoke_test_data(db, staff_user):
     """Create all necessary objects for smoke testing views."""
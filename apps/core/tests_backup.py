@@ -0,0 +1,353 @@
+import gzip
+import hashlib
+import io
+import json
+import shutil
+import sys
+import tarfile
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import boto3
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+
+from apps.core.backup_catalog import NAME_FORMAT, apply_retention, latest_backup_name, list_backups
+from apps.core.backup_compression import CompressedWriter, ZstdStreamCompressor, get_compressor, open_decompressed
+from apps.core.backup_db import FORMATS, detect_format, dump_command, pack_directory, unpack_directory
+from apps.core.backup_media import (
+    BLOB_DIRNAME,
+    MANIFEST_FILENAME,
+    backup_media_incremental,
+    collect_local_garbage,
+    restore_media_from_manifest,
+)
+from apps.core.backup_stream import (
+    BackupStreamError,
+    GzipStreamCompressor,
+    MultipartUploader,
+    stream_command,
+    stream_to_targets,
+)
+
+BUCKET = "test-backups"
+
+
+class S3TestMixin:
+    """Run each test against moto's in-memory S3."""
+
+    def setUp(self):
+        super().setUp()
+        self.mock = mock_aws()
+        self.mock.start()
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket=BUCKET)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        self.mock.stop()
+        super().tearDown()
+
+
+class BackupStreamTest(S3TestMixin, SimpleTestCase):
+    def test_stream_compresses_and_checksums(self):
+        data = b"INSERT INTO t VALUES (1);\n" * 50000
+        local_path = self.tmp_path / "database.sql.gz"
+        result = stream_to_targets(io.BytesIO(data), local_path, GzipStreamCompressor(), chunk_size=4096)
+
+        compressed = local_path.read_bytes()
+        self.assertEqual(gzip.decompress(compressed), data)
+        self.assertEqual(result.raw_bytes, len(data))
+        self.assertEqual(result.compressed_bytes, len(compressed))
+        self.assertEqual(result.sha256, hashlib.sha256(compressed).hexdigest())
+
+    def test_multipart_upload_matches_local_file(self):
+        # Incompressible data so the stream spans several 8 MiB parts
+        data = b"".join(hashlib.sha256(str(i).encode()).digest() for i in range(400_000))
+        local_path = self.tmp_path / "database.sql.gz"
+        uploader = MultipartUploader(self.s3, BUCKET, "backups/b/database.sql.gz")
+        result = stream_to_targets(io.BytesIO(data), local_path, GzipStreamCompressor(), uploader=uploader)
+        result.parts = uploader.complete()
+
+        self.assertGreater(result.parts, 1)
+        body = self.s3.get_object(Bucket=BUCKET, Key="backups/b/database.sql.gz")["Body"].read()
+        self.assertEqual(body, local_path.read_bytes())
+        self.assertEqual(gzip.decompress(body), data)
+
+    def test_stream_command_uploads_stdout(self):
+        cmd = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'dump\\n' * 1000)"]
+        uploader = MultipartUploader(self.s3, BUCKET, "backups/b/database.sql.gz")
+        result = stream_command(cmd, None, self.tmp_path / "database.sql.gz", uploader=uploader)
+
+        self.assertEqual(result.parts, 1)
+        body = self.s3.get_object(Bucket=BUCKET, Key="backups/b/database.sql.gz")["Body"].read()
+        self.assertEqual(gzip.decompress(body), b"dump\n" * 1000)
+
+    def test_failed_command_aborts_upload(self):
+        cmd = [sys.executable, "-c", "import sys; sys.stdout.write('partial'); sys.stderr.write('boom'); sys.exit(1)"]
+        uploader = MultipartUploader(self.s3, BUCKET, "backups/b/database.sql.gz")
+        with self.assertRaisesMessage(BackupStreamError, "boom"):
+            stream_command(cmd, None, self.tmp_path / "database.sql.gz", uploader=uploader)
+
+        self.assertNotIn("Contents", self.s3.list_objects_v2(Bucket=BUCKET))
+        self.assertNotIn("Uploads", self.s3.list_multipart_uploads(Bucket=BUCKET))
+
+
+class IncrementalMediaBackupTest(S3TestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = self.tmp_path / "media"
+        self.backups = self.tmp_path / "backups"
+        (self.media / "course_materials").mkdir(parents=True)
+        (self.media / "course_materials" / "a.pdf").write_bytes(b"a" * 1000)
+        (self.media / "school_files").mkdir()
+        (self.media / "school_files" / "b.txt").write_bytes(b"b" * 500)
+        # Same content under another path is stored once
+        (self.media / "school_files" / "copy.pdf").write_bytes(b"a" * 1000)
+
+    def _backup(self, name):
+        (self.backups / name).mkdir(parents=True)
+        return backup_media_incremental(self.media, self.backups, name, s3=self.s3, bucket=BUCKET)
+
+    def test_second_run_uploads_only_new_blobs(self):
+        first = self._backup("backup_1")
+        self.assertEqual((first["files"], first["blobs"], first["uploaded"]), (3, 2, 2))
+
+        (self.media / "school_files" / "new.txt").write_bytes(b"new")
+        second = self._backup("backup_2")
+        self.assertEqual((second["files"], second["hashed"], second["uploaded"]), (4, 1, 1))
+
+        manifest = json.loads(
+            self.s3.get_object(Bucket=BUCKET, Key=f"backups/backup_2/{MANIFEST_FILENAME}")["Body"].read()
+        )
+        self.assertEqual(manifest["files"]["school_files/new.txt"]["sha256"], hashlib.sha256(b"new").hexdigest())
+
+    def test_file_changed_after_scan_is_stored_under_its_copied_hash(self):
+        from apps.core import backup_media
+
+        scan = backup_media.scan_media
+
+        def scan_then_change(*args, **kwargs):
+            result = scan(*args, **kwargs)
+            (self.media / "school_files" / "b.txt").write_bytes(b"rewritten")
+            return result
+
+        with mock.patch.object(backup_media, "scan_media", side_effect=scan_then_change):
+            self._backup("backup_1")
+
+        stale = hashlib.sha256(b"b" * 500).hexdigest()
+        copied = hashlib.sha256(b"rewritten").hexdigest()
+        entry = json.loads((self.backups / "backup_1" / MANIFEST_FILENAME).read_text())["files"]["school_files/b.txt"]
+        self.assertEqual((entry["sha256"], entry["size"]), (copied, len(b"rewritten")))
+        self.assertEqual((self.backups / BLOB_DIRNAME / copied[:2] / copied).read_bytes(), b"rewritten")
+        self.assertFalse((self.backups / BLOB_DIRNAME / stale[:2] / stale).exists())
+        remote = backup_media.list_s3_blobs(self.s3, BUCKET)
+        self.assertIn(copied, remote)
+        self.assertNotIn(stale, remote)
+
+        # The next run rehashes the file instead of trusting the cached entry
+        self.assertEqual(self._backup("backup_2")["hashed"], 1)
+
+    def test_restore_point_in_time_from_s3(self):
+        self._backup("backup_1")
+        (self.media / "school_files" / "b.txt").write_bytes(b"changed")
+        (self.media / "course_materials" / "a.pdf").unlink()
+        self._backup("backup_2")
+
+        # Rebuild the first backup using only S3 (no local blob store)
+        shutil.rmtree(self.backups / BLOB_DIRNAME)
+        manifest = json.loads((self.backups / "backup_1" / MANIFEST_FILENAME).read_text())
+        target = self.tmp_path / "restored"
+        count = restore_media_from_manifest(manifest, target, self.backups, s3=self.s3, bucket=BUCKET)
+
+        self.assertEqual(count, 3)
+        self.assertEqual((target / "school_files" / "b.txt").read_bytes(), b"b" * 500)
+        self.assertEqual((target / "course_materials" / "a.pdf").read_bytes(), b"a" * 1000)
+
+    def test_local_garbage_collection_keeps_referenced_blobs(self):
+        self._backup("backup_1")
+        (self.media / "school_files" / "b.txt").unlink()
+        self._backup("backup_2")
+        shutil.rmtree(self.backups / "backup_1")
+
+        self.assertEqual(collect_local_garbage(self.backups), 1)
+        manifest = json.loads((self.backups / "backup_2" / MANIFEST_FILENAME).read_text())
+        target = self.tmp_path / "restored"
+        restore_media_from_manifest(manifest, target, self.backups)
+        self.assertEqual(sorted(p.name for p in target.rglob("*") if p.is_file()), ["a.pdf", "copy.pdf"])
+
+
+class BackupDbFormatTest(SimpleTestCase):
+    db_config = {"HOST": "db", "PORT": 5432, "USER": "basal", "NAME": "basal"}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_legacy_backup_without_manifest_format_is_plain(self):
+        (self.tmp_path / "database.sql.gz").write_bytes(b"")
+        self.assertEqual(detect_format(self.tmp_path, {"files": {}}), ("plain", self.tmp_path / "database.sql.gz"))
+
+    def test_format_is_read_from_manifest(self):
+        manifest = {"database": {"format": "directory", "file": FORMATS["directory"], "jobs": 4}}
+        self.assertEqual(detect_format(self.tmp_path, manifest), ("directory", self.tmp_path / "database.dir.tar"))
+
+    def test_zstd_plain_dump_is_detected(self):
+        (self.tmp_path / "database.sql.zst").write_bytes(b"")
+        self.assertEqual(detect_format(self.tmp_path), ("plain", self.tmp_path / "database.sql.zst"))
+
+    def test_format_falls_back_to_present_file(self):
+        (self.tmp_path / "database.dump").write_bytes(b"")
+        self.assertEqual(detect_format(self.tmp_path), ("custom", self.tmp_path / "database.dump"))
+
+    def test_dump_command_flags(self):
+        self.assertNotIn("-F", " ".join(dump_command(self.db_config, "plain")))
+        self.assertIn("-Fc", dump_command(self.db_config, "custom"))
+        cmd = dump_command(self.db_config, "directory", jobs=4, target="/tmp/dump")
+        self.assertEqual(cmd[cmd.index("--jobs") + 1], "4")
+        self.assertEqual(cmd[-2:], ["-f", "/tmp/dump"])
+
+    def test_directory_dump_round_trips_through_tar(self):
+        dump_dir = self.tmp_path / "dump"
+        dump_dir.mkdir()
+        (dump_dir / "toc.dat").write_bytes(b"toc")
+        (dump_dir / "3001.dat.gz").write_bytes(b"data")
+        pack_directory(dump_dir, self.tmp_path / FORMATS["directory"])
+
+        restored = unpack_directory(self.tmp_path / FORMATS["directory"], self.tmp_path / "extract")
+        self.assertEqual(sorted(p.name for p in restored.iterdir()), ["3001.dat.gz", "toc.dat"])
+
+
+class BackupCompressionTest(SimpleTestCase):
+    data = b"".join(b"INSERT INTO t VALUES (%d, 'row');\n" % i for i in range(100_000))
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_zstd_stream_round_trip(self):
+        local_path = self.tmp_path / "database.sql.zst"
+        result = stream_to_targets(io.BytesIO(self.data), local_path, get_compressor("zstd"), chunk_size=4096)
+
+        self.assertLess(result.compressed_bytes, len(self.data) // 5)
+        with open_decompressed(local_path) as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_media_tar_through_compressed_writer(self):
+        (self.tmp_path / "media").mkdir()
+        (self.tmp_path / "media" / "a.txt").write_bytes(b"hello")
+        tar_path = self.tmp_path / "media.tar.zst"
+        with open(tar_path, "wb") as out:
+            writer = CompressedWriter(out, ZstdStreamCompressor())
+            with tarfile.open(fileobj=writer, mode="w|") as tar:
+                tar.add(self.tmp_path / "media", arcname="media")
+            writer.close()
+
+        with open_decompressed(tar_path) as f, tarfile.open(fileobj=f, mode="r|") as tar:
+            tar.extractall(self.tmp_path / "out", filter="data")
+        self.assertEqual((self.tmp_path / "out" / "media" / "a.txt").read_bytes(), b"hello")
+
+    def test_benchmark_command_reports_each_codec(self):
+        sample = self.tmp_path / "sample.sql"
+        sample.write_bytes(self.data)
+        out = io.StringIO()
+        call_command(
+            "backup_compression_benchmark", "--file", str(sample), "--codec", "gzip:1", "--codec", "zstd:3", stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn("gzip:1", output)
+        self.assertIn("zstd:3", output)
+
+
+@override_settings(
+    S3_ACCESS_KEY="test",
+    S3_SECRET_KEY="test",
+    S3_BUCKET_NAME=BUCKET,
+    S3_ENDPOINT="https://s3.us-east-1.amazonaws.com",
+)
+class BackupCatalogTest(S3TestMixin, SimpleTestCase):
+    now = datetime(2026, 3, 1, 12, 0)
+
+    def _put(self, key, body=b"x"):
+        self.s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+    def _put_backup(self, name, blobs=(), extra_files=0):
+        self._put(f"backups/{name}/database.sql.gz")
+        self._put(f"backups/{name}/manifest.json", b"{}")
+        manifest = {"files": {f"f{i}": {"sha256": sha, "size": 1, "mtime": 0} for i, sha in enumerate(blobs)}}
+        self._put(f"backups/{name}/{MANIFEST_FILENAME}", json.dumps(manifest).encode())
+        for i in range(extra_files):
+            self._put(f"backups/{name}/part-{i:04d}")
+
+    def test_list_backups_groups_objects_across_pages(self):
+        self._put_backup("backup_20260101_010000", extra_files=1001)
+        self._put_backup("backup_20260201_010000")
+        self._put(f"backups/{BLOB_DIRNAME}/aa/aa11")
+
+        backups = list_backups(self.s3, BUCKET)
+
+        self.assertEqual([b.name for b in backups], ["backup_20260201_010000", "backup_20260101_010000"])
+        self.assertEqual(len(backups[1].keys), 1004)
+        self.assertEqual(latest_backup_name(self.s3, BUCKET), "backup_20260201_010000")
+
+    def test_retention_deletes_whole_backups_in_batches(self):
+        self._put_backup("backup_20260101_010000", extra_files=1001)
+        self._put_backup("backup_20260215_010000")
+
+        with mock.patch.object(self.s3, "delete_objects", wraps=self.s3.delete_objects) as delete_objects:
+            result = apply_retention(self.s3, BUCKET, retention_days=30, now=self.now)
+
+        self.assertEqual(result["expired"], ["backup_20260101_010000"])
+        self.assertEqual(result["deleted_objects"], 1004)
+        self.assertEqual(delete_objects.call_count, 2)
+        self.assertEqual([b.name for b in list_backups(self.s3, BUCKET)], ["backup_20260215_010000"])
+
+    def test_newest_backup_is_always_retained(self):
+        self._put_backup("backup_20250101_010000")
+        result = apply_retention(self.s3, BUCKET, retention_days=30, now=self.now)
+        self.assertEqual((result["retained"], result["expired"]), (["backup_20250101_010000"], []))
+
+    def test_unreferenced_blobs_are_collected(self):
+        # Blobs are uploaded "now", so evaluate retention past their grace period
+        now = datetime.now() + timedelta(days=2)
+        old_name = (now - timedelta(days=60)).strftime(NAME_FORMAT)
+        new_name = (now - timedelta(days=1)).strftime(NAME_FORMAT)
+        self._put_backup(old_name, blobs=["aa11", "bb22"])
+        self._put_backup(new_name, blobs=["bb22"])
+        for sha in ("aa11", "bb22"):
+            self._put(f"backups/{BLOB_DIRNAME}/{sha[:2]}/{sha}")
+
+        result = apply_retention(self.s3, BUCKET, retention_days=30, now=now)
+        self.assertEqual(result["expired"], [old_name])
+        self.assertEqual(result["deleted_blobs"], 1)
+        blobs = [
+            obj["Key"] for obj in self.s3.list_objects_v2(Bucket=BUCKET, Prefix="backups/media-blobs/")["Contents"]
+        ]
+        self.assertEqual(blobs, [f"backups/{BLOB_DIRNAME}/bb/bb22"])
+
+    def test_recent_unreferenced_blobs_are_kept(self):
+        # A backup still uploading has blobs but no media manifest yet
+        self._put_backup(datetime.now().strftime(NAME_FORMAT))
+        self._put(f"backups/{BLOB_DIRNAME}/cc/cc33")
+        result = apply_retention(self.s3, BUCKET, retention_days=30)
+        self.assertEqual(result["deleted_blobs"], 0)
+
+    def test_list_backups_command_latest(self):
+        self._put_backup("backup_20260101_010000")
+        self._put_backup("backup_20260201_010000")
+        with mock.patch("apps.core.management.commands.list_backups.get_s3_client", return_value=self.s3):
+            out = io.StringIO()
+            call_command("list_backups", "--latest", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "backup_20260201_010000")
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.jobs import claim_next_job, enqueue, reap_stale_jobs, run_job
+from apps.core.models import Job, JobStatus
+
+
+class JobQueueTest(TestCase):
+    def test_enqueue_reuses_active_job_of_same_kind(self):
+        job, created = enqueue("backup")
+        again, created_again = enqueue("backup")
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+        # Other kinds are independent
+        _, created_other = enqueue("send_reminders")
+        self.assertTrue(created_other)
+
+    def test_enqueue_after_finished_job_creates_new(self):
+        job, _ = enqueue("backup")
+        Job.objects.filter(pk=job.pk).update(status=JobStatus.SUCCEEDED)
+
+        new_job, created = enqueue("backup")
+        self.assertTrue(created)
+        self.assertNotEqual(new_job.pk, job.pk)
+
+    def test_claim_marks_oldest_queued_job_running(self):
+        first, _ = enqueue("send_reminders")
+        enqueue("process_webhooks")
+
+        claimed = claim_next_job("test-worker")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, JobStatus.RUNNING)
+        self.assertEqual(claimed.worker, "test-worker")
+
+        # A running job still blocks a new one of the same kind
+        self.assertFalse(enqueue("send_reminders")[1])
+
+    def test_run_job_records_output(self):
+        enqueue("process_webhooks")
+        job = run_job(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertIn("Behandlede 0", job.log)
+        self.assertTrue(job.progress)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_run_job_records_failure(self):
+        enqueue("backup")
+        with mock.patch("apps.core.jobs.call_command", side_effect=RuntimeError("disk full")):
+            job = run_job(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.error, "disk full")
+
+    def test_stale_running_job_is_failed(self):
+        enqueue("backup")
+        job = claim_next_job()
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(reap_stale_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, JobStatus.FAILED)
+        self.assertTrue(enqueue("backup")[1])
+
+    def test_run_jobs_once_drains_queue(self):
+        enqueue("process_webhooks")
+        out = StringIO()
+        call_command("run_jobs", "--once", stdout=out)
+
+        self.assertEqual(Job.objects.get().status, JobStatus.SUCCEEDED)
+        self.assertIn("Finished process_webhooks", out.getvalue())
+
+
+@override_settings(CRON_SECRET="secret")
+class CronJobViewTest(TestCase):
+    auth = {"HTTP_AUTHORIZATION": "Bearer secret"}
+
+    def test_requires_token(self):
+        response = self.client.get(reverse("cron-backup"))
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Job.objects.exists())
+
+    def test_enqueues_and_returns_202(self):
+        response = self.client.get(reverse("cron-backup"), **self.auth)
+
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.status, job.triggered_by), ("backup", JobStatus.QUEUED, "cron"))
+        self.assertEqual(response.json()["job_id"], job.pk)
+        self.assertTrue(response.json()["status_url"].endswith(reverse("cron-job-status", args=[job.pk])))
+
+        # A second trigger while the backup is pending does not start another
+        response = self.client.get(reverse("cron-backup"), **self.auth)
+        self.assertFalse(response.json()["created"])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_status_view(self):
+        job, _ = enqueue("send_reminders")
+        response = self.client.get(reverse("cron-job-status", args=[job.pk]), **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "queued")
+        self.assertEqual(self.client.get(reverse("cron-job-status", args=[job.pk])).status_code, 401)
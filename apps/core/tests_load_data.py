@@ -0,0 +1,87 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.audit.models import ActivityLog
+from apps.courses.models import CourseSignUp
+from apps.emails.directory import find_entries
+from apps.schools.models import Person, School
+
+
+class GenerateLoadDataTest(TestCase):
+    def generate(self, **options):
+        call_command("generate_load_data", stdout=StringIO(), **options)
+
+    def test_creates_requested_row_counts(self):
+        models = (School, CourseSignUp, ActivityLog)
+        existing = {model: set(model.objects.values_list("pk", flat=True)) for model in models}
+        self.generate(schools=50, signups=120, audit_rows=200)
+        created = {model: model.objects.exclude(pk__in=existing[model]) for model in models}
+
+        self.assertEqual(created[School].count(), 50)
+        self.assertEqual(created[CourseSignUp].count(), 120)
+        self.assertEqual(created[ActivityLog].count(), 200)
+        self.assertTrue(Person.objects.filter(school__in=created[School], is_koordinator=True).exists())
+        self.assertFalse(created[School].filter(signup_token="").exists())
+        # Timestamps are spread out instead of all being "now"
+        self.assertGreater(created[ActivityLog].values("timestamp").distinct().count(), 100)
+
+    def test_generated_addresses_are_in_the_email_directory(self):
+        self.generate(schools=5, signups=5, audit_rows=0)
+
+        person = Person.objects.filter(email__endswith="@load.example.dk").first()
+        signup = CourseSignUp.objects.filter(participant_email__endswith="@load.example.dk").first()
+        self.assertTrue(find_entries(person.email))
+        self.assertTrue(find_entries(signup.participant_email))
+
+    def test_same_seed_gives_same_data(self):
+        def snapshot():
+            return list(
+                School.objects.order_by("name").values_list("name", "kommune__name", "enrolled_at", "signup_token")
+            )
+
+        self.generate(schools=30, signups=10, audit_rows=0, seed=7)
+        first = snapshot()
+        CourseSignUp.objects.all().delete()
+        School.objects.all().delete()
+        self.generate(schools=30, signups=10, audit_rows=0, seed=7)
+
+        self.assertEqual(snapshot(), first)
+
+    def test_refuses_to_run_twice(self):
+        self.generate(schools=5, signups=5, audit_rows=0)
+        with self.assertRaises(CommandError):
+            self.generate(schools=5, signups=5, audit_rows=0)
+
+
+class BenchmarkViewsTest(TestCase):
+    def test_writes_results_and_compares(self):
+        call_command("generate_load_data", schools=20, signups=40, audit_rows=20, stdout=StringIO())
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        first, second = Path(tmp.name) / "first.json", Path(tmp.name) / "second.json"
+
+        call_command("benchmark_views", repeat=1, output=str(first), stdout=StringIO())
+        out = StringIO()
+        call_command(
+            "benchmark_views",
+            repeat=1,
+            only=["school-list", "public-signup"],
+            output=str(second),
+            compare=str(first),
+            stdout=out,
+        )
+
+        report = json.loads(first.read_text())
+        self.assertEqual(report["rows"]["schools"], 20)
+        for name, result in report["results"].items():
+            self.assertEqual(result["status"], 200, name)
+            self.assertGreater(result["queries"], 0, name)
+        self.assertIn("bulk-email-dry-run", report["results"])
+        self.assertEqual(set(json.loads(second.read_text())["results"]), {"school-list", "public-signup"})
+        self.assertIn("% vs", out.getvalue())
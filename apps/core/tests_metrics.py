@@ -0,0 +1,126 @@
+import fcntl
+import json
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.core import metrics
+from apps.core.jobs import enqueue
+from apps.emails.models import EmailLog, EmailType, WebhookEvent
+
+User = get_user_model()
+
+
+def _record_in_child_process():
+    metrics.registry = metrics.Registry()
+    metrics.registry.inc("basal_backups_total", 3, result="success")
+    metrics.flush()
+
+
+class IsolatedMetricsMixin:
+    """Fresh registry and an empty METRICS_DIR for each test."""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        settings_override = override_settings(METRICS_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(setattr, metrics, "registry", metrics.registry)
+        metrics.registry = metrics.Registry()
+
+
+class MetricsStoreTest(IsolatedMetricsMixin, TestCase):
+    def test_merge_sums_counters_and_histograms(self):
+        first, second = metrics.Registry(), metrics.Registry()
+        first.inc("basal_backups_total", result="success")
+        second.inc("basal_backups_total", 2, result="success")
+        first.observe("basal_http_request_queries", 3, view="a")
+        second.observe("basal_http_request_queries", 300, view="a")
+
+        body = metrics.render(metrics.merge([first.snapshot(), second.snapshot()]))
+
+        self.assertIn('basal_backups_total{result="success"} 3', body)
+        self.assertIn('basal_http_request_queries_bucket{le="5",view="a"} 1', body)
+        self.assertIn('basal_http_request_queries_bucket{le="+Inf",view="a"} 2', body)
+        self.assertIn('basal_http_request_queries_sum{view="a"} 303', body)
+        self.assertIn("# TYPE basal_http_request_queries histogram", body)
+
+    def test_collect_includes_exited_processes_and_archives_them(self):
+        metrics.registry.inc("basal_backups_total", result="success")
+        process = multiprocessing.get_context("fork").Process(target=_record_in_child_process)
+        process.start()
+        process.join()
+
+        snapshot = metrics.collect()
+
+        self.assertEqual(snapshot["counters"], [["basal_backups_total", {"result": "success"}, 4]])
+        self.assertTrue((self.dir / metrics.ARCHIVE_FILENAME).exists())
+        # Only this process's file is left next to the archive
+        self.assertEqual(len(list(self.dir.glob("process-*.json"))), 1)
+
+        # Archived values are not counted twice on the next scrape
+        self.assertEqual(metrics.collect()["counters"][0][2], 4)
+
+    def test_live_process_file_is_not_archived(self):
+        (self.dir / "process-1-live.json").write_text(
+            json.dumps({"counters": [["basal_backups_total", {"result": "failure"}, 1]]})
+        )
+        with open(self.dir / "process-1-live.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            snapshot = metrics.collect()
+
+        self.assertEqual(snapshot["counters"], [["basal_backups_total", {"result": "failure"}, 1]])
+        self.assertTrue((self.dir / "process-1-live.json").exists())
+        self.assertFalse((self.dir / metrics.ARCHIVE_FILENAME).exists())
+
+    def test_record_backup_sets_gauges(self):
+        metrics.record_backup(success=True, seconds=12.5, size=2048)
+
+        body = metrics.render(metrics.collect())
+        self.assertIn("basal_backup_last_duration_seconds 12.5", body)
+        self.assertIn("basal_backup_last_size_bytes 2048", body)
+
+
+@override_settings(CRON_SECRET="secret")
+class MetricsViewTest(IsolatedMetricsMixin, TestCase):
+    auth = {"HTTP_AUTHORIZATION": "Bearer secret"}
+
+    def test_requires_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+
+    def test_exports_request_email_and_queue_metrics(self):
+        User.objects.create_user(username="staff", password="testpass123", is_staff=True)
+        self.client.login(username="staff", password="testpass123")
+        self.client.get(reverse("core:about"))
+        self.client.logout()
+
+        EmailLog.objects.create(email_type=EmailType.COURSE_REMINDER, recipient_email="a@x.dk", subject="s")
+        EmailLog.objects.create(
+            email_type=EmailType.COURSE_REMINDER,
+            recipient_email="b@x.dk",
+            subject="s",
+            success=False,
+            error_message="[BLOCKED] Domain not in EMAIL_ALLOWED_DOMAINS: []",
+        )
+        WebhookEvent.objects.create(svix_id="msg_1", event_type="email.bounced")
+        enqueue("backup")
+
+        response = self.client.get(reverse("metrics"), **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn('basal_http_request_duration_seconds_count{view="core:about"} 1', body)
+        self.assertIn('basal_http_responses_total{status="200",view="core:about"} 1', body)
+        self.assertIn('basal_emails_total{status="sent",type="course_reminder"} 1', body)
+        self.assertIn('basal_emails_total{status="blocked",type="course_reminder"} 1', body)
+        self.assertIn('basal_emails_total{status="failed",type="course_reminder"} 0', body)
+        self.assertIn("basal_webhook_events_pending 1", body)
+        self.assertIn('basal_jobs{kind="backup",status="queued"} 1', body)
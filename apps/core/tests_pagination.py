@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+from django.views.generic import ListView
+
+from apps.core.mixins import SortableMixin
+from apps.courses.models import Course, Location
+
+
+class CourseCursorListView(SortableMixin, ListView):
+    model = Course
+    paginate_by = 2
+    sortable_fields = {"date": "start_date", "location": "location__name"}
+    default_sort = "date"
+    default_order = "desc"
+    cursor_pagination = True
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        aarhus = Location.objects.create(name="Aarhus")
+        odense = Location.objects.create(name="Odense")
+        # Repeated dates and locations, and courses without a location, so pk has to break ties
+        for days, location in [(0, aarhus), (0, odense), (0, None), (7, aarhus), (7, None), (14, odense), (21, aarhus)]:
+            Course.objects.create(
+                start_date=today + timedelta(days=days),
+                end_date=today + timedelta(days=days),
+                location=location,
+                capacity=10,
+            )
+
+    def _page(self, **params):
+        request = RequestFactory().get("/", params)
+        request.user = AnonymousUser()
+        view = CourseCursorListView()
+        view.setup(request)
+        view.object_list = view.get_queryset()
+        return view.get_context_data()["page_obj"]
+
+    def _walk(self, sort, order):
+        page = self._page(sort=sort, order=order)
+        pages = [[course.pk for course in page]]
+        while page.has_next():
+            page = self._page(sort=sort, order=order, cursor=page.next_cursor)
+            pages.append([course.pk for course in page])
+        return pages, page
+
+    def _expected(self, key, descending):
+        courses = list(Course.objects.select_related("location"))
+        present = sorted((c for c in courses if key(c) is not None), key=lambda c: (key(c), c.pk), reverse=descending)
+        missing = sorted((c for c in courses if key(c) is None), key=lambda c: c.pk, reverse=descending)
+        return [c.pk for c in present + missing]
+
+    def test_pages_follow_sort_with_pk_tiebreaker_and_nulls_last(self):
+        cases = [
+            ("date", "desc", lambda c: c.start_date),
+            ("date", "asc", lambda c: c.start_date),
+            ("location", "asc", lambda c: c.location.name if c.location else None),
+            ("location", "desc", lambda c: c.location.name if c.location else None),
+        ]
+        for sort, order, key in cases:
+            with self.subTest(sort=sort, order=order):
+                pages, _ = self._walk(sort, order)
+                self.assertEqual(sum(pages, []), self._expected(key, order == "desc"))
+                self.assertTrue(all(len(page) == 2 for page in pages[:-1]))
+
+    def test_previous_cursor_returns_the_same_pages(self):
+        for sort in ("date", "location"):
+            with self.subTest(sort=sort):
+                forward, page = self._walk(sort, "asc")
+                backward = [[course.pk for course in page]]
+                while page.has_previous():
+                    page = self._page(sort=sort, order="asc", cursor=page.previous_cursor)
+                    backward.insert(0, [course.pk for course in page])
+                self.assertEqual(backward, forward)
+
+    def test_count_is_capped(self):
+        page = self._page()
+        self.assertEqual((page.count, page.count_capped), (7, False))
+        CourseCursorListView.count_cap = 5
+        self.addCleanup(setattr, CourseCursorListView, "count_cap", 1000)
+        page = self._page()
+        self.assertEqual((page.count, page.count_capped), (5, True))
+
+    def test_cursor_from_another_sort_or_tampered_starts_over(self):
+        first = [course.pk for course in self._page(sort="date", order="desc")]
+        cursor = self._page(sort="location", order="asc").next_cursor
+        self.assertEqual([course.pk for course in self._page(sort="date", order="desc", cursor=cursor)], first)
+        self.assertEqual([course.pk for course in self._page(sort="date", order="desc", cursor=cursor + "x")], first)
+
+    def test_sort_header_drops_cursor(self):
+        request = RequestFactory().get("/", {"sort": "date", "order": "desc", "cursor": "abc", "search": "x"})
+        html = Template("{% load sorting_tags %}{% sort_header 'location' 'Sted' %}").render(
+            Context({"request": request, "current_sort": "date", "current_order": "desc"})
+        )
+        self.assertIn("search=x", html)
+        self.assertNotIn("cursor", html)
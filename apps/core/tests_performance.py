@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.core.performance import RequestMetrics, ViewStats, percentile, view_stats
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        view_stats.clear()
+        self.staff = User.objects.create_user(username="staff", password="testpass123", is_staff=True)
+
+    def test_server_timing_header_for_staff(self):
+        self.client.login(username="staff", password="testpass123")
+        response = self.client.get(reverse("core:about"))
+
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "view;dur=", "total;dur="):
+            self.assertIn(metric, header)
+
+    def test_no_server_timing_header_for_anonymous(self):
+        response = self.client.get(reverse("login"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.login(username="staff", password="testpass123")
+        self.client.get(reverse("core:about"))
+        self.client.get(reverse("core:about"))
+
+        row = next(row for row in view_stats.summary() if row["view"] == "core:about")
+        self.assertEqual(row["requests"], 2)
+        self.assertGreater(row["p95_queries"], 0)
+        self.assertGreater(row["p95_template_ms"], 0)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_QUERIES=1)
+    def test_slow_request_is_logged_with_queries(self):
+        self.client.login(username="staff", password="testpass123")
+        with self.assertLogs("apps.core.middleware", level="WARNING") as logs:
+            self.client.get(reverse("core:about"))
+
+        self.assertIn("core:about", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_performance_page_is_staff_only(self):
+        response = self.client.get(reverse("core:performance"))
+        self.assertEqual(response.status_code, 302)
+
+        self.client.login(username="staff", password="testpass123")
+        self.client.get(reverse("core:about"))
+        response = self.client.get(reverse("core:performance"))
+        self.assertContains(response, "core:about")
+
+
+class ViewStatsTest(TestCase):
+    def test_percentiles_over_rolling_window(self):
+        stats = ViewStats(window_size=100)
+        for ms in range(1, 201):
+            stats.add("view", RequestMetrics(total_ms=ms, queries=ms % 10))
+
+        row = stats.summary()[0]
+        self.assertEqual(row["requests"], 200)
+        self.assertEqual(row["window"], 100)
+        # Only the latest 100 samples (101..200) are kept
+        self.assertEqual(row["p50_ms"], 150)
+        self.assertEqual(row["p95_ms"], 195)
+        self.assertEqual(row["max_ms"], 200)
+
+    def test_percentile_edge_cases(self):
+        self.assertEqual(percentile([], 95), 0)
+        self.assertEqual(percentile([7], 50), 7)
+        self.assertEqual(percentile([1, 2, 3, 4], 100), 4)
+
+    def test_slowest_queries_are_kept(self):
+        metrics = RequestMetrics()
+        for duration in [3, 9, 1, 7, 5, 8, 2]:
+            metrics.record_query(f"q{duration}", duration)
+
+        self.assertEqual(metrics.queries, 7)
+        self.assertEqual([sql for _, sql in metrics.slowest], ["q9", "q8", "q7", "q5", "q3"])
@@ -0,0 +1,350 @@
+"""
+Query budget for every view.
+
+Each named URL is requested against a generated dataset at two sizes. The
+number of queries must not grow when rows are added (an N+1 pattern shows up
+as a count that scales with the data) and must stay within the view's budget.
+Failures are collected into one report listing the repeated SQL of each
+offending view.
+
+New URLs must be added to URL_KWARGS (if they take arguments) or to SKIPPED,
+so nothing is left out by accident.
+"""
+
+import re
+import shutil
+import tempfile
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from apps.bulk_email.models import BulkEmail, BulkEmailAttachment, BulkEmailRecipient
+from apps.courses.models import Course, CourseMaterial, CourseSignUp, Instructor, Location
+from apps.schools.models import Kommune, Person, School, SchoolComment, SchoolFile
+from apps.webinars.models import Webinar, WebinarSignUp
+
+SMALL = 2
+LARGE = 8
+DEFAULT_BUDGET = 25
+
+# Views that legitimately need more than DEFAULT_BUDGET queries (still constant in the row count)
+BUDGETS = {
+    "goals:project-goals": 30,
+}
+
+# Views whose query count still grows with the data. Remove an entry once the
+# view is fixed; the test fails if a listed view has become constant.
+KNOWN_N_PLUS_ONE = {
+    "core:dashboard": "Course.location and School.kommune per row",
+    "schools:list": "School.kommune and school-year lookups per row",
+    "schools:kommune-detail": "school-year lookup per school",
+    "schools:export": "School.kommune and school-year lookups per row",
+    "schools:autocomplete": "School.kommune per result",
+    "courses:signup-list": "Course.location per signup",
+    "courses:signup-update": "Course.location per course choice",
+    "courses:signup-export": "Course.location per signup",
+    "webinars:list": "Webinar.signup_count per row",
+    "accounts:user-list": "groups per user",
+    "bulk_email:list": "sent_by per campaign",
+}
+
+# Namespaces and URL names that are not rendered here, with the reason
+SKIPPED_NAMESPACES = {
+    "admin": "Django admin",
+    "djdt": "debug toolbar",
+}
+SKIPPED = {
+    "cron-send-reminders": "CRON_SECRET endpoint, queues a job",
+    "cron-backup": "CRON_SECRET endpoint, queues a job",
+    "cron-process-webhooks": "CRON_SECRET endpoint, queues a job",
+    "cron-job-status": "CRON_SECRET endpoint",
+    "metrics": "CRON_SECRET endpoint",
+    "resend-webhook": "signed POST from Resend",
+    "logout": "POST only, ends the session",
+    "bulk_email:send": "POST only, sends email",
+    "schools:delete-enrollment-history": "POST only",
+    "django_summernote-editor": "third-party rich text editor",
+    "django_summernote-upload_attachment": "third-party rich text editor",
+}
+
+# Arguments for URLs that take them, built from the dataset
+URL_KWARGS = {
+    "school-public": lambda d: {"token": d.school.signup_token},
+    "school-public-person-create": lambda d: {"token": d.school.signup_token},
+    "school-public-person-update": lambda d: {"token": d.school.signup_token, "pk": d.person.pk},
+    "school-public-person-delete": lambda d: {"token": d.school.signup_token, "pk": d.person.pk},
+    "school-public-signup-update": lambda d: {"token": d.school.signup_token, "pk": d.signup.pk},
+    "school-public-billing-update": lambda d: {"token": d.school.signup_token},
+    "accounts:user-detail": lambda d: {"pk": d.user.pk},
+    "accounts:user-update": lambda d: {"pk": d.user.pk},
+    "accounts:user-toggle-active": lambda d: {"pk": d.user.pk},
+    "accounts:user-reset-password": lambda d: {"pk": d.user.pk},
+    "audit:school_activity": lambda d: {"school_id": d.school.pk},
+    "audit:school_timeline": lambda d: {"school_id": d.school.pk},
+    "audit:course_activity": lambda d: {"course_id": d.course.pk},
+    "bulk_email:detail": lambda d: {"pk": d.campaign.pk},
+    "bulk_email:recipients": lambda d: {"pk": d.campaign.pk},
+    "bulk_email:attachment_download": lambda d: {"pk": d.attachment.pk},
+    "bulk_email:delete": lambda d: {"pk": d.campaign.pk},
+    "bulk_email:resend": lambda d: {"recipient_pk": d.recipient.pk},
+    "courses:detail": lambda d: {"pk": d.course.pk},
+    "courses:update": lambda d: {"pk": d.course.pk},
+    "courses:delete": lambda d: {"pk": d.course.pk},
+    "courses:rollcall": lambda d: {"pk": d.course.pk},
+    "courses:bulk-import": lambda d: {"pk": d.course.pk},
+    "courses:bulk-import-confirm": lambda d: {"pk": d.course.pk},
+    "courses:bulk-mark-attendance": lambda d: {"pk": d.course.pk},
+    "courses:bulk-delete-signups": lambda d: {"pk": d.course.pk},
+    "courses:signup-create": lambda d: {"course_pk": d.course.pk},
+    "courses:signup-update": lambda d: {"pk": d.signup.pk},
+    "courses:mark-attendance": lambda d: {"pk": d.signup.pk},
+    "courses:signup-delete": lambda d: {"pk": d.signup.pk},
+    "courses:material-create": lambda d: {"course_pk": d.course.pk},
+    "courses:material-edit": lambda d: {"pk": d.material.pk},
+    "courses:material-delete": lambda d: {"pk": d.material.pk},
+    "schools:kommune-detail": lambda d: {"kommune": d.school.kommune.name},
+    "schools:detail": lambda d: {"pk": d.school.pk},
+    "schools:section-people": lambda d: {"pk": d.school.pk},
+    "schools:section-participants": lambda d: {"pk": d.school.pk},
+    "schools:section-consumption": lambda d: {"pk": d.school.pk},
+    "schools:section-comments": lambda d: {"pk": d.school.pk},
+    "schools:section-files": lambda d: {"pk": d.school.pk},
+    "schools:section-activity": lambda d: {"pk": d.school.pk},
+    "schools:section-enrollment-history": lambda d: {"pk": d.school.pk},
+    "schools:update": lambda d: {"pk": d.school.pk},
+    "schools:delete": lambda d: {"pk": d.school.pk},
+    "schools:hard-delete": lambda d: {"pk": d.school.pk},
+    "schools:regenerate-credentials": lambda d: {"pk": d.school.pk},
+    "schools:toggle-enrollment": lambda d: {"pk": d.school.pk},
+    "schools:toggle-do-not-contact": lambda d: {"pk": d.school.pk},
+    "schools:edit-enrollment-dates": lambda d: {"pk": d.school.pk},
+    "schools:clear-enrollment": lambda d: {"pk": d.school.pk},
+    "schools:edit-opted-out-date": lambda d: {"pk": d.school.pk},
+    "schools:person-create": lambda d: {"school_pk": d.school.pk},
+    "schools:person-update": lambda d: {"pk": d.person.pk},
+    "schools:person-delete": lambda d: {"pk": d.person.pk},
+    "schools:signup-update": lambda d: {"school_pk": d.school.pk, "pk": d.signup.pk},
+    "schools:signup-delete": lambda d: {"school_pk": d.school.pk, "pk": d.signup.pk},
+    "schools:comment-create": lambda d: {"school_pk": d.school.pk},
+    "schools:comment-edit": lambda d: {"pk": d.comment.pk},
+    "schools:comment-delete": lambda d: {"pk": d.comment.pk},
+    "schools:file-create": lambda d: {"school_pk": d.school.pk},
+    "schools:file-edit": lambda d: {"pk": d.file.pk},
+    "schools:file-delete": lambda d: {"pk": d.file.pk},
+    "webinars:manage-detail": lambda d: {"pk": d.webinar.pk},
+    "webinars:update": lambda d: {"pk": d.webinar.pk},
+    "webinars:delete": lambda d: {"pk": d.webinar.pk},
+    "webinars:signup-delete": lambda d: {"pk": d.webinar_signup.pk},
+    "webinar:detail": lambda d: {"slug": d.webinar.slug},
+    "webinar:detail-success": lambda d: {"slug": d.webinar.slug},
+}
+
+# Query strings for views that need them to do their work
+URL_QUERY = {
+    "signup:check-school-seats": lambda d: {"school_id": d.school.pk},
+    "signup:check-course-seats": lambda d: {"course_id": d.course.pk},
+    "signup:schools-by-kommune": lambda d: {"kommune": d.school.kommune.name},
+    "schools:list": lambda d: {"q": "Skole"},
+    "schools:autocomplete": lambda d: {"q": "Skole"},
+}
+
+
+def iter_url_names(patterns=None, namespace=None):
+    """Yield (name, takes_arguments) for every named URL pattern."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            inner = pattern.namespace or namespace
+            if inner in SKIPPED_NAMESPACES:
+                continue
+            if pattern.namespace and namespace:
+                inner = f"{namespace}:{pattern.namespace}"
+            yield from iter_url_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+            yield name, bool(pattern.pattern.regex.groupindex)
+
+
+def normalize_sql(sql):
+    """SQL with literals replaced, so the same query for different rows compares equal."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(\.\d+)?\b", "?", sql)
+    return re.sub(r"IN \([?, ]+\)", "IN (...)", sql)
+
+
+def repeated_queries(queries):
+    counts = Counter(normalize_sql(query["sql"]) for query in queries)
+    return [(count, sql) for sql, count in counts.most_common() if count > 1]
+
+
+class Dataset:
+    """
+    Rows for every model a view lists. `grow(n)` adds n of each, both as
+    top-level rows (for list pages) and as children of the objects the detail
+    pages are rendered for.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.rows = 0
+        self.location = Location.objects.create(name="Lokation", municipality="Aarhus")
+        self.instructor = Instructor.objects.create(name="Underviser")
+        self.school = self._school(0)
+        self.person = Person.objects.create(
+            school=self.school, name="Person 0", email="p0@skole.dk", is_koordinator=True
+        )
+        self.course = self._course(0)
+        self.signup = self._signup(self.course, self.school, 0)
+        self.comment = SchoolComment.objects.create(school=self.school, comment="Kommentar", created_by=user)
+        self.file = SchoolFile.objects.create(
+            school=self.school, file=ContentFile(b"%PDF", name="fil.pdf"), uploaded_by=user
+        )
+        self.material = CourseMaterial.objects.create(course=self.course, file=ContentFile(b"%PDF", name="m.pdf"))
+        self.webinar = self._webinar(0)
+        self.webinar_signup = WebinarSignUp.objects.create(
+            webinar=self.webinar, participant_name="Deltager 0", participant_email="w0@skole.dk"
+        )
+        self.campaign = BulkEmail.objects.create(subject="Nyhedsbrev", body_html="<p>Hej</p>", sent_by=user)
+        self.campaign.sent_at = timezone.now()
+        self.campaign.save(update_fields=["sent_at"])
+        self.attachment = BulkEmailAttachment.objects.create(
+            bulk_email=self.campaign, file=ContentFile(b"%PDF", name="a.pdf"), filename="a.pdf"
+        )
+        self.recipient = self._recipient(self.school, self.person, 0)
+
+    def _school(self, i):
+        kommune, _ = Kommune.objects.get_or_create(name=f"Kommune {i % 3}")
+        return School.objects.create(
+            name=f"Skole {i}",
+            adresse=f"Vej {i}",
+            kommune=kommune,
+            enrolled_at=date.today() - timedelta(days=400 + i),
+            signup_token=f"token{i:027d}",
+            signup_password=f"pw{i}",
+        )
+
+    def _course(self, i):
+        course = Course.objects.create(
+            start_date=date.today() + timedelta(days=10 + i),
+            end_date=date.today() + timedelta(days=10 + i),
+            location=self.location,
+            capacity=30,
+            is_published=True,
+        )
+        course.instructors.add(self.instructor)
+        return course
+
+    def _signup(self, course, school, i):
+        return CourseSignUp.objects.create(
+            course=course, school=school, participant_name=f"Deltager {i}", participant_email=f"d{i}@skole.dk"
+        )
+
+    def _webinar(self, i):
+        webinar = Webinar.objects.create(
+            title=f"Webinar {i}",
+            slug=f"webinar-{i}",
+            start_at=timezone.make_aware(datetime.combine(date.today() + timedelta(days=5 + i), time(14, 0))),
+            is_published=True,
+        )
+        webinar.instructors.add(self.instructor)
+        return webinar
+
+    def _recipient(self, school, person, i):
+        return BulkEmailRecipient.objects.create(
+            bulk_email=self.campaign, school=school, person=person, email=f"r{i}@skole.dk", success=i % 3 != 0
+        )
+
+    def grow(self, n):
+        for i in range(self.rows + 1, self.rows + n + 1):
+            # Top-level rows with their own children
+            school = self._school(i)
+            person = Person.objects.create(
+                school=school, name=f"Person {i}", email=f"p{i}@skole.dk", is_koordinator=True
+            )
+            course = self._course(i)
+            self._signup(course, school, i)
+            webinar = self._webinar(i)
+            WebinarSignUp.objects.create(webinar=webinar, participant_name=f"W {i}", participant_email=f"w{i}@skole.dk")
+            BulkEmail.objects.create(subject=f"Udsendelse {i}", body_html="<p>Hej</p>", sent_by=self.user)
+            User.objects.create_user(username=f"bruger{i}", password="pw", is_staff=True)
+
+            # Children of the objects the detail pages show
+            self._recipient(school, person, i)
+            Person.objects.create(school=self.school, name=f"Kollega {i}", email=f"k{i}@skole.dk")
+            self._signup(self.course, self.school, 1000 + i)
+            SchoolComment.objects.create(school=self.school, comment=f"Kommentar {i}", created_by=self.user)
+            SchoolFile.objects.create(school=self.school, file=f"school_files/fil{i}.pdf", uploaded_by=self.user)
+            CourseMaterial.objects.create(course=self.course, file=f"course_materials/m{i}.pdf")
+            WebinarSignUp.objects.create(
+                webinar=self.webinar, participant_name=f"Deltager {i}", participant_email=f"w{i}b@skole.dk"
+            )
+        self.rows += n
+
+
+class QueryBudgetTest(TestCase):
+    maxDiff = None
+
+    @classmethod
+    def setUpClass(cls):
+        # The dataset writes attachments and materials
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    def test_every_url_is_covered(self):
+        missing = [
+            name
+            for name, takes_arguments in iter_url_names()
+            if name not in SKIPPED and takes_arguments and name not in URL_KWARGS
+        ]
+        self.assertEqual(missing, [], "Add these URLs to URL_KWARGS or SKIPPED in tests_query_budget.py")
+
+    def test_query_counts_are_constant_and_within_budget(self):
+        user = User.objects.create_superuser(username="budget", password="pw", email="budget@x.dk")
+        self.client.force_login(user)
+        data = Dataset(user)
+        urls = {}
+        for name, _ in iter_url_names():
+            if name in SKIPPED:
+                continue
+            url = reverse(name, kwargs=URL_KWARGS[name](data) if name in URL_KWARGS else None)
+            if name in URL_QUERY:
+                url = f"{url}?{urlencode(URL_QUERY[name](data))}"
+            urls[name] = url
+
+        data.grow(SMALL)
+        small = {name: self._measure(url) for name, url in urls.items()}
+        data.grow(LARGE - SMALL)
+        large = {name: self._measure(url) for name, url in urls.items()}
+
+        failures = []
+        for name in urls:
+            small_count, large_count = len(small[name]), len(large[name])
+            budget = BUDGETS.get(name, DEFAULT_BUDGET)
+            if name in KNOWN_N_PLUS_ONE:
+                if large_count <= small_count:
+                    failures.append(f"{name}: no longer grows with the data, remove it from KNOWN_N_PLUS_ONE")
+                continue
+            if large_count > small_count or large_count > budget:
+                report = "\n".join(f"    {count}x {sql[:300]}" for count, sql in repeated_queries(large[name])[:5])
+                failures.append(
+                    f"{name}: {small_count} queries with {SMALL} rows, {large_count} with {LARGE} "
+                    f"(budget {budget})\n{report}"
+                )
+        if failures:
+            self.fail("Query budget exceeded:\n" + "\n".join(failures))
+
+    def _measure(self, url):
+        # The first request fills per-process caches (content types, settings)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        return ctx.captured_queries
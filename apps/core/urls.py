@@ -8,4 +8,5 @@ urlpatterns = [
     path("", views.DashboardView.as_view(), name="dashboard"),
     path("om/", views.AboutView.as_view(), name="about"),
     path("manual/", views.ManualView.as_view(), name="manual"),
+    path("ydelse/", views.PerformanceView.as_view(), name="performance"),
 ]
@@ -2,9 +2,9 @@ from pathlib import Path
 
 import markdown
 from django.conf import settings
-from django.core.management import call_command
-from django.db.models import Count
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.utils.safestring import mark_safe
@@ -16,7 +16,11 @@ from apps.goals.calculations import get_current_school_year, get_metrics_for_yea
 from apps.goals.constants import PROJECT_TARGETS
 from apps.schools.models import School
 
+from . import metrics
 from .decorators import staff_required
+from .jobs import enqueue
+from .models import Job
+from .performance import slow_request_ms, slow_request_queries, view_stats
 
 
 @method_decorator(staff_required, name="dispatch")
@@ -27,11 +31,7 @@ class DashboardView(TemplateView):
         context = super().get_context_data(**kwargs)
         now = timezone.now()
 
-        context["upcoming_courses"] = (
-            Course.objects.filter(start_date__gte=now.date())
-            .annotate(signup_count_value=Count("signups"))
-            .order_by("start_date")[:5]
-        )
+        context["upcoming_courses"] = Course.objects.filter(start_date__gte=now.date()).order_by("start_date")[:5]
 
         context["recent_signups"] = CourseSignUp.objects.select_related("school", "course").order_by("-created_at")[:10]
 
@@ -76,42 +76,84 @@ def verify_cron_token(request):
     return True, None
 
 
-class CronSendRemindersView(View):
+class CronJobView(View):
     """
-    Protected endpoint for sending course reminders via cron job.
+    Protected endpoint that queues a background job for the `run_jobs` worker.
     Requires CRON_SECRET token in Authorization header or query param.
+
+    Returns 202 with a status URL right away. If a job of the same kind is
+    already queued or running, that job is returned instead of starting another.
     """
 
+    job_kind = None
+
     def get(self, request):
         valid, error_response = verify_cron_token(request)
         if not valid:
             return error_response
 
-        from io import StringIO
+        job, created = enqueue(self.job_kind, triggered_by="cron")
+        return JsonResponse(
+            {
+                "success": True,
+                "created": created,
+                "job_id": job.pk,
+                "status": job.status,
+                "status_url": request.build_absolute_uri(reverse("cron-job-status", args=[job.pk])),
+            },
+            status=202,
+        )
+
 
-        output = StringIO()
+class CronSendRemindersView(CronJobView):
+    """Queue sending of course reminders."""
 
-        try:
-            call_command("send_course_reminders", stdout=output)
-            return JsonResponse(
-                {
-                    "success": True,
-                    "output": output.getvalue(),
-                }
-            )
-        except Exception as e:
-            return JsonResponse(
-                {
-                    "success": False,
-                    "error": str(e),
-                },
-                status=500,
-            )
+    job_kind = "send_reminders"
+
+
+class CronProcessWebhooksView(CronJobView):
+    """Queue processing of stored Resend webhook events."""
+
+    job_kind = "process_webhooks"
+
+
+class CronBackupView(CronJobView):
+    """Queue a database and media backup."""
+
+    job_kind = "backup"
+
+
+class CronJobStatusView(View):
+    """
+    Protected endpoint reporting the status, progress and log tail of a job.
+    Requires CRON_SECRET token in Authorization header or query param.
+    """
+
+    def get(self, request, pk):
+        valid, error_response = verify_cron_token(request)
+        if not valid:
+            return error_response
+
+        job = get_object_or_404(Job, pk=pk)
+        return JsonResponse(
+            {
+                "job_id": job.pk,
+                "kind": job.kind,
+                "status": job.status,
+                "progress": job.progress,
+                "error": job.error or None,
+                "created_at": job.created_at.isoformat(),
+                "started_at": job.started_at.isoformat() if job.started_at else None,
+                "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+                "log": job.log[-5000:],
+            }
+        )
 
 
-class CronBackupView(View):
+class MetricsView(View):
     """
-    Protected endpoint for database and media backup via cron job.
+    Prometheus text exposition of request, email, job and backup metrics,
+    summed over all worker processes.
     Requires CRON_SECRET token in Authorization header or query param.
     """
 
@@ -120,29 +162,22 @@ class CronBackupView(View):
         if not valid:
             return error_response
 
-        from io import StringIO
+        body = metrics.render(metrics.collect(), extra=metrics.database_metrics())
+        return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
 
-        output = StringIO()
-        error_output = StringIO()
 
-        try:
-            call_command("backup", stdout=output, stderr=error_output)
-            return JsonResponse(
-                {
-                    "success": True,
-                    "output": output.getvalue(),
-                    "errors": error_output.getvalue() or None,
-                }
-            )
-        except Exception as e:
-            return JsonResponse(
-                {
-                    "success": False,
-                    "error": str(e),
-                    "output": output.getvalue(),
-                },
-                status=500,
-            )
+@method_decorator(staff_required, name="dispatch")
+class PerformanceView(TemplateView):
+    """Rolling per-view response times and query counts collected by PerformanceMiddleware."""
+
+    template_name = "core/performance.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["rows"] = view_stats.summary()
+        context["slow_request_ms"] = slow_request_ms()
+        context["slow_request_queries"] = slow_request_queries()
+        return context
 
 
 @method_decorator(staff_required, name="dispatch")
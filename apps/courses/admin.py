@@ -30,3 +30,8 @@ class CourseSignUpAdmin(admin.ModelAdmin):
     list_filter = ["attendance", "course", "created_at"]
     search_fields = ["participant_name", "school__name"]
     raw_id_fields = ["school", "course"]
+
+    def delete_queryset(self, request, queryset):
+        course_ids = set(queryset.values_list("course_id", flat=True))
+        super().delete_queryset(request, queryset)
+        Course.objects.filter(pk__in=course_ids).recount_signups()
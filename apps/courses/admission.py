@@ -0,0 +1,57 @@
+"""
+Seat admission for course signups.
+
+When a course opens, many coordinators submit at once. Checking
+spots_remaining before inserting lets concurrent submissions overbook, so
+admit_signups() takes a row lock on the course (SELECT ... FOR UPDATE),
+checks the signup counter under that lock and creates every participant of
+the submission in the same transaction. Submissions for the same course are
+serialized for the few milliseconds the insert takes; other courses are not
+affected.
+
+A full course is a final answer (CourseFull), not a transient error, so
+clients have nothing to retry. If the lock can't be had within
+SIGNUP_LOCK_TIMEOUT_MS (Postgres only), AdmissionBusy is raised and the view
+asks the user to try again shortly instead of piling up more waiters.
+"""
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from .models import Course, CourseSignUp
+
+
+class CourseFull(Exception):
+    def __init__(self, course, requested, available):
+        self.course = course
+        self.requested = requested
+        self.available = available
+        super().__init__(f"{course}: {requested} requested, {available} available")
+
+
+class AdmissionBusy(Exception):
+    pass
+
+
+def admit_signups(course, participants):
+    """
+    Create one CourseSignUp per dict in participants, all or none.
+
+    Raises CourseFull if the course doesn't have room for all of them.
+    """
+    try:
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SET LOCAL lock_timeout = {int(settings.SIGNUP_LOCK_TIMEOUT_MS)}")
+            locked = Course.objects.select_for_update().only("capacity", "signup_counter").get(pk=course.pk)
+            available = max(0, locked.capacity - locked.signup_counter)
+            if len(participants) > available:
+                raise CourseFull(course, len(participants), available)
+            signups = [CourseSignUp.objects.create(course=course, **participant) for participant in participants]
+    except OperationalError as e:
+        # 55P03 lock_not_available: lock_timeout expired while waiting for the course row
+        if getattr(e.__cause__, "sqlstate", None) == "55P03":
+            raise AdmissionBusy from e
+        raise
+    return signups
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Retter afvigelser mellem kursernes tilmeldingstællere og de faktiske tilmeldinger"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Vis kun kurser med afvigelser, uden at rette dem")
+
+    def handle(self, *args, **options):
+        drifted = list(Course.objects.with_counter_drift().order_by("start_date"))
+        for course in drifted:
+            self.stdout.write(
+                f"  {course}: tilmeldt {course.signup_counter} → {course.actual_signups}, "
+                f"uddannet {course.present_counter} → {course.actual_present_counter}, "
+                f"fravær {course.absent_counter} → {course.actual_absent_counter}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Alle kursustællere stemmer"))
+        elif options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(f"{len(drifted)} kursus(er) med afvigelser (prøvekørsel, intet ændret)")
+            )
+        else:
+            Course.objects.filter(pk__in=[course.pk for course in drifted]).recount_signups()
+            self.stdout.write(self.style.SUCCESS(f"Tællere rettet på {len(drifted)} kursus(er)"))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0021_coursesignup_affiliation_xor"),
+        ("schools", "0042_email_lower_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="coursesignup",
+            index=models.Index(
+                django.db.models.functions.text.Lower("participant_email"), name="signup_email_lower_idx"
+            ),
+        ),
+    ]
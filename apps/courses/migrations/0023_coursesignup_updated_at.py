@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0022_coursesignup_signup_email_lower_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursesignup",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    CourseSignUp = apps.get_model("courses", "CourseSignUp")
+
+    def counted(**filters):
+        signups = (
+            CourseSignUp.objects.filter(course=OuterRef("pk"), **filters)
+            .order_by()
+            .values("course")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return Coalesce(Subquery(signups), 0)
+
+    Course.objects.update(
+        signup_counter=counted(),
+        present_counter=counted(attendance="present"),
+        absent_counter=counted(attendance="absent"),
+    )
+
+
+def reverse_noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0023_coursesignup_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="signup_counter",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="present_counter",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="absent_counter",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, reverse_noop),
+    ]
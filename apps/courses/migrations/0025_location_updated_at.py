@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0024_course_signup_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from datetime import date
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest, Lower
 
 from apps.courses.utils import format_date_danish
 
@@ -11,6 +13,13 @@ class AttendanceStatus(models.TextChoices):
     ABSENT = "absent", "Fraværende"
 
 
+# Course counter column kept per attendance status, next to signup_counter
+ATTENDANCE_COUNTERS = {
+    AttendanceStatus.PRESENT: "present_counter",
+    AttendanceStatus.ABSENT: "absent_counter",
+}
+
+
 class Instructor(models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name="Navn")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -30,6 +39,7 @@ class Location(models.Model):
     postal_code = models.CharField(max_length=10, blank=True, verbose_name="Postnummer")
     municipality = models.CharField(max_length=100, blank=True, verbose_name="By")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -50,6 +60,35 @@ class Location(models.Model):
         return ", ".join(parts)
 
 
+class CourseQuerySet(models.QuerySet):
+    def _counted_signups(self, **filters):
+        signups = (
+            CourseSignUp.objects.filter(course=OuterRef("pk"), **filters)
+            .order_by()
+            .values("course")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return Coalesce(Subquery(signups), 0)
+
+    def recount_signups(self):
+        """Recompute the signup counters from the signups table in one UPDATE."""
+        return self.update(
+            signup_counter=self._counted_signups(),
+            **{field: self._counted_signups(attendance=status) for status, field in ATTENDANCE_COUNTERS.items()},
+        )
+
+    def with_counter_drift(self):
+        """Courses whose stored counters differ from the actual signups."""
+        actual = {"actual_signups": Count("signups")}
+        for status, field in ATTENDANCE_COUNTERS.items():
+            actual[f"actual_{field}"] = Count("signups", filter=Q(signups__attendance=status))
+        drift = ~Q(signup_counter=F("actual_signups"))
+        for field in ATTENDANCE_COUNTERS.values():
+            drift |= ~Q(**{field: F(f"actual_{field}")})
+        return self.annotate(**actual).filter(drift)
+
+
 class Course(models.Model):
     start_date = models.DateField(verbose_name="Startdato")
     end_date = models.DateField(verbose_name="Slutdato")
@@ -85,9 +124,15 @@ class Course(models.Model):
         blank=True,
         verbose_name="Tilmeldingsfrist",
     )
+    # Maintained by CourseSignUp.save()/delete(); fix drift with reconcile_course_counters
+    signup_counter = models.PositiveIntegerField(default=0, editable=False)
+    present_counter = models.PositiveIntegerField(default=0, editable=False)
+    absent_counter = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     class Meta:
         ordering = ["-start_date"]
 
@@ -96,11 +141,15 @@ class Course(models.Model):
 
     @property
     def signup_count(self):
-        return self.signups.count()
+        return self.signup_counter
 
     @property
     def attendance_count(self):
-        return self.signups.filter(attendance=AttendanceStatus.PRESENT).count()
+        return self.present_counter
+
+    @property
+    def absent_count(self):
+        return self.absent_counter
 
     @property
     def spots_remaining(self):
@@ -171,6 +220,7 @@ class CourseSignUp(models.Model):
         default=True, verbose_name="Er underviser", help_text="Afkryds hvis deltageren er underviser (ikke leder/andet)"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -188,14 +238,46 @@ class CourseSignUp(models.Model):
             raise ValidationError("Angiv kun én tilknytning: skole, kommune, eller anden organisation.")
 
     def save(self, *args, **kwargs):
+        old = None
         if self.pk:
-            old = CourseSignUp.objects.filter(pk=self.pk).values_list("participant_email", flat=True).first()
-            if old and old != self.participant_email:
+            old = CourseSignUp.objects.filter(pk=self.pk).values("participant_email", "course_id", "attendance").first()
+            if old and old["participant_email"] and old["participant_email"] != self.participant_email:
                 self.email_bounced_at = None
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get("update_fields")
+            counted_fields_saved = update_fields is None or {"course", "attendance"} & set(update_fields)
+            if old is None:
+                self._adjust_course_counters(self.course_id, self.attendance, 1)
+            elif counted_fields_saved and (old["course_id"], old["attendance"]) != (self.course_id, self.attendance):
+                self._adjust_course_counters(old["course_id"], old["attendance"], -1)
+                self._adjust_course_counters(self.course_id, self.attendance, 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self._adjust_course_counters(self.course_id, self.attendance, -1)
+        return result
+
+    def _adjust_course_counters(self, course_id, attendance, delta):
+        """Move the course's counters by delta with F() so concurrent signups don't lose updates."""
+        changes = {"signup_counter": delta}
+        if attendance in ATTENDANCE_COUNTERS:
+            changes[ATTENDANCE_COUNTERS[attendance]] = delta
+        Course.objects.filter(pk=course_id).update(
+            **{field: Greatest(F(field) + change, 0) for field, change in changes.items()}
+        )
+        # Keep an already loaded course in step, e.g. for the confirmation e-mail
+        course = self._meta.get_field("course").get_cached_value(self, default=None)
+        if course is not None and course.pk == course_id:
+            for field, change in changes.items():
+                setattr(course, field, max(getattr(course, field) + change, 0))
 
     class Meta:
         ordering = ["school__name", "participant_name"]
+        indexes = [
+            models.Index(Lower("participant_email"), name="signup_email_lower_idx"),
+        ]
         constraints = [
             models.CheckConstraint(
                 name="coursesignup_exactly_one_affiliation",
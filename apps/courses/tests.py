@@ -1,14 +1,20 @@
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from unittest import skipUnless
 
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import IntegrityError
-from django.test import Client, TestCase, override_settings
+from django.db import IntegrityError, connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 
+from apps.core.performance import percentile
 from apps.schools.models import Kommune, School
 
+from .admission import CourseFull, admit_signups
 from .models import AttendanceStatus, Course, CourseMaterial, CourseSignUp
 
 
@@ -89,6 +95,144 @@ class CourseSignUpModelTest(TestCase):
         self.assertEqual(signup.organization_name, "Frederikshavn Kommune")
 
 
+class CourseSignupCounterTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Test School", adresse="Test Address", kommune="Test Kommune")
+        self.course = Course.objects.create(start_date=date.today(), end_date=date.today(), capacity=3)
+        self.other = Course.objects.create(start_date=date.today(), end_date=date.today())
+
+    def signup(self, course=None, **kwargs):
+        return CourseSignUp.objects.create(
+            course=course or self.course, school=self.school, participant_name="Deltager", **kwargs
+        )
+
+    def counters(self, course):
+        course.refresh_from_db()
+        return course.signup_count, course.attendance_count, course.absent_count
+
+    def test_counters_follow_create_attendance_move_and_delete(self):
+        first = self.signup()
+        second = self.signup(attendance=AttendanceStatus.ABSENT)
+        self.assertEqual(self.counters(self.course), (2, 0, 1))
+
+        first.attendance = AttendanceStatus.PRESENT
+        first.save()
+        self.assertEqual(self.counters(self.course), (2, 1, 1))
+
+        second.course = self.other
+        second.save()
+        self.assertEqual(self.counters(self.course), (1, 1, 0))
+        self.assertEqual(self.counters(self.other), (1, 0, 1))
+
+        first.delete()
+        self.assertEqual(self.counters(self.course), (0, 0, 0))
+
+    def test_properties_do_not_query(self):
+        self.signup()
+        self.signup()
+        course = Course.objects.get(pk=self.course.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(course.signup_count, 2)
+            self.assertEqual(course.spots_remaining, 1)
+            self.assertFalse(course.is_full)
+
+    def test_update_fields_without_attendance_leaves_counters(self):
+        signup = self.signup()
+        signup.attendance = AttendanceStatus.PRESENT
+        signup.save(update_fields=["participant_name"])
+
+        self.assertEqual(self.counters(self.course), (1, 0, 0))
+
+    def test_bulk_views_recount(self):
+        user = User.objects.create_user(username="staff", password="testpass123", is_staff=True)
+        self.client.force_login(user)
+        self.signup()
+        self.signup()
+
+        self.client.post(reverse("courses:bulk-mark-attendance", kwargs={"pk": self.course.pk}))
+        self.assertEqual(self.counters(self.course), (2, 2, 0))
+
+        self.client.post(reverse("courses:bulk-delete-signups", kwargs={"pk": self.course.pk}))
+        self.assertEqual(self.counters(self.course), (0, 0, 0))
+
+    def test_reconcile_command_fixes_drift(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        self.signup(attendance=AttendanceStatus.PRESENT)
+        Course.objects.filter(pk=self.course.pk).update(signup_counter=7, present_counter=0)
+
+        out = StringIO()
+        call_command("reconcile_course_counters", dry_run=True, stdout=out)
+        self.assertIn("1 kursus(er) med afvigelser", out.getvalue())
+        self.assertEqual(self.counters(self.course), (7, 0, 0))
+
+        call_command("reconcile_course_counters", stdout=StringIO())
+        self.assertEqual(self.counters(self.course), (1, 1, 0))
+        self.assertFalse(Course.objects.with_counter_drift().exists())
+
+
+class SeatAdmissionTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Test School", adresse="Test Address", kommune="Test Kommune")
+        self.course = Course.objects.create(start_date=date.today(), end_date=date.today(), capacity=3)
+
+    def participants(self, count):
+        return [{"school": self.school, "participant_name": f"Deltager {i}"} for i in range(count)]
+
+    def test_admits_all_participants_when_there_is_room(self):
+        signups = admit_signups(self.course, self.participants(3))
+
+        self.assertEqual(len(signups), 3)
+        self.course.refresh_from_db()
+        self.assertTrue(self.course.is_full)
+
+    def test_rejects_whole_submission_when_it_does_not_fit(self):
+        admit_signups(self.course, self.participants(2))
+
+        with self.assertRaises(CourseFull) as raised:
+            admit_signups(self.course, self.participants(2))
+
+        self.assertEqual(raised.exception.available, 1)
+        self.assertEqual(self.course.signups.count(), 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs Postgres row locks (set TEST_DATABASE_URL)")
+class SeatAdmissionConcurrencyTest(TransactionTestCase):
+    SUBMISSIONS = 40
+    CAPACITY = 12
+
+    def test_parallel_submissions_never_overbook(self):
+        school = School.objects.create(name="Test School", adresse="Test Address", kommune="Test Kommune")
+        course = Course.objects.create(start_date=date.today(), end_date=date.today(), capacity=self.CAPACITY)
+        barrier = threading.Barrier(self.SUBMISSIONS)
+
+        def submit(i):
+            try:
+                barrier.wait()
+                start = time.perf_counter()
+                try:
+                    admit_signups(course, [{"school": school, "participant_name": f"Deltager {i}"}])
+                    admitted = True
+                except CourseFull:
+                    admitted = False
+                return admitted, (time.perf_counter() - start) * 1000
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.SUBMISSIONS) as pool:
+            results = list(pool.map(submit, range(self.SUBMISSIONS)))
+
+        latencies = [ms for _, ms in results]
+        self.assertEqual(sum(admitted for admitted, _ in results), self.CAPACITY)
+        self.assertEqual(course.signups.count(), self.CAPACITY)
+        course.refresh_from_db()
+        self.assertEqual(course.signup_count, self.CAPACITY)
+        self.assertLess(percentile(latencies, 95), 2000, f"p95 {percentile(latencies, 95):.0f} ms")
+
+
 class CourseViewTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -3,6 +3,7 @@ from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.utils.html import format_html
 from django.views import View
@@ -28,6 +29,7 @@ class CourseListView(SortableMixin, ListView):
     }
     default_sort = "date"
     default_order = "desc"
+    cursor_pagination = True
 
     def get_base_queryset(self):
         queryset = Course.objects.select_related("location").prefetch_related("instructors")
@@ -174,11 +176,18 @@ class CourseExportView(CourseListView):
 
 
 @method_decorator(staff_required, name="dispatch")
-class SignUpListView(ListView):
+class SignUpListView(SortableMixin, ListView):
     model = CourseSignUp
     template_name = "courses/signup_list.html"
     context_object_name = "signups"
     paginate_by = 25
+    sortable_fields = {
+        "participant": "participant_name",
+        "school": "school__name",
+        "created": "created_at",
+    }
+    default_sort = "school"
+    cursor_pagination = True
 
     def get_base_queryset(self):
         queryset = CourseSignUp.objects.select_related("school", "course")
@@ -210,9 +219,6 @@ class SignUpListView(ListView):
 
         return queryset
 
-    def get_queryset(self):
-        return self.get_base_queryset()
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["courses"] = Course.objects.all()
@@ -788,7 +794,8 @@ class BulkMarkAttendanceView(View):
 
     def post(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
-        updated = course.signups.update(attendance=AttendanceStatus.PRESENT)
+        updated = course.signups.update(attendance=AttendanceStatus.PRESENT, updated_at=timezone.now())
+        Course.objects.filter(pk=course.pk).recount_signups()
         messages.success(request, f"{updated} deltagere er markeret som uddannet.")
         return JsonResponse({"success": True, "redirect": reverse("courses:detail", kwargs={"pk": pk})})
 
@@ -817,5 +824,6 @@ class BulkDeleteSignupsView(View):
     def post(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
         deleted, _ = course.signups.all().delete()
+        Course.objects.filter(pk=course.pk).recount_signups()
         messages.success(request, f"{deleted} tilmeldinger er blevet slettet.")
         return JsonResponse({"success": True, "redirect": reverse("courses:detail", kwargs={"pk": pk})})
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 from django_summernote.admin import SummernoteModelAdmin
 
-from .models import EmailLog, EmailTemplate, EmailType
+from .models import EmailLog, EmailTemplate, EmailType, WebhookEvent
 
 
 @admin.register(EmailTemplate)
@@ -128,3 +128,17 @@ class EmailLogAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["event_type", "email_id", "received_at", "processed_at"]
+    list_filter = ["event_type", "processed_at"]
+    search_fields = ["svix_id", "email_id"]
+    readonly_fields = ["svix_id", "event_type", "email_id", "payload", "received_at", "processed_at", "error_message"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
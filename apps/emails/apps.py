@@ -5,3 +5,8 @@ class EmailsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.emails'
     verbose_name = 'E-mails'
+
+    def ready(self):
+        from apps.emails.directory import connect_signals
+
+        connect_signals()
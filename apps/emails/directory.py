@@ -0,0 +1,172 @@
+"""
+Email-address directory.
+
+Maps each lowercase email address to the rows that hold it (contact persons,
+course signups, school/kommune billing contacts and bulk-email recipients).
+Rows are kept current by post_save/post_delete signals, and bounce handling
+and owner lookup probe the directory's index instead of scanning every table
+with `iexact` (which compiles to UPPER() and can't use a B-tree index).
+"""
+
+from collections import defaultdict
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import EmailDirectoryEntry, EmailDirectorySource
+
+# source -> (model label, email field, bounced-at field, extra filter for marking bounces)
+DIRECTORY_SOURCES = {
+    EmailDirectorySource.PERSON: ("schools.Person", "email", "email_bounced_at", {}),
+    EmailDirectorySource.COURSE_SIGNUP: ("courses.CourseSignUp", "participant_email", "email_bounced_at", {}),
+    EmailDirectorySource.SCHOOL_BILLING: (
+        "schools.School",
+        "fakturering_kontakt_email",
+        "fakturering_email_bounced_at",
+        {},
+    ),
+    EmailDirectorySource.KOMMUNE_BILLING: (
+        "schools.Kommune",
+        "fakturering_kontakt_email",
+        "fakturering_email_bounced_at",
+        {},
+    ),
+    EmailDirectorySource.BULK_RECIPIENT: ("bulk_email.BulkEmailRecipient", "email", "bounced_at", {"success": True}),
+}
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def _model(source):
+    return apps.get_model(DIRECTORY_SOURCES[source][0])
+
+
+def sync_entry(source, instance):
+    """Create, update or remove the directory row for one instance."""
+    email = normalize_email(getattr(instance, DIRECTORY_SOURCES[source][1]))
+    rows = EmailDirectoryEntry.objects.filter(source=source, object_id=instance.pk)
+    if not email:
+        rows.delete()
+        return
+    if not rows.update(email=email):
+        EmailDirectoryEntry.objects.create(email=email, source=source, object_id=instance.pk)
+
+
+def remove_entry(source, pk):
+    EmailDirectoryEntry.objects.filter(source=source, object_id=pk).delete()
+
+
+def find_entries(email):
+    """Return {source: [object_id, ...]} for every row holding this address (one indexed probe)."""
+    entries = defaultdict(list)
+    for source, object_id in EmailDirectoryEntry.objects.filter(email=normalize_email(email)).values_list(
+        "source", "object_id"
+    ):
+        entries[source].append(object_id)
+    return entries
+
+
+def rebuild_directory():
+    """Rebuild the whole directory from the source tables. Returns the number of entries."""
+    EmailDirectoryEntry.objects.all().delete()
+    total = 0
+    for source, (_label, field, _bounced_field, _extra) in DIRECTORY_SOURCES.items():
+        batch = [
+            EmailDirectoryEntry(email=normalize_email(email), source=source, object_id=pk)
+            for pk, email in _model(source).objects.exclude(**{field: ""}).values_list("pk", field).iterator()
+            if normalize_email(email)
+        ]
+        EmailDirectoryEntry.objects.bulk_create(batch, batch_size=1000)
+        total += len(batch)
+    return total
+
+
+def mark_email_bounced(email, at=None):
+    """Mark all records matching this email address as bounced."""
+    now = at or timezone.now()
+    for source, ids in find_entries(email).items():
+        _label, _field, bounced_field, extra = DIRECTORY_SOURCES[source]
+        model = _model(source)
+        values = {bounced_field: now}
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+            # update() skips auto_now; the recipient snapshot stamp and the public school page's version rely on it
+            values["updated_at"] = now
+        model.objects.filter(pk__in=ids, **{f"{bounced_field}__isnull": True}, **extra).update(**values)
+
+
+def lookup_email_owner(email):
+    """Look up person and school associated with a bounced email address."""
+    entries = find_entries(email)
+    results = []
+
+    # Person (koordinator, økonomisk ansvarlig, etc.)
+    if entries.get(EmailDirectorySource.PERSON):
+        people = _model(EmailDirectorySource.PERSON).objects.filter(pk__in=entries[EmailDirectorySource.PERSON])
+        for person in people.select_related("school"):
+            roles = []
+            if person.is_koordinator:
+                roles.append("koordinator")
+            if person.is_oekonomisk_ansvarlig:
+                roles.append("økonomiansvarlig")
+            role_str = ", ".join(roles) if roles else "kontaktperson"
+            results.append((person.name, person.school.name, role_str))
+
+    # CourseSignUp (participant)
+    if entries.get(EmailDirectorySource.COURSE_SIGNUP):
+        signups = _model(EmailDirectorySource.COURSE_SIGNUP).objects.filter(
+            pk__in=entries[EmailDirectorySource.COURSE_SIGNUP]
+        )
+        for signup in signups.select_related("school"):
+            school_name = signup.school.name if signup.school else "ukendt skole"
+            results.append((signup.participant_name, school_name, "kursustilmeldt"))
+
+    # School billing email (per-school override)
+    if entries.get(EmailDirectorySource.SCHOOL_BILLING):
+        schools = _model(EmailDirectorySource.SCHOOL_BILLING).objects.filter(
+            pk__in=entries[EmailDirectorySource.SCHOOL_BILLING]
+        )
+        for school in schools:
+            results.append((school.fakturering_kontakt_navn or "faktureringsmodtager", school.name, "fakturering"))
+
+    # Kommune-level billing email (shared across schools)
+    if entries.get(EmailDirectorySource.KOMMUNE_BILLING):
+        kommuner = _model(EmailDirectorySource.KOMMUNE_BILLING).objects.filter(
+            pk__in=entries[EmailDirectorySource.KOMMUNE_BILLING]
+        )
+        for kommune in kommuner:
+            results.append(
+                (kommune.fakturering_kontakt_navn or "faktureringsmodtager", kommune.name, "kommune-fakturering")
+            )
+
+    return results
+
+
+def _make_save_handler(source):
+    email_field = DIRECTORY_SOURCES[source][1]
+
+    def handler(sender, instance, update_fields=None, **kwargs):
+        if update_fields is not None and email_field not in update_fields:
+            return
+        sync_entry(source, instance)
+
+    return handler
+
+
+def _make_delete_handler(source):
+    def handler(sender, instance, **kwargs):
+        remove_entry(source, instance.pk)
+
+    return handler
+
+
+def connect_signals():
+    """Connect directory maintenance to every source model. Called from EmailsConfig.ready()."""
+    for source in DIRECTORY_SOURCES:
+        model = _model(source)
+        post_save.connect(_make_save_handler(source), sender=model, weak=False, dispatch_uid=f"email_dir_save_{source}")
+        post_delete.connect(
+            _make_delete_handler(source), sender=model, weak=False, dispatch_uid=f"email_dir_delete_{source}"
+        )
@@ -0,0 +1,142 @@
+"""
+Local stand-in for the Resend HTTP API.
+
+Accepts POST /emails like the real API and answers with {"id": ...}. Failure
+injection (rate limiting with Retry-After, 5xx errors, added latency) makes it
+possible to load-test the transport's throughput and retry behaviour offline.
+A repeated Idempotency-Key is answered with the id of the email first sent
+under it, without sending again.
+
+Run it with `python manage.py fake_resend_server` and set
+RESEND_API_URL=http://127.0.0.1:8025 and any non-empty RESEND_API_KEY.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _respond(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        server = self.server
+
+        if self.path.rstrip("/") != "/emails":
+            return self._respond(404, {"statusCode": 404, "name": "not_found", "message": "Not found"})
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._respond(401, {"statusCode": 401, "name": "missing_api_key", "message": "Missing API key"})
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return self._respond(400, {"statusCode": 400, "name": "invalid_json", "message": "Invalid JSON"})
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        idempotency_key = self.headers.get("Idempotency-Key")
+        with server.lock:
+            server.stats["requests"] += 1
+            server.idempotency_keys.append(idempotency_key)
+            forced = server.forced_statuses.pop(0) if server.forced_statuses else None
+            sent_id = server.sent_by_key.get(idempotency_key) if idempotency_key else None
+        if sent_id:
+            return self._respond(200, {"id": sent_id})
+
+        if forced == 429 or (forced is None and random.random() < server.rate_limit_rate):
+            with server.lock:
+                server.stats["rate_limited"] += 1
+            return self._respond(
+                429,
+                {"statusCode": 429, "name": "rate_limit_exceeded", "message": "Too many requests"},
+                headers={"Retry-After": str(server.retry_after)},
+            )
+        if forced and forced < 500:
+            with server.lock:
+                server.stats["errors"] += 1
+            return self._respond(forced, {"statusCode": forced, "name": "validation_error", "message": "Rejected"})
+
+        email_id = str(uuid.uuid4())
+        failed = forced or (forced is None and random.random() < server.error_rate)
+        if not failed or server.send_before_error:
+            with server.lock:
+                server.stats["sent"] += 1
+                server.sent.append({"id": email_id, **payload})
+                if idempotency_key:
+                    server.sent_by_key[idempotency_key] = email_id
+        if failed:
+            status = forced or 503
+            with server.lock:
+                server.stats["errors"] += 1
+            return self._respond(status, {"statusCode": status, "name": "internal_server_error", "message": "Boom"})
+        return self._respond(200, {"id": email_id})
+
+
+class FakeResendServer(ThreadingHTTPServer):
+    """
+    Threaded fake Resend server.
+
+    `forced_statuses` is a queue of status codes returned for the next requests
+    (useful in tests), applied before the random `rate_limit_rate`/`error_rate`.
+    With `send_before_error` a 5xx is returned after the email was sent, like a
+    failure on the way back from the real API.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        rate_limit_rate=0.0,
+        error_rate=0.0,
+        retry_after=1,
+        latency=0.0,
+        send_before_error=False,
+        verbose=False,
+    ):
+        super().__init__(address, FakeResendHandler)
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.latency = latency
+        self.send_before_error = send_before_error
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.forced_statuses = []
+        self.sent = []
+        self.sent_by_key = {}
+        self.idempotency_keys = []
+        self.stats = {"requests": 0, "sent": 0, "rate_limited": 0, "errors": 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -6,7 +6,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
-from apps.emails.views import mark_email_bounced
+from apps.emails.directory import mark_email_bounced
 
 
 class Command(BaseCommand):
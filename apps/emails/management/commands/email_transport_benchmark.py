@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.emails.fake_resend import FakeResendServer
+from apps.emails.transport import EmailTransportError, get_transport, reset_transport
+
+
+class Command(BaseCommand):
+    help = "Mål gennemløb og retry-adfærd for e-mail transporten mod en lokal fake Resend server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500, help="Antal e-mails (standard: 500)")
+        parser.add_argument("--concurrency", type=int, default=4, help="Antal samtidige afsendere (standard: 4)")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Andel 429-svar (0-1)")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Andel 503-svar (0-1)")
+        parser.add_argument("--latency", type=float, default=0.0, help="Ekstra svartid pr. forespørgsel")
+        parser.add_argument(
+            "--url",
+            help="Brug en allerede kørende server (fx fake_resend_server) i stedet for at starte en",
+        )
+
+    def handle(self, *args, **options):
+        server = None
+        url = options["url"]
+        if not url:
+            server = FakeResendServer(
+                rate_limit_rate=options["rate_limit_rate"],
+                error_rate=options["error_rate"],
+                retry_after=0,
+                latency=options["latency"],
+            )
+            server.start_in_thread()
+            url = server.url
+        elif "api.resend.com" in url:
+            raise CommandError("Benchmark må ikke køres mod det rigtige Resend API")
+
+        original_url = settings.RESEND_API_URL
+        settings.RESEND_API_URL = url
+        reset_transport()
+        transport = get_transport()
+
+        params = {
+            "from": settings.DEFAULT_FROM_EMAIL,
+            "to": ["benchmark@example.com"],
+            "subject": "Benchmark",
+            "html": "<p>Benchmark</p>",
+        }
+
+        def send_one(_):
+            try:
+                transport.send(params, api_key="re_benchmark")
+                return True
+            except EmailTransportError:
+                return False
+
+        count = options["count"]
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(send_one, range(count)))
+        finally:
+            elapsed = time.perf_counter() - start
+            reset_transport()
+            settings.RESEND_API_URL = original_url
+            if server:
+                server.stop()
+
+        ok = sum(results)
+        self.stdout.write(f"Sendt: {ok}/{count} på {elapsed:.2f}s ({count / elapsed:.1f} e-mails/s)")
+        self.stdout.write(f"HTTP-forespørgsler: {transport.stats['requests']}, retries: {transport.stats['retries']}")
+        if server:
+            self.stdout.write(f"Server: {server.stats}")
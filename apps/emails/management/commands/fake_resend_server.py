@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from apps.emails.fake_resend import FakeResendServer
+
+
+class Command(BaseCommand):
+    help = "Start en lokal stand-in for Resend API'et (til offline test af e-mailafsendelse)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Adresse der lyttes på (standard: 127.0.0.1)")
+        parser.add_argument("--port", type=int, default=8025, help="Port (standard: 8025)")
+        parser.add_argument(
+            "--rate-limit-rate",
+            type=float,
+            default=0.0,
+            help="Andel af forespørgsler der afvises med 429 (0-1)",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Andel af forespørgsler der fejler med 503 (0-1)",
+        )
+        parser.add_argument("--retry-after", type=int, default=1, help="Retry-After sekunder ved 429")
+        parser.add_argument("--latency", type=float, default=0.0, help="Ekstra svartid pr. forespørgsel i sekunder")
+        parser.add_argument("--verbose", action="store_true", help="Log hver forespørgsel")
+
+    def handle(self, *args, **options):
+        server = FakeResendServer(
+            (options["host"], options["port"]),
+            rate_limit_rate=options["rate_limit_rate"],
+            error_rate=options["error_rate"],
+            retry_after=options["retry_after"],
+            latency=options["latency"],
+            verbose=options["verbose"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fake Resend kører på {server.url}"))
+        self.stdout.write(f"Sæt RESEND_API_URL={server.url} og en vilkårlig RESEND_API_KEY. Stop med Ctrl+C.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"\nStatistik: {server.stats}")
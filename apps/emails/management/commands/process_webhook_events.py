@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.emails.webhooks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Behandl gemte Resend webhook-hændelser (bounces og klager) og send én samlet notifikation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Hændelser pr. batch (standard: 100)")
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop efter dette antal batches")
+
+    def handle(self, *args, **options):
+        result = process_pending_events(batch_size=options["batch_size"], max_batches=options["max_batches"])
+        self.stdout.write(
+            f"Behandlede {result['processed']} hændelser, {result['reported']} med bounce/klage"
+            + (" — notifikation sendt" if result["notified"] else "")
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.emails.directory import rebuild_directory
+
+
+class Command(BaseCommand):
+    help = "Genopbyg e-mail-adressekataloget (bruges til bounce-håndtering) fra kildetabellerne"
+
+    def handle(self, *args, **options):
+        total = rebuild_directory()
+        self.stdout.write(self.style.SUCCESS(f"E-mail-kataloget er genopbygget med {total} adresser"))
@@ -1,11 +1,11 @@
 from datetime import date, timedelta
 
-import resend
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils.formats import date_format
 
 from apps.emails.models import EmailTemplate
+from apps.emails.transport import send_via_resend
 
 
 class Command(BaseCommand):
@@ -129,7 +129,6 @@ class Command(BaseCommand):
             self.stdout.write(f"Sender test e-mail til {recipient}...")
 
             try:
-                resend.api_key = settings.RESEND_API_KEY
                 email_params = {
                     "from": settings.DEFAULT_FROM_EMAIL,
                     "to": [recipient],
@@ -140,7 +139,7 @@ class Command(BaseCommand):
                 if attachments:
                     email_params["attachments"] = attachments
 
-                result = resend.Emails.send(email_params)
+                result = send_via_resend(email_params)
                 self.stdout.write(self.style.SUCCESS(f'E-mail sendt! ID: {result.get("id", "unknown")}'))
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"Fejl ved afsendelse: {e}"))
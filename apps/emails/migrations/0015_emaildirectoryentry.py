@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emails", "0014_webinar_template_conditional_link"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailDirectoryEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("email", models.CharField(db_index=True, max_length=254, verbose_name="E-mail")),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("person", "Kontaktperson"),
+                            ("course_signup", "Kursustilmelding"),
+                            ("school_billing", "Skolefakturering"),
+                            ("kommune_billing", "Kommunefakturering"),
+                            ("bulk_recipient", "Masseudsendelsesmodtager"),
+                        ],
+                        max_length=20,
+                        verbose_name="Kilde",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+            ],
+            options={
+                "verbose_name": "E-mailadresse",
+                "verbose_name_plural": "E-mailadresser",
+                "constraints": [
+                    models.UniqueConstraint(fields=("source", "object_id"), name="unique_email_directory_row")
+                ],
+            },
+        ),
+    ]
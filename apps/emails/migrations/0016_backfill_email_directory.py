@@ -0,0 +1,45 @@
+"""Populate the email directory from existing rows.
+
+New and changed rows are kept in sync by signals (apps/emails/directory.py);
+this fills in everything that existed before the directory was introduced.
+"""
+
+from django.db import migrations
+
+SOURCES = [
+    ("person", "schools", "Person", "email"),
+    ("course_signup", "courses", "CourseSignUp", "participant_email"),
+    ("school_billing", "schools", "School", "fakturering_kontakt_email"),
+    ("kommune_billing", "schools", "Kommune", "fakturering_kontakt_email"),
+    ("bulk_recipient", "bulk_email", "BulkEmailRecipient", "email"),
+]
+
+
+def backfill_directory(apps, schema_editor):
+    EmailDirectoryEntry = apps.get_model("emails", "EmailDirectoryEntry")
+
+    for source, app_label, model_name, field in SOURCES:
+        Model = apps.get_model(app_label, model_name)
+        batch = []
+        for pk, email in Model.objects.exclude(**{field: ""}).values_list("pk", field).iterator():
+            email = (email or "").strip().lower()
+            if email:
+                batch.append(EmailDirectoryEntry(email=email, source=source, object_id=pk))
+        EmailDirectoryEntry.objects.bulk_create(batch, batch_size=1000)
+
+
+def clear_directory(apps, schema_editor):
+    apps.get_model("emails", "EmailDirectoryEntry").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emails", "0015_emaildirectoryentry"),
+        ("schools", "0042_email_lower_indexes"),
+        ("courses", "0022_coursesignup_signup_email_lower_idx"),
+        ("bulk_email", "0011_bulkemailrecipient_bulk_recipient_email_lower_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_directory, clear_directory),
+    ]
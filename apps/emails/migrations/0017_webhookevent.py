@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emails", "0016_backfill_email_directory"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("svix_id", models.CharField(max_length=100, unique=True)),
+                ("event_type", models.CharField(db_index=True, max_length=50, verbose_name="Hændelse")),
+                (
+                    "email_id",
+                    models.CharField(blank=True, db_index=True, max_length=100, verbose_name="Resend e-mail ID"),
+                ),
+                ("payload", models.JSONField(default=dict)),
+                ("received_at", models.DateTimeField(auto_now_add=True, verbose_name="Modtaget")),
+                ("processed_at", models.DateTimeField(blank=True, null=True, verbose_name="Behandlet")),
+                ("error_message", models.TextField(blank=True, verbose_name="Fejlbesked")),
+            ],
+            options={
+                "verbose_name": "Webhook-hændelse",
+                "verbose_name_plural": "Webhook-hændelser",
+                "ordering": ["-received_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("processed_at__isnull", True)),
+                        fields=["received_at"],
+                        name="webhook_event_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
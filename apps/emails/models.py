@@ -90,3 +90,69 @@ class EmailLog(models.Model):
 
     def __str__(self):
         return f"{self.recipient_email} - {self.get_email_type_display()} ({self.sent_at.strftime('%Y-%m-%d %H:%M')})"
+
+
+class EmailDirectorySource(models.TextChoices):
+    PERSON = "person", "Kontaktperson"
+    COURSE_SIGNUP = "course_signup", "Kursustilmelding"
+    SCHOOL_BILLING = "school_billing", "Skolefakturering"
+    KOMMUNE_BILLING = "kommune_billing", "Kommunefakturering"
+    BULK_RECIPIENT = "bulk_recipient", "Masseudsendelsesmodtager"
+
+
+class EmailDirectoryEntry(models.Model):
+    """
+    Normalized (lowercase) email address -> row that holds it.
+
+    Kept current by signals (see apps/emails/directory.py) so bounce handling and
+    owner lookup are a single indexed probe instead of case-insensitive scans.
+    """
+
+    email = models.CharField(max_length=254, db_index=True, verbose_name="E-mail")
+    source = models.CharField(max_length=20, choices=EmailDirectorySource.choices, verbose_name="Kilde")
+    object_id = models.PositiveBigIntegerField()
+
+    class Meta:
+        verbose_name = "E-mailadresse"
+        verbose_name_plural = "E-mailadresser"
+        constraints = [
+            models.UniqueConstraint(fields=["source", "object_id"], name="unique_email_directory_row"),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.get_source_display()} #{self.object_id})"
+
+
+class WebhookEvent(models.Model):
+    """
+    Raw, signature-verified Resend webhook event.
+
+    The webhook view only stores the event (keyed by svix-id, so Resend retries
+    are dropped) and returns immediately; `process_webhook_events` handles
+    bounces and complaints in batches. Delivery/open events are kept for analysis.
+    """
+
+    ACTIONABLE_TYPES = ("email.bounced", "email.complained")
+
+    svix_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50, db_index=True, verbose_name="Hændelse")
+    email_id = models.CharField(max_length=100, blank=True, db_index=True, verbose_name="Resend e-mail ID")
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True, verbose_name="Modtaget")
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Behandlet")
+    error_message = models.TextField(blank=True, verbose_name="Fejlbesked")
+
+    class Meta:
+        verbose_name = "Webhook-hændelse"
+        verbose_name_plural = "Webhook-hændelser"
+        ordering = ["-received_at"]
+        indexes = [
+            models.Index(
+                fields=["received_at"],
+                name="webhook_event_pending_idx",
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.svix_id})"
@@ -1,13 +1,13 @@
 import logging
 import re
 
-import resend
 from django.conf import settings
 from django.template import Context, Template
 from django.utils.formats import date_format
 from django.utils.safestring import mark_safe
 
 from .models import EmailLog, EmailTemplate, EmailType
+from .transport import send_via_resend
 
 logger = logging.getLogger(__name__)
 
@@ -133,8 +133,6 @@ def send_email(email_type, signup, attachments=None):
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
-
         email_params = {
             "from": settings.DEFAULT_FROM_EMAIL,
             "to": [signup.participant_email],
@@ -146,7 +144,7 @@ def send_email(email_type, signup, attachments=None):
         if attachments:
             email_params["attachments"] = attachments
 
-        resend.Emails.send(email_params)
+        send_via_resend(email_params)
 
         EmailLog.objects.create(
             email_type=email_type,
@@ -253,8 +251,7 @@ def send_course_signup_notification(school, course, signups):
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send(
+        send_via_resend(
             {
                 "from": settings.DEFAULT_FROM_EMAIL,
                 "to": [notification_email],
@@ -326,7 +323,6 @@ def send_school_enrollment_confirmation(school, contact_email, contact_name, att
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
         email_params = {
             "from": settings.DEFAULT_FROM_EMAIL,
             "to": [contact_email],
@@ -337,7 +333,7 @@ def send_school_enrollment_confirmation(school, contact_email, contact_name, att
         }
         if attachments:
             email_params["attachments"] = attachments
-        resend.Emails.send(email_params)
+        send_via_resend(email_params)
         return True
     except Exception as e:
         logger.error(f"Failed to send enrollment confirmation: {e}")
@@ -439,8 +435,7 @@ def send_coordinator_signup_confirmation(school, course, signups, override_email
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send(
+        send_via_resend(
             {
                 "from": settings.DEFAULT_FROM_EMAIL,
                 "to": [recipient_email],
@@ -514,8 +509,7 @@ def send_webinar_signup_confirmation(signup):
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send(
+        send_via_resend(
             {
                 "from": settings.DEFAULT_FROM_EMAIL,
                 "to": [signup.participant_email],
@@ -555,8 +549,7 @@ def send_webinar_signup_notification(webinar, signup):
         return True
 
     try:
-        resend.api_key = settings.RESEND_API_KEY
-        resend.Emails.send(
+        send_via_resend(
             {
                 "from": settings.DEFAULT_FROM_EMAIL,
                 "to": [notification_email],
@@ -1,7 +1,7 @@
 from datetime import date
 
 from django.contrib.auth.models import User
-from django.test import TestCase, override_settings
+from django.test import SimpleTestCase, TestCase, override_settings
 
 from apps.courses.models import Course, CourseSignUp, Instructor, Location
 from apps.emails.models import EmailTemplate, EmailType
@@ -257,3 +257,243 @@ class CoordinatorEmailTest(TestCase):
         self.assertIn("Deltager 2", ctx["participants_list"])
         self.assertEqual(ctx["coordinator_name"], "Koordinator Person")
         self.assertEqual(ctx["school_name"], "Test School")
+
+
+class ResendTransportTest(SimpleTestCase):
+    def setUp(self):
+        from apps.emails.fake_resend import FakeResendServer
+        from apps.emails.transport import ResendTransport
+
+        self.server = FakeResendServer(retry_after=0)
+        self.server.start_in_thread()
+        self.addCleanup(self.server.stop)
+        self.transport = ResendTransport(base_url=self.server.url, max_retries=2, backoff=0)
+        self.addCleanup(self.transport.close)
+        self.params = {"from": "a@example.com", "to": ["b@example.com"], "subject": "Hej", "html": "<p>Hej</p>"}
+
+    def test_send_returns_email_id(self):
+        result = self.transport.send(self.params, api_key="re_test")
+        self.assertTrue(result["id"])
+        self.assertEqual(self.server.sent[0]["subject"], "Hej")
+
+    def test_retries_on_rate_limit_and_server_error(self):
+        self.server.forced_statuses = [429, 503]
+        result = self.transport.send(self.params, api_key="re_test")
+        self.assertTrue(result["id"])
+        self.assertEqual(self.transport.stats["retries"], 2)
+        self.assertEqual(self.server.stats["requests"], 3)
+
+    def test_retries_reuse_one_idempotency_key(self):
+        self.server.send_before_error = True
+        self.server.forced_statuses = [503]
+        result = self.transport.send(self.params, api_key="re_test")
+        self.transport.send(self.params, api_key="re_test")
+
+        first, retry, other = self.server.idempotency_keys
+        self.assertEqual(first, retry)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(self.server.sent), 2)
+        self.assertEqual(result["id"], self.server.sent[0]["id"])
+
+    def test_gives_up_after_max_retries(self):
+        from apps.emails.transport import EmailTransportError
+
+        self.server.forced_statuses = [503, 503, 503]
+        with self.assertRaises(EmailTransportError) as ctx:
+            self.transport.send(self.params, api_key="re_test")
+        self.assertEqual(ctx.exception.status_code, 503)
+
+    def test_client_error_is_not_retried(self):
+        from apps.emails.transport import EmailTransportError
+
+        self.server.forced_statuses = [422]
+        with self.assertRaises(EmailTransportError):
+            self.transport.send(self.params, api_key="re_test")
+        self.assertEqual(self.server.stats["requests"], 1)
+
+    def test_requires_api_key(self):
+        from apps.emails.transport import EmailTransportError
+
+        with self.assertRaises(EmailTransportError):
+            self.transport.send(self.params, api_key="")
+
+    def test_parse_retry_after(self):
+        from apps.emails.transport import parse_retry_after
+
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertIsNone(parse_retry_after(""))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+class EmailDirectoryTest(TestCase):
+    def setUp(self):
+        from apps.schools.models import Person
+
+        self.school = School.objects.create(name="Dir School", adresse="Vej 1", kommune="Testby")
+        self.person = Person.objects.create(
+            school=self.school, name="Anna", email="Anna@Example.com", is_koordinator=True
+        )
+
+    def test_directory_tracks_saves_and_deletes(self):
+        from apps.emails.directory import find_entries
+        from apps.emails.models import EmailDirectorySource
+
+        self.assertEqual(find_entries("anna@example.com")[EmailDirectorySource.PERSON], [self.person.pk])
+
+        self.person.email = "anna@new.dk"
+        self.person.save()
+        self.assertFalse(find_entries("anna@example.com"))
+        self.assertEqual(find_entries("ANNA@new.dk")[EmailDirectorySource.PERSON], [self.person.pk])
+
+        self.person.delete()
+        self.assertFalse(find_entries("anna@new.dk"))
+
+    def test_mark_email_bounced_is_case_insensitive(self):
+        from apps.emails.directory import mark_email_bounced
+
+        self.school.fakturering_kontakt_email = "anna@example.com"
+        self.school.save()
+        mark_email_bounced("ANNA@example.com")
+
+        self.person.refresh_from_db()
+        self.school.refresh_from_db()
+        self.assertIsNotNone(self.person.email_bounced_at)
+        self.assertIsNotNone(self.school.fakturering_email_bounced_at)
+
+    def test_lookup_email_owner(self):
+        from apps.emails.directory import lookup_email_owner
+
+        self.assertEqual(lookup_email_owner("anna@example.com"), [("Anna", "Dir School", "koordinator")])
+        self.assertEqual(lookup_email_owner("nobody@example.com"), [])
+
+    def test_rebuild_directory(self):
+        from apps.emails.directory import find_entries, rebuild_directory
+        from apps.emails.models import EmailDirectoryEntry
+
+        EmailDirectoryEntry.objects.all().delete()
+        self.assertEqual(rebuild_directory(), 1)
+        self.assertTrue(find_entries("anna@example.com"))
+
+
+@override_settings(RESEND_WEBHOOK_SECRET="whsec_dGVzdHNlY3JldHRlc3RzZWNyZXR0ZXN0c2VjcmV0", RESEND_API_KEY=None)
+class ResendWebhookTest(TestCase):
+    def post_event(self, svix_id, payload):
+        import json
+        from datetime import datetime, timezone
+
+        from svix.webhooks import Webhook
+
+        body = json.dumps(payload)
+        now = datetime.now(tz=timezone.utc)
+        signature = Webhook("whsec_dGVzdHNlY3JldHRlc3RzZWNyZXR0ZXN0c2VjcmV0").sign(svix_id, now, body)
+        return self.client.post(
+            "/webhooks/resend/",
+            data=body,
+            content_type="application/json",
+            HTTP_SVIX_ID=svix_id,
+            HTTP_SVIX_TIMESTAMP=str(int(now.timestamp())),
+            HTTP_SVIX_SIGNATURE=signature,
+        )
+
+    def bounce_payload(self, email):
+        return {
+            "type": "email.bounced",
+            "data": {"to": [email], "from": "Basal <noreply@sundkom.dk>", "subject": "Hej", "email_id": "em_1"},
+        }
+
+    def test_payload_that_is_not_an_object_is_rejected(self):
+        from apps.emails.models import WebhookEvent
+
+        for svix_id, payload in [
+            ("msg_list", []),
+            ("msg_str", "x"),
+            ("msg_data", {"type": "email.bounced", "data": [1]}),
+        ]:
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post_event(svix_id, payload).status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.client.post("/webhooks/resend/", data="{}", content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_event_is_stored_once(self):
+        from apps.emails.models import WebhookEvent
+
+        self.assertEqual(self.post_event("msg_1", self.bounce_payload("a@example.com")).status_code, 200)
+        self.assertEqual(self.post_event("msg_1", self.bounce_payload("a@example.com")).status_code, 200)
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.email_id, "em_1")
+        self.assertIsNone(event.processed_at)
+
+    def test_delivery_events_are_recorded_as_processed(self):
+        from apps.emails.models import WebhookEvent
+
+        self.post_event("msg_2", {"type": "email.delivered", "data": {"email_id": "em_2"}})
+        self.assertIsNotNone(WebhookEvent.objects.get(svix_id="msg_2").processed_at)
+
+    def test_worker_marks_bounces_and_sends_one_digest(self):
+        from unittest.mock import patch
+
+        from apps.emails.models import WebhookEvent
+        from apps.emails.webhooks import process_pending_events
+        from apps.schools.models import Person
+
+        school = School.objects.create(name="Hook School", adresse="Vej 1", kommune="Testby")
+        person = Person.objects.create(school=school, name="Bo", email="bo@example.com")
+        self.post_event("msg_3", self.bounce_payload("BO@example.com"))
+        self.post_event("msg_4", self.bounce_payload("ukendt@example.com"))
+
+        with patch("apps.emails.webhooks.send_digest", return_value=True) as send_digest:
+            result = process_pending_events(batch_size=1)
+
+        self.assertEqual(result, {"processed": 2, "reported": 2, "notified": True})
+        send_digest.assert_called_once()
+        person.refresh_from_db()
+        self.assertIsNotNone(person.email_bounced_at)
+        self.assertFalse(WebhookEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_failed_digest_leaves_events_for_next_run(self):
+        from unittest.mock import patch
+
+        from apps.emails.models import WebhookEvent
+        from apps.emails.webhooks import process_pending_events
+
+        self.post_event("msg_5", self.bounce_payload("a@example.com"))
+        self.post_event("msg_6", {"type": "email.bounced", "data": {"to": ["b@example.com"], "from": "x@other.dk"}})
+
+        with patch("apps.emails.webhooks.send_digest", return_value=False):
+            result = process_pending_events()
+        self.assertEqual(result, {"processed": 2, "reported": 1, "notified": False})
+        event = WebhookEvent.objects.get(svix_id="msg_5")
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.error_message, "Digest notification failed")
+        self.assertIsNotNone(WebhookEvent.objects.get(svix_id="msg_6").processed_at)
+
+        with patch("apps.emails.webhooks.send_digest", return_value=True) as send_digest:
+            result = process_pending_events()
+        self.assertEqual(result, {"processed": 1, "reported": 1, "notified": True})
+        self.assertEqual([item["to"] for item in send_digest.call_args.args[0]], [["a@example.com"]])
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.error_message, "")
+
+    def test_build_digest_lists_owners(self):
+        from apps.emails.webhooks import build_digest
+
+        subject, body = build_digest(
+            [
+                {
+                    "label": "Bounce",
+                    "event_type": "email.bounced",
+                    "to": ["bo@example.com"],
+                    "from": "noreply@sundkom.dk",
+                    "subject": "Hej",
+                    "email_id": "em_1",
+                    "owners": [("bo@example.com", [("Bo", "Hook School", "kontaktperson")])],
+                }
+            ]
+        )
+        self.assertEqual(subject, "[Basal] Email Bounce: bo@example.com")
+        self.assertIn("Hook School", body)
@@ -0,0 +1,186 @@
+"""
+HTTP transport for the Resend email API.
+
+All outgoing mail goes through `send_via_resend()`, which uses a single pooled,
+keep-alive `requests.Session` per process instead of the resend SDK's global
+`resend.api_key`. The API key is passed per call, so concurrent gthread workers
+never share mutable credentials.
+
+The transport class is pluggable via the EMAIL_TRANSPORT setting (a dotted path),
+and the API base URL via RESEND_API_URL — point it at `fake_resend_server` to
+exercise sending and retry behaviour offline.
+"""
+
+import logging
+import random
+import threading
+import time
+import uuid
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class EmailTransportError(Exception):
+    """Raised when the email API rejects a request or cannot be reached."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class EmailTransportConnectionError(EmailTransportError, ConnectionError):
+    """Raised when the email API could not be reached after all retries."""
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta-seconds or HTTP date) into seconds.
+    Returns None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - timezone.now()).total_seconds())
+
+
+class ResendTransport:
+    """
+    Sends emails through the Resend REST API over a pooled keep-alive session.
+
+    Retries on 429 and 5xx responses (and on connection errors), honouring the
+    Retry-After header when present and falling back to exponential backoff with jitter.
+    Every attempt of one send carries the same Idempotency-Key, so a retry of a request
+    that did reach Resend (a 5xx or a read timeout on the way back) is not delivered twice.
+    """
+
+    def __init__(
+        self,
+        base_url="https://api.resend.com",
+        timeout=(5, 30),
+        max_retries=3,
+        backoff=0.5,
+        max_retry_wait=30,
+        pool_maxsize=10,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_retry_wait = max_retry_wait
+        self.session = requests.Session()
+        # Retries are handled here (so Retry-After is honoured), not by urllib3.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = {"requests": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is None:
+            retry_after = self.backoff * (2**attempt) + random.uniform(0, self.backoff)
+        return min(retry_after, self.max_retry_wait)
+
+    def send(self, params, api_key):
+        """
+        Send one email. `params` uses the Resend payload shape ("from", "to", "subject", ...).
+
+        Returns the decoded JSON response (contains "id" on success).
+        Raises EmailTransportError when the request ultimately fails.
+        """
+        if not api_key:
+            raise EmailTransportError("No API key provided")
+
+        url = f"{self.base_url}/emails"
+        headers = {"Authorization": f"Bearer {api_key}", "Idempotency-Key": str(uuid.uuid4())}
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                self._count("requests")
+                response = self.session.post(url, json=params, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                if attempt >= self.max_retries:
+                    raise EmailTransportConnectionError(f"Connection error: {e}") from e
+                logger.warning(f"[EMAIL TRANSPORT] Connection error ({e}), retrying")
+            else:
+                if response.status_code < 400:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        return {}
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    raise EmailTransportError(_error_message(response), status_code=response.status_code)
+                logger.warning(f"[EMAIL TRANSPORT] HTTP {response.status_code} from {url}, retrying")
+
+            delay = self._retry_delay(attempt, response)
+            attempt += 1
+            self._count("retries")
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+def _error_message(response):
+    try:
+        data = response.json()
+    except ValueError:
+        return f"HTTP {response.status_code}: {response.text[:200]}"
+    message = data.get("message") or data.get("error") or response.reason
+    return f"HTTP {response.status_code}: {message}"
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport instance, creating it on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                transport_class = import_string(settings.EMAIL_TRANSPORT)
+                _transport = transport_class(
+                    base_url=settings.RESEND_API_URL,
+                    timeout=(settings.RESEND_CONNECT_TIMEOUT, settings.RESEND_READ_TIMEOUT),
+                    max_retries=settings.RESEND_MAX_RETRIES,
+                )
+    return _transport
+
+
+def reset_transport():
+    """Drop the cached transport (used by tests and after settings changes)."""
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = None
+
+
+def send_via_resend(params, api_key=None):
+    """Send an email with the configured transport using RESEND_API_KEY unless a key is given."""
+    return get_transport().send(params, api_key=api_key or settings.RESEND_API_KEY)
@@ -0,0 +1,174 @@
+"""
+Batch processing of stored Resend webhook events.
+
+`ResendWebhookView` only persists verified events. This module marks bounced
+addresses, looks up who they belong to, and sends a single digest notification
+per run covering every bounce and complaint handled in that run. If the digest
+can't be sent, the reported events are released again (processed_at cleared,
+the failure kept in error_message) so the next run reports them.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .directory import lookup_email_owner, mark_email_bounced
+from .models import WebhookEvent
+from .transport import send_via_resend
+
+logger = logging.getLogger(__name__)
+
+BOUNCE_NOTIFICATION_RECIPIENT = "basal@sundkom.dk"
+
+EVENT_LABELS = {
+    "email.bounced": "Bounce",
+    "email.complained": "Klage (spam)",
+}
+
+
+def _handle_event(event):
+    """Apply one bounce/complaint event. Returns a digest item, or None if nothing to report."""
+    data = event.payload.get("data") or {}
+    to_emails = data.get("to") or []
+    if isinstance(to_emails, str):
+        to_emails = [to_emails]
+    from_email = data.get("from", "")
+
+    # Only act on emails sent from our domain
+    if "sundkom.dk" not in from_email:
+        return None
+
+    owners = []
+    for email in to_emails:
+        mark_email_bounced(email, at=event.received_at)
+        owners.append((email, lookup_email_owner(email)))
+
+    return {
+        "event_id": event.pk,
+        "label": EVENT_LABELS.get(event.event_type, event.event_type),
+        "event_type": event.event_type,
+        "to": to_emails,
+        "from": from_email,
+        "subject": data.get("subject", ""),
+        "email_id": data.get("email_id", ""),
+        "owners": owners,
+    }
+
+
+def process_batch(batch_size=100):
+    """
+    Process up to `batch_size` pending events. Rows are claimed with
+    select_for_update(skip_locked=True), so concurrent workers never handle the
+    same event twice. Returns (number of events processed, digest items).
+    """
+    items = []
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by("received_at")[:batch_size]
+        )
+        now = timezone.now()
+        for event in events:
+            event.error_message = ""
+            try:
+                with transaction.atomic():
+                    item = _handle_event(event)
+                if item:
+                    items.append(item)
+            except Exception as e:
+                logger.error(f"[WEBHOOK] Failed to process event {event.svix_id}: {e}")
+                event.error_message = str(e)[:1000]
+            event.processed_at = now
+        WebhookEvent.objects.bulk_update(events, ["processed_at", "error_message"])
+    return len(events), items
+
+
+def build_digest(items):
+    """Render (subject, html) for a digest of bounce/complaint items."""
+    addresses = [email for item in items for email in item["to"]]
+    shown = ", ".join(addresses[:5]) + (f" (+{len(addresses) - 5})" if len(addresses) > 5 else "")
+    if len(items) == 1:
+        subject = f"[Basal] Email {items[0]['label']}: {shown}"
+    else:
+        subject = f"[Basal] {len(items)} email-hændelser: {shown}"
+
+    sections = []
+    for item in items:
+        person_rows = ""
+        for email, owners in item["owners"]:
+            if owners:
+                for name, school, role in owners:
+                    person_rows += f"<li><strong>{name}</strong> ({role}) — {school}</li>\n"
+            else:
+                person_rows += f"<li>{email} — <em>ikke fundet i systemet</em></li>\n"
+        sections.append(
+            f"""
+<p><strong>Email {item["label"]}</strong></p>
+
+<p><strong>Berørte personer:</strong></p>
+<ul>
+{person_rows}
+</ul>
+
+<p><strong>Email-detaljer:</strong></p>
+<ul>
+  <li><strong>Modtager:</strong> {", ".join(item["to"])}</li>
+  <li><strong>Afsender:</strong> {item["from"]}</li>
+  <li><strong>Emne:</strong> {item["subject"]}</li>
+  <li><strong>Email ID:</strong> {item["email_id"]}</li>
+  <li><strong>Hændelse:</strong> {item["event_type"]}</li>
+</ul>
+"""
+        )
+    return subject, "<hr>".join(sections)
+
+
+def send_digest(items):
+    """Send one notification email covering all items. Returns True if sent (or logged in dev mode)."""
+    subject, body_html = build_digest(items)
+
+    if not getattr(settings, "RESEND_API_KEY", None):
+        logger.info(f"[WEBHOOK] {subject} — no API key, skipping notification")
+        return True
+
+    try:
+        send_via_resend(
+            {
+                "from": settings.DEFAULT_FROM_EMAIL,
+                "to": [BOUNCE_NOTIFICATION_RECIPIENT],
+                "subject": subject,
+                "html": body_html,
+            }
+        )
+        logger.info(f"[WEBHOOK] Sent digest notification for {len(items)} event(s)")
+        return True
+    except Exception as e:
+        logger.error(f"[WEBHOOK] Failed to send digest notification: {e}")
+        return False
+
+
+def process_pending_events(batch_size=100, max_batches=None):
+    """
+    Process all pending events in batches and send one digest for the whole run.
+    Returns a dict with counts.
+    """
+    processed = 0
+    items = []
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count, batch_items = process_batch(batch_size)
+        if not count:
+            break
+        processed += count
+        items.extend(batch_items)
+        batches += 1
+
+    notified = send_digest(items) if items else False
+    if items and not notified:
+        WebhookEvent.objects.filter(pk__in=[item["event_id"] for item in items]).update(
+            processed_at=None, error_message="Digest notification failed"
+        )
+    return {"processed": processed, "reported": len(items), "notified": notified}
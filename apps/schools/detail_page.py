@@ -0,0 +1,65 @@
+"""
+Header data of the staff school detail page.
+
+The detail page used to build every section up front: participants, contact
+people, comments, enrollment history, files, recent activity, both seat
+buckets, the consumption overview and the enrollment cutoff, most of which
+nobody scrolls down to. The sections are now fragments of their own (the
+SchoolSection views) that HTMX loads once they come into view, and the page
+itself only renders the header.
+
+with_header_state() annotates the school lookup with what the header and the
+enrollment modal read besides the school and its kommune: the start of the
+current school year (for the fortsætterplads badge), the enrollment cutoff
+of the current school year, the next school year and whether the school has
+any activity logged (for the enrollment history toggle).
+"""
+
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef, Subquery
+
+from apps.audit.models import ActivityLog
+from apps.courses.models import Course
+
+from .models import School, SchoolYear
+
+
+def with_header_state(schools):
+    today = date.today()
+    current_year = SchoolYear.objects.filter(start_date__lte=today, end_date__gte=today).order_by("start_date")
+    current_start = Subquery(current_year.values("start_date")[:1])
+    next_year = SchoolYear.objects.filter(start_date__gt=current_start).order_by("start_date")
+    last_deadline = Course.objects.filter(
+        start_date__gte=current_start,
+        start_date__lte=Subquery(current_year.values("end_date")[:1]),
+        registration_deadline__isnull=False,
+    ).order_by("-registration_deadline")
+    activity = ActivityLog.objects.filter(
+        content_type=ContentType.objects.get_for_model(School), object_id=OuterRef("pk")
+    )
+    return schools.select_related("kommune").annotate(
+        current_year_start=current_start,
+        enrollment_cutoff=Subquery(last_deadline.values("registration_deadline")[:1]),
+        next_year_name=Subquery(next_year.values("name")[:1]),
+        next_year_start=Subquery(next_year.values("start_date")[:1]),
+        has_activity=Exists(activity),
+    )
+
+
+def enrollment_defaults(school):
+    """Enrollment modal context, as get_default_active_from() would compute it."""
+    if not hasattr(school, "enrollment_cutoff"):
+        school = with_header_state(School.objects.filter(pk=school.pk)).get()
+    today = date.today()
+    is_past_cutoff = bool(school.enrollment_cutoff and today > school.enrollment_cutoff)
+    default_active_from = today
+    if is_past_cutoff and school.next_year_start:
+        default_active_from = school.next_year_start
+    return {
+        "enrollment_cutoff": school.enrollment_cutoff,
+        "is_past_cutoff": is_past_cutoff,
+        "default_active_from": default_active_from,
+        "next_school_year_name": school.next_year_name if is_past_cutoff else None,
+    }
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schools", "0041_do_not_contact_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="kommune",
+            index=models.Index(
+                django.db.models.functions.text.Lower("fakturering_kontakt_email"), name="kommune_fakt_email_lower_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(django.db.models.functions.text.Lower("email"), name="person_email_lower_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="school",
+            index=models.Index(
+                django.db.models.functions.text.Lower("fakturering_kontakt_email"), name="school_fakt_email_lower_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schools", "0042_email_lower_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="person",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("schools", "0043_person_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="schoolyear",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -2,6 +2,7 @@ from datetime import date
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class InstitutionstypeChoice(models.TextChoices):
@@ -46,6 +47,9 @@ class Kommune(models.Model):
         ordering = ["name"]
         verbose_name = "Kommune"
         verbose_name_plural = "Kommuner"
+        indexes = [
+            models.Index(Lower("fakturering_kontakt_email"), name="kommune_fakt_email_lower_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -114,6 +118,7 @@ class SchoolYear(models.Model):
     start_date = models.DateField(verbose_name="Startdato", help_text="Typisk 1. august")
     end_date = models.DateField(verbose_name="Slutdato", help_text="Typisk 31. juli")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = SchoolYearManager()
 
@@ -251,6 +256,7 @@ class School(models.Model):
             models.Index(fields=["is_active", "name"]),
             models.Index(fields=["kommune"], name="schools_sch_kommune_fk_idx"),
             models.Index(fields=["is_active", "kommune"], name="schools_sch_active_kommune_idx"),
+            models.Index(Lower("fakturering_kontakt_email"), name="school_fakt_email_lower_idx"),
         ]
         constraints = [
             models.UniqueConstraint(fields=["name", "kommune"], name="unique_school_per_kommune"),
@@ -436,6 +442,10 @@ class School(models.Model):
         """School gets fortsætterplads if active_from is before current school year."""
         if not self.active_from:
             return False
+        # Annotated by apps.signups.seats.seat_state()
+        current_year_start = getattr(self, "current_year_start", None)
+        if current_year_start is not None:
+            return self.active_from < current_year_start
         from apps.schools.school_years import get_current_school_year
 
         try:
@@ -459,11 +469,13 @@ class School(models.Model):
         from apps.schools.school_years import get_school_year_dates
 
         first_year = self.get_first_school_year()
-        start, end = get_school_year_dates(first_year)
-        used = self.course_signups.filter(
-            course__start_date__gte=start,
-            course__start_date__lte=end,
-        ).count()
+        used = getattr(self, "first_year_used", None)
+        if used is None:
+            start, end = get_school_year_dates(first_year)
+            used = self.course_signups.filter(
+                course__start_date__gte=start,
+                course__start_date__lte=end,
+            ).count()
         return {
             "free": self.BASE_SEATS,
             "used": used,
@@ -477,11 +489,12 @@ class School(models.Model):
             return {"free": 0, "used": 0, "remaining": 0}
         from apps.schools.school_years import get_school_year_dates
 
-        first_year = self.get_first_school_year()
-        _, first_year_end = get_school_year_dates(first_year)
-        used = self.course_signups.filter(
-            course__start_date__gt=first_year_end,
-        ).count()
+        used = getattr(self, "fortsaetter_used", None)
+        if used is None:
+            _, first_year_end = get_school_year_dates(self.get_first_school_year())
+            used = self.course_signups.filter(
+                course__start_date__gt=first_year_end,
+            ).count()
         return {
             "free": self.FORTSAETTER_SEATS,
             "used": used,
@@ -490,9 +503,13 @@ class School(models.Model):
 
     def seats_for_course(self, course):
         """Get seat info relevant to a specific course's school year."""
+        return self.seats_for_date(course.start_date)
+
+    def seats_for_date(self, start_date):
+        """Get seat info for a course starting on start_date."""
         from apps.schools.school_years import calculate_school_year_for_date
 
-        course_year = calculate_school_year_for_date(course.start_date)
+        course_year = calculate_school_year_for_date(start_date)
         first_year = self.get_first_school_year()
         is_first_year = course_year == first_year
 
@@ -627,6 +644,7 @@ class Person(models.Model):
     is_koordinator = models.BooleanField(default=False, verbose_name="Koordinator")
     is_oekonomisk_ansvarlig = models.BooleanField(default=False, verbose_name="Økonomisk ansvarlig")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if self.pk:
@@ -639,6 +657,9 @@ class Person(models.Model):
         ordering = ["-is_koordinator", "-is_oekonomisk_ansvarlig", "name"]
         verbose_name = "Person"
         verbose_name_plural = "Personer"
+        indexes = [
+            models.Index(Lower("email"), name="person_email_lower_idx"),
+        ]
 
     def __str__(self):
         roles = ", ".join(self.roles) if self.roles else "Ingen rolle"
@@ -0,0 +1,89 @@
+"""
+Data version of the public school page.
+
+Schools bookmark their public page and reload it often, while the data on it
+rarely changes. Rendering it reads the people, every signup with its course,
+the enrollment history from the audit log, the consumption overview and the
+course materials. with_page_version() annotates the school lookup with the
+newest change time and the row count of everything the page shows, so the
+view can answer If-None-Match/If-Modified-Since with 304 and key the cached
+fragment on the version without touching any of it.
+
+Counts catch deletions, which leave no timestamp behind; that is also how
+a staff member removing a row from the enrollment history (which doesn't
+touch the school) shows up. Courses are taken globally because the
+consumption overview greys out years without published courses, and so are
+locations, whose names and addresses show up in every course's display name;
+editing a location doesn't touch its courses. The date is part of the
+version since the current school year, and what the page says about it,
+changes with it.
+"""
+
+import hashlib
+from datetime import date, datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.audit.models import ActivityLog
+from apps.core.models import ProjectSettings
+from apps.courses.models import Course, CourseMaterial, CourseSignUp, Location
+
+from .models import Person, School
+
+VERSION_FIELDS = (
+    "updated_at",
+    "kommune_updated_at",
+    "people_updated_at",
+    "people_count",
+    "signups_updated_at",
+    "signups_count",
+    "materials_uploaded_at",
+    "materials_count",
+    "courses_updated_at",
+    "locations_updated_at",
+    "locations_count",
+    "history_logged_at",
+    "history_count",
+)
+
+
+def _aggregate(queryset, aggregate):
+    """Aggregate over the whole (correlated) queryset as a scalar subquery."""
+    return Subquery(
+        queryset.order_by().annotate(total=Value(1)).values("total").annotate(value=aggregate).values("value")
+    )
+
+
+def with_page_version(schools):
+    people = Person.objects.filter(school=OuterRef("pk"))
+    signups = CourseSignUp.objects.filter(school=OuterRef("pk"))
+    materials = CourseMaterial.objects.filter(course__signups__school=OuterRef("pk"))
+    # The enrollment history is read from the school's own log entries (School.get_enrollment_history)
+    history = ActivityLog.objects.filter(
+        content_type=ContentType.objects.get_for_model(School), object_id=OuterRef("pk")
+    )
+    return schools.annotate(
+        kommune_updated_at=F("kommune__updated_at"),
+        people_updated_at=_aggregate(people, Max("updated_at")),
+        people_count=Coalesce(_aggregate(people, Count("pk")), 0),
+        signups_updated_at=_aggregate(signups, Max("updated_at")),
+        signups_count=Coalesce(_aggregate(signups, Count("pk")), 0),
+        materials_uploaded_at=_aggregate(materials, Max("uploaded_at")),
+        materials_count=Coalesce(_aggregate(materials, Count("pk", distinct=True)), 0),
+        courses_updated_at=Subquery(Course.objects.order_by("-updated_at").values("updated_at")[:1]),
+        locations_updated_at=Subquery(Location.objects.order_by("-updated_at").values("updated_at")[:1]),
+        locations_count=Coalesce(_aggregate(Location.objects.all(), Count("pk")), 0),
+        history_logged_at=_aggregate(history, Max("timestamp")),
+        history_count=Coalesce(_aggregate(history, Count("pk")), 0),
+    )
+
+
+def page_version(school):
+    """(version, last_modified) of a school from with_page_version()."""
+    site_settings = ProjectSettings.get()
+    values = [getattr(school, field) for field in VERSION_FIELDS]
+    values += [site_settings.updated_at, date.today()]
+    version = hashlib.sha1(repr(values).encode()).hexdigest()
+    return version, max(value for value in values if isinstance(value, datetime))
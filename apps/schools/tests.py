@@ -2,7 +2,11 @@ import re
 from datetime import date, timedelta
 
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from apps.courses.models import Course, CourseSignUp
@@ -685,6 +689,23 @@ class SchoolHardDeleteViewTest(TestCase):
         # Course signup should be gone too
         self.assertEqual(CourseSignUp.objects.filter(school=self.school).count(), 0)
 
+    def test_hard_delete_recounts_course_counters(self):
+        """Hard delete leaves no drift between the course counters and the signups."""
+        from apps.courses.models import Course, CourseSignUp, Location
+
+        location = Location.objects.create(name="Test Location")
+        course = Course.objects.create(start_date=date.today(), end_date=date.today(), location=location, capacity=2)
+        other_school = School.objects.create(name="Other School", adresse="Test Address", kommune="Test Kommune")
+        CourseSignUp.objects.create(course=course, school=self.school, participant_name="Deleted")
+        CourseSignUp.objects.create(course=course, school=other_school, participant_name="Kept")
+
+        self.client.login(username="harddeluser", password="testpass123")
+        self.client.post(reverse("schools:hard-delete", kwargs={"pk": self.school.pk}))
+
+        self.assertFalse(Course.objects.with_counter_drift().exists())
+        course.refresh_from_db()
+        self.assertEqual(course.signup_counter, 1)
+
 
 class SchoolSearchViewTest(TestCase):
     def setUp(self):
@@ -751,6 +772,14 @@ class SchoolSearchViewTest(TestCase):
         self.assertNotContains(response, "Alpha School")
         self.assertNotContains(response, "Beta School")
 
+    def test_unknown_sort_keeps_queryset_pagination(self):
+        """An unknown sort key (like the retired contact sort) pages in SQL in the default order."""
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.get(reverse("schools:list"), {"sort": "contact", "order": "desc"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.context["paginator"].object_list, QuerySet)
+        self.assertEqual([s.name for s in response.context["schools"]], ["Alpha School", "Beta School"])
+
 
 class FormValidationTest(TestCase):
     def setUp(self):
@@ -1074,6 +1103,94 @@ class SchoolPublicViewTest(TestCase):
         response = self.client.get(f"/school/{self.school.signup_token}/")
         self.assertContains(response, "Jane Smith")
 
+    def test_public_view_unchanged_page_is_not_modified(self):
+        """A repeat visit with the ETag gets 304 until the page's data changes."""
+        url = f"/school/{self.school.signup_token}/"
+        person = Person.objects.create(school=self.school, name="John Doe", is_koordinator=True)
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        person.phone = "12345678"
+        person.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "12345678")
+
+        etag = response["ETag"]
+        person.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "John Doe")
+
+    def test_public_view_location_edit_changes_page(self):
+        """Moving the location of a signed-up course gives a new ETag and the new town."""
+        from apps.courses.models import Course, CourseSignUp, Location
+
+        location = Location.objects.create(name="Hallen", municipality="Gammelby")
+        course = Course.objects.create(start_date=date.today(), end_date=date.today(), location=location, capacity=10)
+        CourseSignUp.objects.create(school=self.school, course=course, participant_name="Jane Smith")
+        url = f"/school/{self.school.signup_token}/"
+        etag = self.client.get(url)["ETag"]
+
+        location.municipality = "Nyby"
+        location.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Nyby")
+        self.assertNotContains(response, "Gammelby")
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_public_view_deleted_history_row_changes_page(self):
+        """Removing a row from the enrollment history gives a new ETag and drops the row from the cached page."""
+        from django.contrib.contenttypes.models import ContentType
+
+        from apps.audit.models import ActivityLog
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        school_ct = ContentType.objects.get_for_model(School)
+        for changes in (
+            {"enrolled_at": {"old": None, "new": "2024-01-15"}},
+            {"opted_out_at": {"old": None, "new": "2024-06-01"}},
+        ):
+            log = ActivityLog.objects.create(
+                content_type=school_ct,
+                object_id=self.school.pk,
+                object_repr=str(self.school),
+                action="UPDATE",
+                changes=changes,
+            )
+        url = f"/school/{self.school.signup_token}/"
+        response = self.client.get(url)
+        self.assertContains(response, "Frameldt")
+        etag = response["ETag"]
+
+        User.objects.create_user(username="historystaff", password="pw", is_staff=True)
+        staff = Client()
+        staff.login(username="historystaff", password="pw")
+        staff.post(reverse("schools:delete-enrollment-history", kwargs={"pk": self.school.pk, "log_id": log.pk}))
+        self.assertFalse(ActivityLog.objects.filter(pk=log.pk).exists())
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Frameldt")
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_public_view_renders_cached_fragment_with_one_query(self):
+        """A new visitor of an unchanged page costs only the school and version lookup."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = f"/school/{self.school.signup_token}/"
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            second = Client().get(url)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(second.content, first.content)
+
     def test_public_view_has_edit_buttons(self):
         """Public view shows edit buttons for kontaktpersoner."""
         Person.objects.create(school=self.school, name="John", is_koordinator=True)
@@ -1176,12 +1293,12 @@ class SchoolDetailMergedPeopleTest(TestCase):
 
         response = self.client.get(reverse("schools:detail", args=[self.school.pk]))
         self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse("schools:section-people", args=[self.school.pk]))
+        self.assertContains(response, reverse("schools:section-participants", args=[self.school.pk]))
+        response = self.client.get(reverse("schools:section-people", args=[self.school.pk]))
         self.assertContains(response, "Contact Person")
+        response = self.client.get(reverse("schools:section-participants", args=[self.school.pk]))
         self.assertContains(response, "Signup Person")
-        # Verify both names appear on page
-        content = response.content.decode()
-        self.assertIn("Contact Person", content)
-        self.assertIn("Signup Person", content)
 
     def test_signups_show_course_link(self):
         """Signups show link to course."""
@@ -1193,7 +1310,7 @@ class SchoolDetailMergedPeopleTest(TestCase):
             school=self.school, course=course, participant_name="Signup Person", participant_title="Laerer"
         )
 
-        response = self.client.get(reverse("schools:detail", args=[self.school.pk]))
+        response = self.client.get(reverse("schools:section-participants", args=[self.school.pk]))
         self.assertContains(response, f'href="{reverse("courses:detail", args=[course.pk])}"')
 
 
@@ -1346,7 +1463,7 @@ class PersonDetailTitelTest(TestCase):
     def test_detail_shows_person_titel(self):
         """School detail shows person titel."""
         self.client.login(username="personuser", password="testpass123")
-        response = self.client.get(reverse("schools:detail", kwargs={"pk": self.school.pk}))
+        response = self.client.get(reverse("schools:section-people", kwargs={"pk": self.school.pk}))
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "skoleleder")  # lowercase due to |lower filter
 
@@ -1420,6 +1537,82 @@ class SchoolFormBillingFieldsTest(TestCase):
         # not the school itself.
 
 
+class SchoolDetailSectionsTest(TestCase):
+    SECTIONS = ["people", "participants", "consumption", "comments", "files", "activity", "enrollment-history"]
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="sectionuser", password="testpass123", is_staff=True)
+        self.client.login(username="sectionuser", password="testpass123")
+        today = date.today()
+        start_year = today.year if today.month >= 8 else today.year - 1
+        SchoolYear.objects.get_or_create(
+            name=f"{start_year}/{str(start_year + 1)[-2:]}",
+            defaults={"start_date": date(start_year, 8, 1), "end_date": date(start_year + 1, 7, 31)},
+        )
+        self.school = School.objects.create(
+            name="Section School",
+            adresse="Testvej 1",
+            kommune="København",
+            enrolled_at=date(2024, 1, 15),
+            active_from=date(2024, 8, 1),
+        )
+
+    def test_detail_links_every_section(self):
+        response = self.client.get(reverse("schools:detail", kwargs={"pk": self.school.pk}))
+        for section in self.SECTIONS:
+            self.assertContains(response, reverse(f"schools:section-{section}", kwargs={"pk": self.school.pk}))
+
+    def test_detail_does_not_load_sections(self):
+        """The header needs one school query besides the session, the user and the nav's group lookup."""
+        Person.objects.create(school=self.school, name="Contact Person")
+        SchoolComment.objects.create(school=self.school, comment="Hidden comment")
+        self.client.get(reverse("schools:detail", kwargs={"pk": self.school.pk}))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("schools:detail", kwargs={"pk": self.school.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 4)
+        self.assertNotContains(response, "Contact Person")
+        self.assertNotContains(response, "Hidden comment")
+        self.assertContains(response, "Fortsætterplads")
+
+    def test_enrollment_modal_matches_default_active_from(self):
+        from apps.courses.models import Location
+        from apps.schools.models import get_default_active_from
+
+        self.school.enrolled_at = None
+        self.school.save()
+        location = Location.objects.create(name="Cutoff Location")
+        Course.objects.create(
+            start_date=date.today(),
+            end_date=date.today(),
+            registration_deadline=date.today() - timedelta(days=1),
+            location=location,
+            capacity=10,
+        )
+        response = self.client.get(reverse("schools:detail", kwargs={"pk": self.school.pk}))
+        self.assertTrue(response.context["is_past_cutoff"])
+        self.assertEqual(response.context["default_active_from"], get_default_active_from())
+
+    def test_sections_render(self):
+        Person.objects.create(school=self.school, name="Contact Person")
+        SchoolComment.objects.create(school=self.school, comment="Section comment")
+        expected = {"people": "Contact Person", "comments": "Section comment", "enrollment-history": "Tilmeldt"}
+        for section in self.SECTIONS:
+            response = self.client.get(reverse(f"schools:section-{section}", kwargs={"pk": self.school.pk}))
+            self.assertEqual(response.status_code, 200, section)
+            self.assertNotContains(response, "<html")
+            if section in expected:
+                self.assertContains(response, expected[section])
+
+    def test_sections_require_staff(self):
+        User.objects.create_user(username="regular", password="testpass123", is_staff=False)
+        self.client.login(username="regular", password="testpass123")
+        for section in self.SECTIONS:
+            response = self.client.get(reverse(f"schools:section-{section}", kwargs={"pk": self.school.pk}))
+            self.assertIn(response.status_code, [302, 403])
+
+
 class SchoolDetailBillingTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -2036,7 +2229,9 @@ class KontaktpersonerKursusdeltagereIntegrationTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Kontaktpersoner")
         self.assertContains(response, "Kursusdeltagere")
+        response = self.client.get(reverse("schools:section-people", kwargs={"pk": self.school.pk}))
         self.assertContains(response, "Contact Person")
+        response = self.client.get(reverse("schools:section-participants", kwargs={"pk": self.school.pk}))
         self.assertContains(response, "Course Participant")
 
     def test_public_view_shows_both_boxes(self):
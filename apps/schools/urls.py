@@ -11,6 +11,18 @@ urlpatterns = [
     path("kommuner/<str:kommune>/", views.KommuneDetailView.as_view(), name="kommune-detail"),
     path("create/", views.SchoolCreateView.as_view(), name="create"),
     path("<int:pk>/", views.SchoolDetailView.as_view(), name="detail"),
+    # Sections of the detail page, loaded by HTMX
+    path("<int:pk>/sections/people/", views.SchoolPeopleSectionView.as_view(), name="section-people"),
+    path("<int:pk>/sections/participants/", views.SchoolParticipantsSectionView.as_view(), name="section-participants"),
+    path("<int:pk>/sections/consumption/", views.SchoolConsumptionSectionView.as_view(), name="section-consumption"),
+    path("<int:pk>/sections/comments/", views.SchoolCommentsSectionView.as_view(), name="section-comments"),
+    path("<int:pk>/sections/files/", views.SchoolFilesSectionView.as_view(), name="section-files"),
+    path("<int:pk>/sections/activity/", views.SchoolActivitySectionView.as_view(), name="section-activity"),
+    path(
+        "<int:pk>/sections/enrollment-history/",
+        views.SchoolEnrollmentHistorySectionView.as_view(),
+        name="section-enrollment-history",
+    ),
     path("<int:pk>/edit/", views.SchoolUpdateView.as_view(), name="update"),
     path("<int:pk>/delete/", views.SchoolDeleteView.as_view(), name="delete"),
     path("<int:pk>/hard-delete/", views.SchoolHardDeleteView.as_view(), name="hard-delete"),
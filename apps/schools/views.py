@@ -5,8 +5,11 @@ from django.db.models import Count, F, Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.utils.html import format_html
+from django.utils.http import http_date, quote_etag
 from django.views import View
 from django.views.generic import CreateView, DetailView, ListView, UpdateView
 
@@ -17,6 +20,7 @@ from apps.courses.forms import CourseSignUpParticipantForm
 from apps.courses.models import CourseSignUp
 from apps.schools.consumption import get_consumption_overview
 
+from .detail_page import enrollment_defaults, with_header_state
 from .forms import (
     EnrollmentDatesForm,
     PersonForm,
@@ -26,7 +30,8 @@ from .forms import (
     SchoolForm,
 )
 from .mixins import SchoolFilterMixin
-from .models import Person, School, SchoolComment, SchoolFile, SchoolYear
+from .models import Person, School, SchoolComment, SchoolFile
+from .public_page import page_version, with_page_version
 
 
 @method_decorator(staff_required, name="dispatch")
@@ -159,7 +164,6 @@ class SchoolListView(SchoolFilterMixin, SortableMixin, ListView):
         "kommune": "kommune",
         "school_year": "active_from",
         "seats": "_remaining_seats",  # Special handling for computed property
-        "contact": "_last_contact",  # Special handling for latest contact
     }
     default_sort = "name"
 
@@ -177,12 +181,6 @@ class SchoolListView(SchoolFilterMixin, SortableMixin, ListView):
             reverse = order == "desc"
             if sort == "seats":
                 queryset.sort(key=lambda s: s.used_seats, reverse=reverse)
-            elif sort == "contact":
-
-                def contact_key(s):
-                    return getattr(s, "last_contact_date", None) or date.min
-
-                queryset.sort(key=contact_key, reverse=reverse)
             elif sort == "name":
                 queryset.sort(key=lambda s: s.name.lower(), reverse=reverse)
             elif sort == "kommune":
@@ -192,17 +190,9 @@ class SchoolListView(SchoolFilterMixin, SortableMixin, ListView):
             return queryset
 
         # For computed fields with Django QuerySet, convert to list and sort
-        if sort in ("seats", "contact"):
+        if sort == "seats":
             queryset = list(queryset)
-            reverse = order == "desc"
-            if sort == "seats":
-                queryset.sort(key=lambda s: s.used_seats, reverse=reverse)
-            elif sort == "contact":
-
-                def contact_key(s):
-                    return getattr(s, "last_contact_date", None) or date.min
-
-                queryset.sort(key=contact_key, reverse=reverse)
+            queryset.sort(key=lambda s: s.used_seats, reverse=order == "desc")
             return queryset
 
         # Use default mixin sorting for other fields
@@ -239,72 +229,96 @@ class SchoolCreateView(CreateView):
 
 @method_decorator(staff_required, name="dispatch")
 class SchoolDetailView(DetailView):
+    """The header of the school page; the sections load as SchoolSection fragments."""
+
     model = School
     template_name = "schools/school_detail.html"
     context_object_name = "school"
 
-    def get_context_data(self, **kwargs):
-        from apps.schools.models import get_default_active_from, get_enrollment_cutoff_date
-        from apps.schools.school_years import get_current_school_year
+    def get_queryset(self):
+        return with_header_state(super().get_queryset())
 
+    def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Resolve effective billing source: kommune row when "kommunen betaler",
         # else the school's own fakturering_* fields.
-        if self.object.kommunen_betaler and self.object.kommune:
-            if self.object.kommune.has_billing_info():
-                context["billing_source"] = self.object.kommune
-                context["billing_from_kommune"] = True
-            else:
-                context["billing_source"] = None
-                context["billing_from_kommune"] = False
+        if self.object.kommunen_betaler and self.object.kommune and self.object.kommune.has_billing_info():
+            context["billing_source"] = self.object.kommune
+            context["billing_from_kommune"] = True
         else:
             context["billing_source"] = None
             context["billing_from_kommune"] = False
-        context["kursusdeltagere"] = self.object.course_signups.select_related("course").order_by(
-            "participant_name", "-course__start_date"
-        )
-        context["kontaktpersoner"] = self.object.people.all()
-        context["school_comments"] = self.object.school_comments.select_related("created_by").all()
-        context["enrollment_history"] = self.object.get_enrollment_history()
-        context["person_form"] = PersonForm()
-        context["comment_form"] = SchoolCommentForm()
-        context["recent_activities"] = self.object.activity_logs.select_related("user", "content_type")[:5]
         context["today"] = date.today()
-        context["school_files"] = self.object.files.select_related("uploaded_by").all()
-
-        # Seat calculation context
-        context["first_year_seats"] = self.object.get_first_year_seats()
-        context["fortsaetter_seats"] = self.object.get_fortsaetter_seats()
-        context["consumption_overview"] = get_consumption_overview(self.object)
-
-        # Determine which bucket is "current"
-        if self.object.active_from:
-            try:
-                current_year = get_current_school_year()
-                first_year_name = self.object.get_first_school_year()
-                context["is_in_first_year"] = current_year.name == first_year_name
-                context["is_waiting_for_first_year"] = self.object.active_from > current_year.end_date
-            except SchoolYear.DoesNotExist:
-                context["is_in_first_year"] = False
-                context["is_waiting_for_first_year"] = False
-
-        # Enrollment cutoff info for modal
-        try:
-            current_sy = get_current_school_year()
-            cutoff = get_enrollment_cutoff_date(current_sy)
-            default_active_from = get_default_active_from()
-            context["enrollment_cutoff"] = cutoff
-            context["default_active_from"] = default_active_from
-            context["is_past_cutoff"] = cutoff and date.today() > cutoff
-            if context["is_past_cutoff"]:
-                next_sy = SchoolYear.objects.filter(start_date__gt=current_sy.start_date).order_by("start_date").first()
-                context["next_school_year"] = next_sy
-        except Exception:
-            context["is_past_cutoff"] = False
+        context.update(enrollment_defaults(self.object))
+        return context
+
+
+@method_decorator(staff_required, name="dispatch")
+class SchoolSectionView(DetailView):
+    """One section of the school detail page, fetched by HTMX when it comes into view."""
 
+    model = School
+    context_object_name = "school"
+
+    def get_section_context(self):
+        return {}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_section_context())
         return context
 
 
+class SchoolPeopleSectionView(SchoolSectionView):
+    template_name = "schools/sections/people.html"
+
+    def get_section_context(self):
+        return {"kontaktpersoner": self.object.people.all()}
+
+
+class SchoolParticipantsSectionView(SchoolSectionView):
+    template_name = "schools/sections/participants.html"
+
+    def get_section_context(self):
+        signups = self.object.course_signups.select_related("course", "course__location")
+        return {"kursusdeltagere": signups.order_by("participant_name", "-course__start_date")}
+
+
+class SchoolConsumptionSectionView(SchoolSectionView):
+    template_name = "schools/sections/consumption.html"
+
+    def get_section_context(self):
+        return {"consumption_overview": get_consumption_overview(self.object)}
+
+
+class SchoolCommentsSectionView(SchoolSectionView):
+    template_name = "schools/sections/comments.html"
+
+    def get_section_context(self):
+        return {"school_comments": self.object.school_comments.select_related("created_by").all()}
+
+
+class SchoolFilesSectionView(SchoolSectionView):
+    template_name = "schools/sections/files.html"
+
+    def get_section_context(self):
+        return {"school_files": self.object.files.select_related("uploaded_by").all()}
+
+
+class SchoolActivitySectionView(SchoolSectionView):
+    template_name = "schools/sections/activity.html"
+
+    def get_section_context(self):
+        return {"recent_activities": self.object.activity_logs.select_related("user", "content_type")[:5]}
+
+
+class SchoolEnrollmentHistorySectionView(SchoolSectionView):
+    template_name = "schools/sections/enrollment_history.html"
+
+    def get_section_context(self):
+        return {"enrollment_history": self.object.get_enrollment_history()}
+
+
 @method_decorator(staff_required, name="dispatch")
 class SchoolUpdateView(UpdateView):
     model = School
@@ -423,13 +437,17 @@ class SchoolHardDeleteView(View):
         )
 
     def post(self, request, pk):
-        from apps.courses.models import CourseSignUp
+        from apps.courses.models import Course, CourseSignUp
 
         school = School.objects.get(pk=pk)
         school_name = school.name
 
-        # Delete course signups first (they have PROTECT)
-        CourseSignUp.objects.filter(school=school).delete()
+        # Delete course signups first (they have PROTECT). A queryset delete skips
+        # CourseSignUp.delete(), so the affected courses' counters are recounted.
+        signups = CourseSignUp.objects.filter(school=school)
+        course_ids = set(signups.values_list("course_id", flat=True))
+        signups.delete()
+        Course.objects.filter(pk__in=course_ids).recount_signups()
 
         # Now hard delete the school (bypassing soft delete)
         School.objects.filter(pk=pk).delete()
@@ -928,7 +946,13 @@ class SchoolFileDeleteView(View):
 
 
 class SchoolPublicView(DetailView):
-    """Public read-only view of school for token-based access."""
+    """Public read-only view of school for token-based access.
+
+    Answers conditional requests from the page's data version (see
+    public_page.py): an unchanged page is a 304, and a changed one is
+    rendered from a fragment cached under the new version when another
+    visitor already rendered it.
+    """
 
     model = School
     template_name = "schools/school_public.html"
@@ -937,11 +961,26 @@ class SchoolPublicView(DetailView):
     slug_url_kwarg = "token"
 
     def get_queryset(self):
-        return School.objects.filter(signup_token__isnull=False).exclude(signup_token="")
+        return with_page_version(School.objects.filter(signup_token__isnull=False).exclude(signup_token=""))
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        self.data_version, last_modified = page_version(self.object)
+        etag = quote_etag(self.data_version)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified.timestamp())
+        if response is None:
+            response = self.render_to_response(self.get_context_data(object=self.object))
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         school = self.object
+        context["data_version"] = self.data_version
+
+        # Everything below is only evaluated when the cached fragment is missing
 
         # Kontaktpersoner - simple list, no email matching
         context["kontaktpersoner"] = school.people.all()
@@ -951,25 +990,8 @@ class SchoolPublicView(DetailView):
             "participant_name", "-course__start_date"
         )
 
-        context["enrollment_history"] = school.get_enrollment_history()
-
-        # Seat calculation context
-        context["first_year_seats"] = school.get_first_year_seats()
-        context["fortsaetter_seats"] = school.get_fortsaetter_seats()
-        context["consumption_overview"] = get_consumption_overview(school)
-
-        if school.active_from:
-            from apps.schools.models import SchoolYear
-            from apps.schools.school_years import get_current_school_year
-
-            try:
-                current_year = get_current_school_year()
-                first_year_name = school.get_first_school_year()
-                context["is_in_first_year"] = current_year.name == first_year_name
-                context["is_waiting_for_first_year"] = school.active_from > current_year.end_date
-            except SchoolYear.DoesNotExist:
-                context["is_in_first_year"] = False
-                context["is_waiting_for_first_year"] = False
+        context["enrollment_history"] = SimpleLazyObject(school.get_enrollment_history)
+        context["consumption_overview"] = SimpleLazyObject(lambda: get_consumption_overview(school))
 
         # Global site settings (samarbejdsvilkår + login info)
         from apps.core.models import ProjectSettings
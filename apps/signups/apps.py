@@ -5,3 +5,6 @@ class SignupsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.signups"
     verbose_name = "Tilmeldinger"
+
+    def ready(self):
+        from apps.signups import signals  # noqa
@@ -2,12 +2,12 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import HTML, Column, Div, Field, Layout, Row, Submit
 from django import forms
 from django.core.exceptions import ValidationError
-from django.utils import timezone
 from django.utils.safestring import mark_safe
 
 from apps.courses.models import Course
 from apps.schools.models import School, TitelChoice
 
+from . import options
 from .models import FieldType
 
 
@@ -56,23 +56,14 @@ class SchoolChoiceField(forms.ModelChoiceField):
     """Custom field to display school name with kommune."""
 
     def label_from_instance(self, obj):
-        return f"{obj.name} ({obj.kommune.name if obj.kommune else ''})"
+        return options.school_label(obj)
 
 
 class CourseChoiceField(forms.ModelChoiceField):
     """Custom field to display course with available seats."""
 
     def label_from_instance(self, obj):
-        # Format available seats
-        available = obj.spots_remaining
-        if available <= 0:
-            seats_text = "Fuldt"
-        elif available == 1:
-            seats_text = "1 ledig plads"
-        else:
-            seats_text = f"{available} ledige pladser"
-
-        return f"{obj.display_name} - {seats_text}"
+        return options.course_label(obj)
 
 
 class CourseSignupForm(DynamicFieldsMixin, forms.Form):
@@ -89,12 +80,9 @@ class CourseSignupForm(DynamicFieldsMixin, forms.Form):
         super().__init__(*args, **kwargs)
         self.locked_school = locked_school
 
-        # Set querysets
-        self.fields["course"].queryset = Course.objects.filter(
-            is_published=True,
-            start_date__gte=timezone.now().date(),
-            registration_deadline__gte=timezone.now().date(),
-        ).order_by("start_date")
+        # Querysets validate the submitted values; the options are rendered from the cache
+        self.fields["course"].queryset = options.open_courses()
+        self.fields["course"].choices = [("", self.fields["course"].empty_label), *options.course_options()]
 
         if locked_school:
             # Lock to specific school — use Django's field.disabled so the
@@ -105,9 +93,8 @@ class CourseSignupForm(DynamicFieldsMixin, forms.Form):
             self.fields["school"].empty_label = None
             self.fields["school"].disabled = True
         else:
-            self.fields["school"].queryset = (
-                School.objects.active().filter(enrolled_at__isnull=False, opted_out_at__isnull=True).order_by("name")
-            )
+            self.fields["school"].queryset = options.signup_schools()
+            self.fields["school"].choices = [("", self.fields["school"].empty_label), *options.school_options()]
 
         # Add dynamic fields if signup_page is provided
         if signup_page:
@@ -239,14 +226,8 @@ class SchoolSignupForm(DynamicFieldsMixin, forms.Form):
     def __init__(self, *args, signup_page=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Get unique municipalities from active schools
-        municipalities = (
-            School.objects.active()
-            .exclude(kommune__isnull=True)
-            .values_list("kommune__name", flat=True)
-            .distinct()
-            .order_by("kommune__name")
-        )
+        # Unique municipalities of active schools
+        municipalities = options.municipality_options()
         self.fields["municipality"].choices = [("", "Vælg kommune...")] + [(m, m) for m in municipalities]
 
         # Add empty choice and set choices for titel fields
@@ -0,0 +1,150 @@
+"""
+Cached option lists and page configuration for the public signup forms.
+
+The course signup, school signup and webinar pages are public and see their
+heaviest traffic right after a course is announced. Every load used to fetch
+the SignupPage with its form fields and build the dropdowns from scratch:
+each open course (plus its location) and each enrolled school (plus its
+kommune). None of that changes between two page loads, so the (value, label)
+lists and the SignupPage are kept in the cache and dropped by the handlers in
+signals.py when a course, signup, location, school, kommune, page or form
+field is saved or deleted. The seat info messages shown by the seat check
+are cached the same way.
+
+The forms keep their querysets for validation; only rendering uses the
+cached lists. Course labels include the free seats and the list depends on
+today's date, so the course key carries the date. OPTIONS_TIMEOUT bounds
+staleness from writes that bypass signals (QuerySet.update()).
+"""
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.core.models import ProjectSettings
+from apps.courses.models import Course
+from apps.schools.models import Kommune, School
+
+from .models import SeatInfoContent, SignupPage, SignupPageType
+
+OPTIONS_TIMEOUT = 60 * 10
+
+COURSE_OPTIONS_KEY = "signups:course-options:{date}"
+SCHOOL_OPTIONS_KEY = "signups:school-options"
+MUNICIPALITY_OPTIONS_KEY = "signups:municipality-options"
+KOMMUNE_OPTIONS_KEY = "signups:kommune-options"
+SIGNUP_PAGE_KEY = "signups:page:{page_type}"
+SEAT_INFO_CONTENT_KEY = "signups:seat-info-content"
+
+
+def course_label(course):
+    """Course name with dates, location and free seats."""
+    available = course.spots_remaining
+    if available <= 0:
+        seats_text = "Fuldt"
+    elif available == 1:
+        seats_text = "1 ledig plads"
+    else:
+        seats_text = f"{available} ledige pladser"
+    return f"{course.display_name} - {seats_text}"
+
+
+def school_label(school):
+    return f"{school.name} ({school.kommune.name if school.kommune else ''})"
+
+
+def open_courses():
+    """Published courses that can still be signed up for."""
+    today = timezone.now().date()
+    return Course.objects.filter(
+        is_published=True,
+        start_date__gte=today,
+        registration_deadline__gte=today,
+    ).order_by("start_date")
+
+
+def signup_schools():
+    """Schools that may sign participants up for courses."""
+    return School.objects.active().filter(enrolled_at__isnull=False, opted_out_at__isnull=True).order_by("name")
+
+
+def course_options():
+    key = COURSE_OPTIONS_KEY.format(date=timezone.now().date().isoformat())
+    options = cache.get(key)
+    if options is None:
+        options = [(course.pk, course_label(course)) for course in open_courses().select_related("location")]
+        cache.set(key, options, OPTIONS_TIMEOUT)
+    return options
+
+
+def school_options():
+    options = cache.get(SCHOOL_OPTIONS_KEY)
+    if options is None:
+        schools = signup_schools().select_related("kommune").only("name", "kommune__name")
+        options = [(school.pk, school_label(school)) for school in schools]
+        cache.set(SCHOOL_OPTIONS_KEY, options, OPTIONS_TIMEOUT)
+    return options
+
+
+def municipality_options():
+    """Names of kommuner that have at least one active school."""
+    options = cache.get(MUNICIPALITY_OPTIONS_KEY)
+    if options is None:
+        options = list(
+            School.objects.active()
+            .exclude(kommune__isnull=True)
+            .values_list("kommune__name", flat=True)
+            .distinct()
+            .order_by("kommune__name")
+        )
+        cache.set(MUNICIPALITY_OPTIONS_KEY, options, OPTIONS_TIMEOUT)
+    return options
+
+
+def kommune_options():
+    options = cache.get(KOMMUNE_OPTIONS_KEY)
+    if options is None:
+        options = list(Kommune.objects.order_by("name").values_list("pk", "name"))
+        cache.set(KOMMUNE_OPTIONS_KEY, options, OPTIONS_TIMEOUT)
+    return options
+
+
+def get_signup_page(page_type):
+    """The SignupPage of page_type with its form fields prefetched, or None."""
+    key = SIGNUP_PAGE_KEY.format(page_type=page_type)
+    page = cache.get(key)
+    if page is None:
+        # False marks a missing page so it isn't looked up on every request
+        page = SignupPage.objects.prefetch_related("form_fields").filter(page_type=page_type).first() or False
+        cache.set(key, page, OPTIONS_TIMEOUT)
+    return page or None
+
+
+def seat_info_content():
+    """The seat info messages by scenario, or {} when they are switched off."""
+    content = cache.get(SEAT_INFO_CONTENT_KEY)
+    if content is None:
+        content = {}
+        if ProjectSettings.get().show_seat_info_messages:
+            content = {sc.scenario: {"title": sc.title, "content": sc.content} for sc in SeatInfoContent.objects.all()}
+        cache.set(SEAT_INFO_CONTENT_KEY, content, OPTIONS_TIMEOUT)
+    return content
+
+
+def invalidate_course_options():
+    cache.delete(COURSE_OPTIONS_KEY.format(date=timezone.now().date().isoformat()))
+
+
+def invalidate_school_options():
+    cache.delete_many([SCHOOL_OPTIONS_KEY, MUNICIPALITY_OPTIONS_KEY])
+
+
+def invalidate_kommune_options():
+    cache.delete_many([SCHOOL_OPTIONS_KEY, MUNICIPALITY_OPTIONS_KEY, KOMMUNE_OPTIONS_KEY])
+
+
+def invalidate_signup_pages():
+    cache.delete_many([SIGNUP_PAGE_KEY.format(page_type=page_type) for page_type in SignupPageType.values])
+
+
+def invalidate_seat_info_content():
+    cache.delete(SEAT_INFO_CONTENT_KEY)
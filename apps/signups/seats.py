@@ -0,0 +1,71 @@
+"""
+Seat state for the public course signup form.
+
+The form asks CheckSchoolSeatsView for the selected school's seats every time
+the school or the course changes. Going through School.seats_for_course(),
+the koordinator lookup and the økonomisk ansvarlig check took about eight
+queries. seat_state() gets the same answer from one School query annotated
+with the course's start date, the school's signup count in its first school
+year and after it, the current school year's start, the koordinator and the
+økonomisk ansvarlig check. The seat rules themselves stay on School, which
+uses the annotated values when they are present.
+
+A school year runs from August 1 to July 31, so the year a date belongs to is
+its calendar year, minus one before August. Comparing that index for the
+course dates with the one of active_from puts each signup in its bucket
+without knowing the school's first year up front.
+"""
+
+from datetime import date
+
+from django.db.models import Case, Count, Exists, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, ExtractYear
+
+from apps.courses.models import Course, CourseSignUp
+from apps.schools.models import Person, School, SchoolYear
+
+
+def school_year_index(field):
+    """Start year of the school year the date in field falls into."""
+    return ExtractYear(field) - Case(
+        When(**{f"{field}__month__lt": 8}, then=Value(1)), default=Value(0), output_field=IntegerField()
+    )
+
+
+def _count(signups):
+    return Coalesce(Subquery(signups.annotate(n=Count("pk")).values("n")), 0)
+
+
+def seat_state(school_id, course_id=None):
+    """
+    The school with everything CheckSchoolSeatsView needs annotated, or None.
+
+    With a course_id, course_start_date is annotated too (None when the
+    course doesn't exist) and School.seats_for_date() needs no further
+    queries.
+    """
+    today = date.today()
+    signups = (
+        CourseSignUp.objects.filter(school=OuterRef("pk"))
+        .annotate(course_year=school_year_index("course__start_date"))
+        .order_by()
+        .values("school")
+    )
+    koordinator = Person.objects.filter(school=OuterRef("pk"), is_koordinator=True)
+    schools = School.objects.filter(pk=school_id)
+    if course_id:
+        schools = schools.annotate(
+            course_start_date=Subquery(Course.objects.filter(pk=course_id).values("start_date")),
+        )
+    return schools.annotate(
+        first_year_index=school_year_index("active_from"),
+        first_year_used=_count(signups.filter(course_year=OuterRef("first_year_index"))),
+        fortsaetter_used=_count(signups.filter(course_year__gt=OuterRef("first_year_index"))),
+        current_year_start=Subquery(
+            SchoolYear.objects.filter(start_date__lte=today, end_date__gte=today).values("start_date")[:1]
+        ),
+        koordinator_name=Subquery(koordinator.values("name")[:1]),
+        koordinator_email=Subquery(koordinator.values("email")[:1]),
+        koordinator_phone=Subquery(koordinator.values("phone")[:1]),
+        has_oekonomisk_ansvarlig=Exists(Person.objects.filter(school=OuterRef("pk"), is_oekonomisk_ansvarlig=True)),
+    ).first()
@@ -0,0 +1,40 @@
+"""Drop the cached signup form options when the data behind them changes."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import ProjectSettings
+from apps.courses.models import Course, CourseSignUp, Location
+from apps.schools.models import Kommune, School
+
+from . import options
+from .models import SeatInfoContent, SignupFormField, SignupPage
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=CourseSignUp)
+@receiver([post_save, post_delete], sender=Location)
+def invalidate_course_options(sender, **kwargs):
+    options.invalidate_course_options()
+
+
+@receiver([post_save, post_delete], sender=School)
+def invalidate_school_options(sender, **kwargs):
+    options.invalidate_school_options()
+
+
+@receiver([post_save, post_delete], sender=Kommune)
+def invalidate_kommune_options(sender, **kwargs):
+    options.invalidate_kommune_options()
+
+
+@receiver([post_save, post_delete], sender=SignupPage)
+@receiver([post_save, post_delete], sender=SignupFormField)
+def invalidate_signup_pages(sender, **kwargs):
+    options.invalidate_signup_pages()
+
+
+@receiver([post_save, post_delete], sender=SeatInfoContent)
+@receiver([post_save, post_delete], sender=ProjectSettings)
+def invalidate_seat_info_content(sender, **kwargs):
+    options.invalidate_seat_info_content()
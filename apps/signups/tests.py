@@ -1,12 +1,16 @@
 from datetime import date, timedelta
 
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from apps.courses.models import Course, CourseSignUp, Location
-from apps.schools.models import Person, School
+from apps.schools.models import Kommune, Person, School
 
+from . import options
 from .models import (
     FieldType,
     SignupFormField,
@@ -121,6 +125,28 @@ class CourseSignupViewTest(TestCase):
         self.assertEqual(signups[1].participant_name, "Second Person")
         self.assertEqual(signups[1].participant_email, "second@example.com")
 
+    def test_course_signup_cannot_overbook(self):
+        """A submission that doesn't fit in the remaining seats is rejected as a whole."""
+        self.course.capacity = 2
+        self.course.save()
+        CourseSignUp.objects.create(course=self.course, school=self.school, participant_name="Existing")
+
+        response = self.client.post(
+            reverse("signup:course"),
+            {
+                "course": self.course.pk,
+                "school": self.school.pk,
+                "participant_name_0": "First Person",
+                "participant_email_0": "first@example.com",
+                "participant_name_1": "Second Person",
+                "participant_email_1": "second@example.com",
+            },
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, "kun 1 ledige pladser", status_code=409)
+        self.assertEqual(CourseSignUp.objects.count(), 1)
+
     def test_course_signup_success_loads(self):
         """Course signup success page should load."""
         response = self.client.get(reverse("signup:course-success"))
@@ -138,6 +164,81 @@ class CourseSignupViewTest(TestCase):
         self.assertTemplateUsed(response, "signups/page_unavailable.html")
 
 
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SignupOptionsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.school = School.objects.create(
+            name="Cache School", kommune="Cache Kommune", enrolled_at=date.today(), ean_nummer="5790001234567"
+        )
+        self.course = Course.objects.create(
+            start_date=date.today() + timedelta(days=7),
+            end_date=date.today() + timedelta(days=7),
+            registration_deadline=date.today() + timedelta(days=5),
+            location=Location.objects.create(name="Sted", municipality="Vejle"),
+            capacity=3,
+            is_published=True,
+        )
+        self.client.force_login(User.objects.create_user(username="staff", password="x", is_staff=True))
+
+    def test_repeat_page_load_uses_cached_options(self):
+        self.client.get(reverse("signup:course"))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("signup:course"))
+        self.assertContains(response, "Vejle - 3 ledige pladser")
+        self.assertContains(response, "Cache School (Cache Kommune)")
+        tables = ("courses_course", "schools_school", "signups_signuppage", "signups_signupformfield")
+        self.assertEqual([q["sql"] for q in ctx.captured_queries if any(t in q["sql"] for t in tables)], [])
+
+    def test_signup_updates_free_seats(self):
+        self.assertIn("3 ledige pladser", dict(options.course_options())[self.course.pk])
+        signup = CourseSignUp.objects.create(
+            course=self.course, school=self.school, participant_name="A", participant_email="a@example.com"
+        )
+        self.assertIn("2 ledige pladser", dict(options.course_options())[self.course.pk])
+        signup.delete()
+        self.assertIn("3 ledige pladser", dict(options.course_options())[self.course.pk])
+
+    def test_unpublished_course_is_dropped(self):
+        options.course_options()
+        self.course.is_published = False
+        self.course.save()
+        self.assertEqual(options.course_options(), [])
+
+    def test_school_and_kommune_changes_invalidate(self):
+        self.assertEqual(options.municipality_options(), ["Cache Kommune"])
+        self.school.opted_out_at = date.today()
+        self.school.save()
+        self.assertEqual(options.school_options(), [])
+        options.kommune_options()
+        Kommune.objects.create(name="Anden Kommune")
+        self.assertIn("Anden Kommune", [name for _, name in options.kommune_options()])
+
+    def test_seat_info_content_follows_settings(self):
+        from apps.core.models import ProjectSettings
+
+        from .models import SeatInfoContent
+
+        settings = ProjectSettings.get()
+        settings.show_seat_info_messages = False
+        settings.save()
+        self.assertEqual(options.seat_info_content(), {})
+        settings.show_seat_info_messages = True
+        settings.save()
+        self.assertEqual(len(options.seat_info_content()), SeatInfoContent.objects.count())
+        with self.assertNumQueries(0):
+            options.seat_info_content()
+
+    def test_page_edit_invalidates(self):
+        page = options.get_signup_page(SignupPageType.COURSE_SIGNUP)
+        page.title = "Ny overskrift"
+        page.save()
+        self.assertEqual(options.get_signup_page(SignupPageType.COURSE_SIGNUP).title, "Ny overskrift")
+        SignupFormField.objects.create(signup_page=page, field_type=FieldType.CHECKBOX, label="Vilkår")
+        self.assertEqual(len(options.get_signup_page(SignupPageType.COURSE_SIGNUP).form_fields.all()), 1)
+
+
 class CourseSignupWithDynamicFieldsTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -390,6 +491,52 @@ class CheckSchoolSeatsViewTest(TestCase):
         )
         self.assertEqual(response.status_code, 404)
 
+    def _signup(self, start_date, email):
+        course = Course.objects.create(start_date=start_date, end_date=start_date, capacity=30)
+        return CourseSignUp.objects.create(
+            course=course, school=self.school, participant_name=email, participant_email=email
+        )
+
+    def test_seat_state_matches_seats_for_course(self):
+        """The batched seat state gives the same buckets as School.seats_for_course."""
+        from .seats import seat_state
+
+        self.school.active_from = date(2024, 9, 1)
+        self.school.save()
+        self._signup(date(2025, 3, 1), "first@example.com")
+        self._signup(date(2025, 10, 1), "later@example.com")
+        self._signup(date(2026, 9, 1), "later2@example.com")
+        for start in (date(2025, 5, 1), date(2026, 3, 15), date(2026, 10, 1)):
+            course = Course.objects.create(start_date=start, end_date=start, capacity=30)
+            school = School.objects.get(pk=self.school.pk)
+            expected = school.seats_for_course(course)
+            self.assertEqual(seat_state(self.school.pk, course.pk).seats_for_date(start), expected)
+
+    def test_check_seats_batches_queries(self):
+        Person.objects.create(school=self.school, name="Koordinator", is_koordinator=True)
+        params = {"school_id": self.school.pk, "course_id": self.course.pk}
+        self.client.get(reverse("signup:check-school-seats"), params)  # session, settings
+        with self.assertNumQueries(2):  # seat state + ProjectSettings, which the dummy test cache doesn't keep
+            response = self.client.get(reverse("signup:check-school-seats"), params)
+        self.assertEqual(response.json()["koordinator"]["name"], "Koordinator")
+
+    def test_unchanged_seats_are_not_modified(self):
+        url = reverse("signup:check-school-seats")
+        params = {"school_id": self.school.pk, "course_id": self.course.pk}
+        response = self.client.get(url, params)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self._signup(date(2026, 2, 1), "new@example.com")
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["used_seats"], 1)
+        self.assertNotEqual(response["ETag"], etag)
+
 
 class ValidateSchoolPasswordViewTest(TestCase):
     def setUp(self):
@@ -1,15 +1,21 @@
+import hashlib
+
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.views import View
 from django.views.generic import TemplateView
 
-from apps.courses.models import CourseSignUp
+from apps.courses.admission import AdmissionBusy, CourseFull, admit_signups
 from apps.schools.models import School
 
 from .auth import resolve_signup_auth
 from .forms import CourseSignupForm, SchoolSignupForm
-from .models import SignupPage, SignupPageType
+from .models import SignupPageType
+from .options import get_signup_page, seat_info_content
+from .seats import seat_state
 
 
 class SignupPageMixin:
@@ -18,10 +24,7 @@ class SignupPageMixin:
     page_type = None
 
     def get_signup_page(self):
-        try:
-            return SignupPage.objects.get(page_type=self.page_type)
-        except SignupPage.DoesNotExist:
-            return None
+        return get_signup_page(self.page_type)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -35,10 +38,7 @@ class CourseSignupView(View):
     template_name = "signups/course_signup.html"
 
     def get_signup_page(self):
-        try:
-            return SignupPage.objects.prefetch_related("form_fields").get(page_type=SignupPageType.COURSE_SIGNUP)
-        except SignupPage.DoesNotExist:
-            return None
+        return get_signup_page(SignupPageType.COURSE_SIGNUP)
 
     def get(self, request):
         page = self.get_signup_page()
@@ -117,20 +117,37 @@ class CourseSignupView(View):
             course = form.cleaned_data["course"]
             school = form.cleaned_data["school"]
 
-            # Create a signup for each participant
-            created_signups = []
-            for participant in participants:
-                signup = CourseSignUp.objects.create(
-                    course=course,
-                    school=school,
-                    participant_name=participant["name"],
-                    participant_email=participant["email"],
-                    participant_phone=participant.get("phone", ""),
-                    participant_title=participant.get("title", ""),
-                    is_underviser=participant.get("is_underviser", True),
+            # Reserve seats and create all participants atomically, so simultaneous submissions can't overbook
+            try:
+                created_signups = admit_signups(
+                    course,
+                    [
+                        {
+                            "school": school,
+                            "participant_name": participant["name"],
+                            "participant_email": participant["email"],
+                            "participant_phone": participant.get("phone", ""),
+                            "participant_title": participant.get("title", ""),
+                            "is_underviser": participant.get("is_underviser", True),
+                        }
+                        for participant in participants
+                    ],
                 )
-                created_signups.append(signup)
-                # Send confirmation email to each participant
+            except CourseFull as e:
+                if e.available:
+                    error = f"Der er kun {e.available} ledige pladser tilbage på kurset. I har tilmeldt {e.requested}."
+                else:
+                    error = "Kurset er desværre fuldt booket."
+                form.add_error("course", error)
+                return render(request, self.template_name, {"form": form, "page": page, **auth_context}, status=409)
+            except AdmissionBusy:
+                form.add_error(None, "Der er mange tilmeldinger lige nu. Prøv igen om et øjeblik.")
+                response = render(request, self.template_name, {"form": form, "page": page, **auth_context}, status=503)
+                response["Retry-After"] = "5"
+                return response
+
+            # Send confirmation email to each participant
+            for signup in created_signups:
                 send_signup_confirmation(signup)
 
             # Send notification to admin
@@ -198,10 +215,7 @@ class CourseSignupSuccessView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        try:
-            context["page"] = SignupPage.objects.get(page_type=SignupPageType.COURSE_SIGNUP)
-        except SignupPage.DoesNotExist:
-            context["page"] = None
+        context["page"] = get_signup_page(SignupPageType.COURSE_SIGNUP)
         return context
 
 
@@ -210,25 +224,29 @@ class CheckSchoolSeatsView(View):
 
     If course_id is provided, returns seat info scoped to that course's
     school year (first-year vs fortsætter bucket).
+
+    The signup form calls this on every school or course change. The seat
+    state comes from one query (see seats.py) and the response carries an
+    ETag of its content with Cache-Control: no-cache, so the browser
+    revalidates each time and an unchanged answer is a bodiless 304.
     """
 
     def get(self, request):
         school_id = request.GET.get("school_id")
         if not school_id:
             return JsonResponse({"error": "Missing school_id"}, status=400)
-        try:
-            school = School.objects.get(pk=school_id)
-        except School.DoesNotExist:
+        course_id = request.GET.get("course_id")
+        school = seat_state(school_id, course_id)
+        if school is None:
             return JsonResponse({"error": "School not found"}, status=404)
 
         # Get koordinator info
-        koordinator = school.people.filter(is_koordinator=True).first()
         koordinator_info = None
-        if koordinator:
+        if school.koordinator_name is not None:
             koordinator_info = {
-                "name": koordinator.name,
-                "email": koordinator.email or None,
-                "phone": koordinator.phone or None,
+                "name": school.koordinator_name,
+                "email": school.koordinator_email or None,
+                "phone": school.koordinator_phone or None,
             }
 
         school_public_url = None
@@ -238,51 +256,31 @@ class CheckSchoolSeatsView(View):
             school_billing_url = reverse("school-public-billing-update", args=[school.signup_token])
 
         missing_ean = not school.ean_nummer and not school.kommunen_betaler
-        missing_oeko = not school.people.filter(is_oekonomisk_ansvarlig=True).exists()
+        missing_oeko = not school.has_oekonomisk_ansvarlig
 
-        course_id = request.GET.get("course_id")
         if course_id:
-            from apps.courses.models import Course
-
-            try:
-                course = Course.objects.get(pk=course_id)
-            except Course.DoesNotExist:
+            if school.course_start_date is None:
                 return JsonResponse({"error": "Course not found"}, status=404)
 
-            info = school.seats_for_course(course)
-
-            # Load seat info content for all scenarios (if enabled)
-            from apps.core.models import ProjectSettings
-            from apps.signups.models import SeatInfoContent
-
-            seat_content = {}
-            if ProjectSettings.get().show_seat_info_messages:
-                for sc in SeatInfoContent.objects.all():
-                    seat_content[sc.scenario] = {
-                        "title": sc.title,
-                        "content": sc.content,
-                    }
-
-            return JsonResponse(
-                {
-                    "free_seats": info["free"],
-                    "used_seats": info["used"],
-                    "remaining_seats": info["remaining"],
-                    "is_first_year": info["is_first_year"],
-                    "school_year": info["school_year"],
-                    "has_available_seats": info["remaining"] > 0,
-                    "seat_content": seat_content,
-                    "koordinator": koordinator_info,
-                    "school_public_url": school_public_url,
-                    "school_billing_url": school_billing_url,
-                    "missing_ean": missing_ean,
-                    "missing_oeko": missing_oeko,
-                }
-            )
-
-        # Fallback: no course_id, return basic seat info
-        return JsonResponse(
-            {
+            info = school.seats_for_date(school.course_start_date)
+            data = {
+                "free_seats": info["free"],
+                "used_seats": info["used"],
+                "remaining_seats": info["remaining"],
+                "is_first_year": info["is_first_year"],
+                "school_year": info["school_year"],
+                "has_available_seats": info["remaining"] > 0,
+                # Seat info content for all scenarios (if enabled)
+                "seat_content": seat_info_content(),
+                "koordinator": koordinator_info,
+                "school_public_url": school_public_url,
+                "school_billing_url": school_billing_url,
+                "missing_ean": missing_ean,
+                "missing_oeko": missing_oeko,
+            }
+        else:
+            # Fallback: no course_id, return basic seat info
+            data = {
                 "has_available_seats": school.has_available_seats,
                 "remaining_seats": school.remaining_seats,
                 "koordinator": koordinator_info,
@@ -291,7 +289,11 @@ class CheckSchoolSeatsView(View):
                 "missing_ean": missing_ean,
                 "missing_oeko": missing_oeko,
             }
-        )
+
+        response = JsonResponse(data)
+        response["ETag"] = quote_etag(hashlib.sha1(response.content).hexdigest())
+        patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(request, etag=response["ETag"], response=response)
 
 
 class CheckCourseSeatsView(View):
@@ -339,10 +341,7 @@ class SchoolSignupView(View):
     template_name = "signups/school_signup.html"
 
     def get_signup_page(self):
-        try:
-            return SignupPage.objects.prefetch_related("form_fields").get(page_type=SignupPageType.SCHOOL_SIGNUP)
-        except SignupPage.DoesNotExist:
-            return None
+        return get_signup_page(SignupPageType.SCHOOL_SIGNUP)
 
     def get(self, request):
         page = self.get_signup_page()
@@ -487,10 +486,7 @@ class SchoolSignupSuccessView(TemplateView):
         from datetime import date
 
         context = super().get_context_data(**kwargs)
-        try:
-            context["page"] = SignupPage.objects.get(page_type=SignupPageType.SCHOOL_SIGNUP)
-        except SignupPage.DoesNotExist:
-            context["page"] = None
+        context["page"] = get_signup_page(SignupPageType.SCHOOL_SIGNUP)
 
         # Get enrollment info from session
         active_from_str = self.request.session.pop("school_signup_active_from", None)
@@ -6,6 +6,7 @@ from django_summernote.widgets import SummernoteWidget
 from apps.courses.models import Instructor
 from apps.schools.models import Kommune, School
 from apps.signups.forms import DynamicFieldsMixin
+from apps.signups.options import kommune_options
 
 from .models import Webinar
 
@@ -48,6 +49,7 @@ class WebinarSignupForm(DynamicFieldsMixin, forms.Form):
 
     def __init__(self, *args, signup_page=None, submit_label="Tilmeld", **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields["kommune"].choices = [("", self.fields["kommune"].empty_label), *kommune_options()]
 
         # Populate school_name choices based on the (possibly bound) kommune.
         choices = [("", "Vælg skole...")]
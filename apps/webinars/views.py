@@ -8,7 +8,8 @@ from django.views import View
 from django.views.generic import CreateView, DetailView, ListView, UpdateView
 
 from apps.core.decorators import staff_required
-from apps.signups.models import SignupPage, SignupPageType
+from apps.signups.models import SignupPageType
+from apps.signups.options import get_signup_page
 
 from .forms import WebinarForm, WebinarSignupForm
 from .models import Webinar, WebinarSignUp
@@ -22,9 +23,7 @@ class WebinarDetailView(View):
     template_name = "webinars/webinar_detail.html"
 
     def _get_signup_page(self):
-        return (
-            SignupPage.objects.prefetch_related("form_fields").filter(page_type=SignupPageType.WEBINAR_SIGNUP).first()
-        )
+        return get_signup_page(SignupPageType.WEBINAR_SIGNUP)
 
     def _get_webinar(self, slug):
         return get_object_or_404(Webinar, slug=slug, is_published=True)
@@ -111,7 +110,7 @@ class WebinarSignupSuccessView(View):
 
     def get(self, request, slug):
         webinar = get_object_or_404(Webinar, slug=slug, is_published=True)
-        page = SignupPage.objects.filter(page_type=SignupPageType.WEBINAR_SIGNUP).first()
+        page = get_signup_page(SignupPageType.WEBINAR_SIGNUP)
         return render(
             request,
             self.template_name,
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "apps.audit.middleware.AuditMiddleware",
+    "apps.core.middleware.PerformanceMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -112,6 +113,13 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "Basal <noreply@basal.dk>")
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "")
 RESEND_WEBHOOK_SECRET = os.environ.get("RESEND_WEBHOOK_SECRET", "")
+# Resend HTTP transport (see apps/emails/transport.py). Point RESEND_API_URL at
+# `manage.py fake_resend_server` to test sending offline.
+EMAIL_TRANSPORT = os.environ.get("EMAIL_TRANSPORT", "apps.emails.transport.ResendTransport")
+RESEND_API_URL = os.environ.get("RESEND_API_URL", "https://api.resend.com")
+RESEND_CONNECT_TIMEOUT = float(os.environ.get("RESEND_CONNECT_TIMEOUT", "5"))
+RESEND_READ_TIMEOUT = float(os.environ.get("RESEND_READ_TIMEOUT", "30"))
+RESEND_MAX_RETRIES = int(os.environ.get("RESEND_MAX_RETRIES", "3"))
 SCHOOL_SIGNUP_BCC_EMAIL = os.environ.get("SCHOOL_SIGNUP_BCC_EMAIL", "niels@osogdata.dk")
 COURSE_SIGNUP_NOTIFICATION_EMAIL = os.environ.get("COURSE_SIGNUP_NOTIFICATION_EMAIL", "basal@sundkom.dk")
 
@@ -127,3 +135,29 @@ S3_ACCESS_KEY = os.environ.get("S3_ACCESS_KEY", "")
 S3_SECRET_KEY = os.environ.get("S3_SECRET_KEY", "")
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "")
 S3_ENDPOINT = os.environ.get("S3_ENDPOINT", "")
+
+# Media backups: "incremental" (content-addressed blobs + manifest) or "tar" (full media.tar.gz)
+BACKUP_MEDIA_MODE = os.environ.get("BACKUP_MEDIA_MODE", "incremental")
+# Database dumps: "plain" (.sql.gz), "custom" (pg_dump -Fc) or "directory" (parallel pg_dump -Fd)
+BACKUP_DB_FORMAT = os.environ.get("BACKUP_DB_FORMAT", "plain")
+BACKUP_DB_JOBS = int(os.environ.get("BACKUP_DB_JOBS", "0")) or None
+# Compression of the plain dump and media tar: "gzip" or multithreaded "zstd"
+BACKUP_COMPRESSION = os.environ.get("BACKUP_COMPRESSION", "gzip")
+
+# Per-request performance instrumentation (Server-Timing for staff, slow request log)
+PERFORMANCE_MONITORING = os.environ.get("PERFORMANCE_MONITORING", "True").lower() in ("true", "1", "yes")
+PERFORMANCE_SLOW_REQUEST_MS = int(os.environ.get("PERFORMANCE_SLOW_REQUEST_MS", "1000"))
+PERFORMANCE_SLOW_REQUEST_QUERIES = int(os.environ.get("PERFORMANCE_SLOW_REQUEST_QUERIES", "50"))
+# How long a public course signup waits for the course's row lock before asking the user to retry
+SIGNUP_LOCK_TIMEOUT_MS = int(os.environ.get("SIGNUP_LOCK_TIMEOUT_MS", "5000"))
+# Per-process metric snapshots summed by /metrics; must be shared by all workers (and the job worker)
+METRICS_DIR = os.environ.get("METRICS_DIR", str(BASE_DIR / "var" / "metrics"))
+
+# File-based so every gunicorn worker (and the job worker) sees the same entries and invalidations
+CACHE_DIR = os.environ.get("CACHE_DIR", str(BASE_DIR / "var" / "cache"))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CACHE_DIR,
+    }
+}
@@ -1,5 +1,17 @@
+import os
+
 from .development import *  # noqa: F403
 
 # Never send real emails during tests
 RESEND_API_KEY = None
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# The file-based cache would carry entries between tests and xdist workers.
+# Tests that exercise caching opt in with override_settings.
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+# Point the suite at a real Postgres (e.g. for the seat admission concurrency test)
+if os.environ.get("TEST_DATABASE_URL"):
+    import dj_database_url
+
+    DATABASES = {"default": dj_database_url.parse(os.environ["TEST_DATABASE_URL"])}
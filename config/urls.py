@@ -3,7 +3,13 @@ from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.urls import include, path
 
-from apps.core.views import CronBackupView, CronSendRemindersView
+from apps.core.views import (
+    CronBackupView,
+    CronJobStatusView,
+    CronProcessWebhooksView,
+    CronSendRemindersView,
+    MetricsView,
+)
 from apps.emails.views import ResendWebhookView
 from apps.schools.views import (
     PublicCourseSignUpUpdateView,
@@ -20,6 +26,10 @@ urlpatterns = [
     # Cron endpoints
     path("cron/send-reminders/", CronSendRemindersView.as_view(), name="cron-send-reminders"),
     path("cron/backup/", CronBackupView.as_view(), name="cron-backup"),
+    path("cron/process-webhooks/", CronProcessWebhooksView.as_view(), name="cron-process-webhooks"),
+    path("cron/jobs/<int:pk>/", CronJobStatusView.as_view(), name="cron-job-status"),
+    # Prometheus metrics (CRON_SECRET protected)
+    path("metrics", MetricsView.as_view(), name="metrics"),
     # Resend webhook
     path("webhooks/resend/", ResendWebhookView.as_view(), name="resend-webhook"),
     # Public school view (token-based access)
@@ -93,7 +93,23 @@ if [ "$DEPLOY_ENV" = "prod" ]; then
     http_code=$(echo "$backup_response" | tail -n1)
     body=$(echo "$backup_response" | sed '$d')
 
-    if [ "$http_code" = "200" ]; then
+    # The backup runs in the job worker; wait for it so the deploy doesn't restart the worker mid-backup
+    backup_status="failed"
+    if [ "$http_code" = "202" ]; then
+      status_url=$(echo "$body" | python3 -c 'import json, sys; print(json.load(sys.stdin)["status_url"])')
+      for i in $(seq 1 120); do
+        sleep 10
+        backup_status=$(curl -s -H "Authorization: Bearer $CRON_SECRET" "$status_url" \
+          | python3 -c 'import json, sys; print(json.load(sys.stdin).get("status", "failed"))' 2>/dev/null || echo "unknown")
+        echo "   Backup status: $backup_status"
+        if [ "$backup_status" = "succeeded" ] || [ "$backup_status" = "failed" ]; then
+          break
+        fi
+      done
+      body=$(curl -s -H "Authorization: Bearer $CRON_SECRET" "$status_url")
+    fi
+
+    if [ "$backup_status" = "succeeded" ]; then
       echo "✅ Backup completed successfully"
     else
       echo "❌ Backup failed (HTTP $http_code): $body"